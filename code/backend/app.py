@@ -1,13 +1,32 @@
 # backend/app.py
-from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, APIRouter
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, APIRouter, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-from backend.markdown_parser import parse_markdown
-from backend.database import create_database, store_in_database, get_latest_contact, get_all_contacts
+from fastapi.concurrency import run_in_threadpool
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+from backend.markdown_parser import iter_block_batches, structure_blocks
+from backend.database import (create_database, store_many, get_latest_contact, query_contacts,
+                              get_contact, latest_change_seq, query_changes, iter_contacts, normalize_contact,
+                              DETAIL_FIELDS)
+from backend.contact_store import ContactStore, STORE_FIELDS
+from backend.websocket import ContactHub, LIVE_FIELDS, send_frames
+from backend.clusters import ClusterIndex, DETAIL_ZOOM
+from backend.jobs import QueueFull, create_job_queue
 import asyncio
+import json
 import logging
+import os
+import tempfile
+import threading
+import uuid
 
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # stdlib json parses the same payloads, just slower
+    _json_loads = json.loads
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -28,29 +47,47 @@ class ConnectionManager:
             self.active_connections.remove(websocket)
             logger.info(f"Client disconnected. Remaining connections: {len(self.active_connections)}")
 
-    async def broadcast(self, data: dict):
-        dead_connections = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except WebSocketDisconnect:
-                dead_connections.append(connection)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                dead_connections.append(connection)
-        
-        for dead_connection in dead_connections:
-            self.disconnect(dead_connection)
+    async def broadcast(self, data: dict, seq: Optional[int] = None):
+        """Publish to the hub; per-client sender tasks do the actual sends"""
+        hub.publish(data, seq)
 
+# Columnar copy of reports for vectorized reads, appended to on ingest
+contact_store = ContactStore()
+# Live updates go out every WS_FLUSH_MS, or as soon as a frame's worth is pending
+hub = ContactHub(flush_interval=float(os.environ.get('WS_FLUSH_MS', 100)) / 1000)
+clusters = ClusterIndex()
 manager = ConnectionManager()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await jobs.stop()
+    parse_pool.shutdown(wait=False)
+    read_pool.shutdown(wait=False)
+    db_pool.shutdown(wait=True)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the database and any other startup tasks"""
     try:
         create_database()
         logger.info("Database initialized successfully")
+        # Live event seqs are database change seqs, so they survive restarts
+        hub.last_seq = latest_change_seq()
+        # Changes logged during the load are re-applied by the first sync, which is harmless
+        contact_store.seq = hub.last_seq
+        contact_store.load(iter_contacts(STORE_FIELDS))
+        logger.info(f"Contact store loaded with {len(contact_store)} contacts")
+        cursor = None
+        while True:
+            page = query_contacts(limit=5000, cursor=cursor)
+            clusters.add_many(page['contacts'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        logger.info("Cluster index built")
+        await jobs.start()
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise e
@@ -64,66 +101,401 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/process_report/")
-async def process_report(file: UploadFile = File(...)):
-    try:
-        content = await file.read()
-        structured_data = parse_markdown(content.decode('utf-8'))
-        logger.info(f"Processing structured data with {len(structured_data)} entries")
+# Parsing is CPU-bound and runs in worker processes; SQLite writes go
+# through a single thread since ContactWriter serializes them anyway.
+parse_pool = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+# Reading the spooled upload is I/O; one thread per concurrent job
+read_pool = ThreadPoolExecutor(thread_name_prefix="report-reader")
+
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'maritime_uploads'))
+UPLOAD_CHUNK_SIZE = 1 << 20
+INGEST_BATCH_SIZE = 500
+BULK_MAX_BYTES = int(os.environ.get('BULK_MAX_BYTES', 64 * 1024 * 1024))
+contact_store_lock = threading.Lock()
+publish_lock = asyncio.Lock()
+
+
+def sync_contact_store():
+    """
+    Bring the contact store up to the reports change log, including
+    updates and deletes made outside this process. Cheap when nothing
+    changed: one indexed query on report_changes.
+    """
+    with contact_store_lock:
+        while True:
+            changes = query_changes(contact_store.seq, STORE_FIELDS)
+            contact_store.apply_changes(changes)
+            if not changes['more']:
+                break
+
+
+def _contact_row(data: dict) -> dict:
+    """The stored fields of a contact, with the defaults reports have always used"""
+    return {
+        'latitude': data.get('latitude'),
+        'longitude': data.get('longitude'),
+        'speed': data.get('speed', 0),
+        'type': data.get('type', 'unknown'),
+        'timestamp': data.get('timestamp', 'N/A'),
+        'significance': data.get('significance', 'N/A'),
+        **{key: data.get(key) for key in DETAIL_FIELDS}
+    }
 
-        for data in structured_data:
+
+async def store_and_publish(payloads: list, offset: int = 0):
+    """
+    Validate and store one batch of contact dicts, add the accepted ones to
+    the cluster index and broadcast them. Returns (accepted_count, rejected)
+    with rejected indexes shifted by offset.
+    """
+    loop = asyncio.get_running_loop()
+    contacts = [_contact_row(data) if isinstance(data, dict) else data for data in payloads]
+    # Concurrent jobs and bulk requests must publish in the order their rows
+    # were stored, since live frames and replay rely on ascending seqs
+    async with publish_lock:
+        results = await loop.run_in_executor(db_pool, store_many, contacts)
+        stored = [r for r in results if r['accepted']]
+        # Live events carry the stored row and its id, which clients use to fetch details
+        accepted = [{'id': r['id'], **normalize_contact(contacts[r['index']])} for r in stored]
+        for r, data in zip(stored, accepted):
             try:
-                contact_data = {
-                    'latitude': data.get('latitude'),
-                    'longitude': data.get('longitude'),
-                    'speed': data.get('speed', 0),
-                    'type': data.get('type', 'unknown'),
-                    'timestamp': data.get('timestamp', 'N/A'),
-                    'significance': data.get('significance', 'N/A')
-                }
-                
-                store_in_database(contact_data)
-                
-                
-                if contact_data['latitude'] is not None and contact_data['longitude'] is not None:
-                    await manager.broadcast(data)
-                    
+                await manager.broadcast(data, r['seq'])
             except Exception as e:
-                logger.error(f"Error processing contact: {e}")
-                continue  
-        
-        return {
-            "status": "success",
-            "message": "Processed successfully", 
-            "contact_count": len(structured_data)
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing report: {e}")
-        return {"status": "error", "message": str(e)}, 500
+                logger.error(f"Error broadcasting contact: {e}")
+    clusters.add_many(accepted)
+    if stored:
+        await run_in_threadpool(sync_contact_store)
+    rejected = [{**r, 'index': r['index'] + offset} for r in results if not r['accepted']]
+    return len(accepted), rejected
+
+
+async def ingest_report(path: str) -> dict:
+    """
+    Stream a spooled report from disk, storing and broadcasting each batch
+    of contacts as soon as it is parsed; runs as a background job.
+    """
+    loop = asyncio.get_running_loop()
+    batches = iter_block_batches(path, INGEST_BATCH_SIZE, UPLOAD_CHUNK_SIZE)
+    contact_count = 0
+    accepted_count = 0
+    rejected = []
+    try:
+        while True:
+            blocks = await loop.run_in_executor(read_pool, next, batches, None)
+            if blocks is None:
+                break
+            structured_data = await loop.run_in_executor(parse_pool, structure_blocks, blocks)
+
+            accepted, batch_rejected = await store_and_publish(structured_data, contact_count)
+            rejected.extend(batch_rejected)
+            contact_count += len(structured_data)
+            accepted_count += accepted
+    finally:
+        batches.close()
+        os.remove(path)
+
+    logger.info(f"Processed report with {contact_count} entries")
+    if rejected:
+        logger.warning(f"Rejected {len(rejected)} of {contact_count} contacts")
+    return {
+        "contact_count": contact_count,
+        "accepted_count": accepted_count,
+        "rejected": rejected
+    }
+
+jobs = create_job_queue(
+    ingest_report,
+    workers=int(os.environ.get('INGEST_WORKERS', 2)),
+    maxsize=int(os.environ.get('INGEST_QUEUE_SIZE', 100))
+)
+
+
+@app.post("/process_report/", status_code=202)
+async def process_report(file: UploadFile = File(...)):
+    """
+    Spool a report to disk for background processing and return its job id.
+
+    A full queue is refused with 429 before anything is spooled; the spool
+    file is removed on every path that does not hand it to a job.
+    """
+    if await jobs.is_full():
+        raise HTTPException(status_code=429, detail=f"Job queue is full ({jobs.maxsize} pending)",
+                            headers={"Retry-After": "5"})
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.md")
+    queued = False
+    try:
+        with open(path, 'wb') as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await run_in_threadpool(f.write, chunk)
+        # The queue may have filled up while we spooled
+        job_id = await jobs.submit(path)
+        queued = True
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    finally:
+        if not queued:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return {"status": "queued", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+def parse_bulk_contacts(body: bytes, ndjson: bool) -> list:
+    """Decode a JSON array, or NDJSON with one contact object per line"""
+    if ndjson:
+        return [_json_loads(line) for line in body.splitlines() if line.strip()]
+    contacts = _json_loads(body)
+    if not isinstance(contacts, list):
+        raise ValueError("expected a JSON array of contacts")
+    return contacts
+
+@router.post("/contacts/bulk")
+async def bulk_contacts(request: Request):
+    """
+    Store contacts sent directly as a JSON array or NDJSON (Content-Type:
+    application/x-ndjson), skipping the markdown report round-trip.
+
+    Runs inline rather than as a job; each contact is validated on its own
+    and the response lists rejected indexes with reasons, like a job result.
+    Bodies over BULK_MAX_BYTES are refused with 413 before they are buffered.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Payload larger than {BULK_MAX_BYTES} bytes")
+    declared = request.headers.get('content-length', '')
+    if declared.isdigit() and int(declared) > BULK_MAX_BYTES:
+        raise too_large
+    # Count as we read, so a chunked or mislabelled upload is cut off at the limit
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+    body = b''.join(chunks)
+    ndjson = 'ndjson' in request.headers.get('content-type', '')
+    loop = asyncio.get_running_loop()
+    try:
+        payloads = await loop.run_in_executor(read_pool, parse_bulk_contacts, body, ndjson)
+    except ValueError as e:  # json.JSONDecodeError and orjson.JSONDecodeError both subclass it
+        raise HTTPException(status_code=400, detail=f"Invalid contact payload: {e}")
+
+    accepted_count = 0
+    rejected = []
+    for start in range(0, len(payloads), INGEST_BATCH_SIZE):
+        accepted, batch_rejected = await store_and_publish(payloads[start:start + INGEST_BATCH_SIZE], start)
+        accepted_count += accepted
+        rejected.extend(batch_rejected)
+    if rejected:
+        logger.warning(f"Rejected {len(rejected)} of {len(payloads)} bulk contacts")
+    return {
+        "contact_count": len(payloads),
+        "accepted_count": accepted_count,
+        "rejected": rejected
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+@router.get("/sync/changes")
+async def get_changes(since: int = Query(..., ge=0), limit: int = Query(10000, ge=1, le=50000)):
+    """
+    Contacts changed after change seq since, as {'seq', 'fields', 'rows',
+    'deleted', 'more'} in the live frames' row format.
+
+    Page with the returned seq while more is true. A since ahead of the
+    server (e.g. the database was replaced) answers reset, and the client
+    reloads its viewport.
+    """
+    current = await run_in_threadpool(latest_change_seq)
+    if since > current:
+        return {'reset': True, 'seq': current}
+    changes = await run_in_threadpool(query_changes, since, LIVE_FIELDS, limit)
+    return {'fields': LIVE_FIELDS, **changes}
+
+# The response shape /initial_contacts has always had
+INITIAL_CONTACT_FIELDS = ('latitude', 'longitude', 'speed', 'type', 'significance', 'timestamp')
 
 @router.get("/initial_contacts")
 async def get_initial_contacts():
+    """Every contact as dicts; the map loads /contacts per viewport instead"""
     try:
-        contacts = get_all_contacts()
+        await run_in_threadpool(sync_contact_store)
+        contacts = await run_in_threadpool(
+            lambda: contact_store.rows(contact_store.select(), fields=INITIAL_CONTACT_FIELDS))
         return contacts
     except Exception as e:
         logger.error(f"Error fetching initial contacts: {e}")
         return {"status": "error", "message": str(e)}, 500
 
+def _split_list(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(',') if v.strip()] if value else None
+
+def _parse_bbox(bbox: Optional[str]):
+    if not bbox:
+        return None
+    try:
+        bounds = tuple(float(v) for v in bbox.split(','))
+    except ValueError:
+        bounds = ()
+    if len(bounds) != 4:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    return bounds
+
+# Sync def: FastAPI runs it in the threadpool, so the R*Tree query does not block the event loop
+@router.get("/contacts")
+def get_contacts(
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    type: Optional[str] = Query(None, description="Comma-separated contact types"),
+    significance: Optional[str] = Query(None, description="Comma-separated significance values"),
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[int] = None
+):
+    """
+    Contacts inside a map viewport, paginated with a keyset cursor.
+
+    seq is the change seq read before the query, so the page reflects every
+    change up to it; clients follow on with /sync/changes?since=seq.
+    """
+    bounds = _parse_bbox(bbox)
+    seq = latest_change_seq()
+    page = query_contacts(
+        bbox=bounds,
+        start=start,
+        end=end,
+        types=_split_list(type),
+        significance=_split_list(significance),
+        limit=limit,
+        cursor=cursor
+    )
+    return {**page, 'seq': seq}
+
+@router.get("/contacts/search")
+async def search_contacts(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_nm: Optional[float] = Query(None, gt=0),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    type: Optional[str] = Query(None, description="Comma-separated contact types"),
+    significance: Optional[str] = Query(None, description="Comma-separated significance values"),
+    within_hours: Optional[float] = Query(None, gt=0),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_speed: Optional[float] = None,
+    max_speed: Optional[float] = None,
+    limit: int = Query(500, ge=0, le=5000)
+):
+    """
+    Analytics filters over the in-memory contact store, e.g. suspicious
+    contacts within 50 nm of a point in the last 6h:
+    ?lat=12.5&lon=45.2&radius_nm=50&significance=suspicious&within_hours=6
+
+    Returns the total count and the most recent matches, newest first.
+    """
+    near = None
+    if lat is not None or lon is not None or radius_nm is not None:
+        if lat is None or lon is None or radius_nm is None:
+            raise HTTPException(status_code=400, detail="lat, lon and radius_nm go together")
+        near = (lat, lon)
+    await run_in_threadpool(sync_contact_store)
+    positions = await run_in_threadpool(
+        contact_store.select,
+        near=near, radius_nm=radius_nm, bbox=_parse_bbox(bbox),
+        types=_split_list(type), significance=_split_list(significance),
+        since=since, until=until, within_hours=within_hours,
+        min_speed=min_speed, max_speed=max_speed
+    )
+    return {
+        'count': len(positions),
+        'contacts': contact_store.rows(positions[::-1][:limit])
+    }
+
+@router.get("/contacts/{contact_id}")
+async def get_contact_detail(contact_id: int):
+    """Full record of one contact; live updates and viewport pages only carry what a marker needs"""
+    contact = await run_in_threadpool(get_contact, contact_id)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Unknown contact id")
+    return contact
+
+@router.get("/clusters")
+def get_clusters(
+    z: int = Query(..., ge=0),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat")
+):
+    """Pre-aggregated clusters for zoomed-out map views; sync def, so aggregation runs in the threadpool"""
+    return {
+        'zoom': z,
+        'detail_zoom': DETAIL_ZOOM,
+        'clusters': clusters.clusters(z, _parse_bbox(bbox))
+    }
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    last_seq: Optional[int] = None,
+    bbox: Optional[str] = None,
+    type: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = 'json'
+):
+    """
+    Live contacts as batched frames of projected rows, see Subscriber.encode.
+
+    The query string sets the initial subscription (bbox, comma-separated
+    type and fields, format=json|msgpack); clients change it later by
+    sending {"subscribe": {"bbox": [...], "types": [...]}}. uvicorn
+    negotiates permessage-deflate when the client offers it; that cuts
+    bytes about 3x again but compresses per connection, which at ~1k viewers
+    costs more CPU than the rest of the broadcast (benchmarks/bench_ws.py).
+    """
     await manager.connect(websocket)
+    oldest = hub.oldest_seq()
+    missed = last_seq is not None and last_seq < hub.last_seq and (oldest is None or last_seq < oldest - 1)
+    if missed or (last_seq is not None and last_seq > hub.last_seq):
+        # Events were evicted from the ring buffer, the server restarted or the
+        # database was replaced; the client catches up with /sync/changes
+        await websocket.send_json({'resync': True, 'seq': hub.last_seq})
+        last_seq = None
+    try:
+        subscriber = hub.subscribe(
+            last_seq,
+            bbox=[float(v) for v in bbox.split(',')] if bbox else None,
+            types=_split_list(type),
+            fields=_split_list(fields),
+            format=format
+        )
+    except ValueError as e:
+        manager.disconnect(websocket)
+        await websocket.close(code=1008, reason=str(e))
+        return
+    sender = asyncio.create_task(send_frames(websocket, subscriber))
     try:
         while True:
-            data = get_latest_contact()
-            if data:
-                await websocket.send_json(data)
-            await asyncio.sleep(5)
+            message = await websocket.receive_text()
+            try:
+                request = json.loads(message)
+                if not isinstance(request, dict) or not isinstance(request.get('subscribe'), dict):
+                    raise ValueError("expected {\"subscribe\": {...}}")
+                subscriber.configure(**request['subscribe'])
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({'error': f"Invalid subscription: {e}"})
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscriber)
         manager.disconnect(websocket)
 
 # Health check endpoint
@@ -131,12 +503,14 @@ async def websocket_endpoint(websocket: WebSocket):
 async def health_check():
     """Health check endpoint"""
     try:
-        latest = get_latest_contact()
+        latest = await run_in_threadpool(get_latest_contact)
         return {
             "status": "healthy",
             "database": "connected",
             "latest_contact": latest,
-            "active_connections": len(manager.active_connections)
+            "active_connections": len(manager.active_connections),
+            "last_seq": hub.last_seq,
+            "pending_jobs": jobs.pending()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
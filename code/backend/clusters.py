@@ -0,0 +1,129 @@
+# backend/clusters.py
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Zoom levels below DETAIL_ZOOM are served as clusters; at or above it the
+# map fetches individual contacts from /contacts instead.
+DETAIL_ZOOM = 10
+# Each slippy tile is split into 2**CELL_SHIFT x 2**CELL_SHIFT cluster cells
+CELL_SHIFT = 3
+MAX_LATITUDE = 85.05112878
+
+
+def tile_xy(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """Web-mercator (slippy map) tile containing the point at the given zoom"""
+    n = 1 << zoom
+    lat = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude)))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def wrap_longitude(longitude: float) -> float:
+    """Longitude in [-180, 180), e.g. 190 -> -170 for maps that wrap around the world"""
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+class Cell:
+    __slots__ = ('count', 'sum_lat', 'sum_cos', 'sum_sin', 'types', 'significance')
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        # Longitudes are averaged as unit vectors, so 179.9 and -179.9 meet at 180 rather than 0
+        self.sum_cos = 0.0
+        self.sum_sin = 0.0
+        self.types = Counter()
+        self.significance = Counter()
+
+    def add(self, latitude: float, longitude: float, vessel_type: str, significance: str):
+        self.count += 1
+        self.sum_lat += latitude
+        lam = math.radians(longitude)
+        self.sum_cos += math.cos(lam)
+        self.sum_sin += math.sin(lam)
+        self.types[vessel_type] += 1
+        self.significance[significance] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'latitude': self.sum_lat / self.count,
+            'longitude': math.degrees(math.atan2(self.sum_sin, self.sum_cos)),
+            'type': self.types.most_common(1)[0][0],
+            'significance': self.significance.most_common(1)[0][0]
+        }
+
+
+class ClusterIndex:
+    """
+    Per-zoom grid aggregates of contact positions.
+
+    Every stored contact is folded into one cell per zoom level as it
+    arrives, so serving a zoomed-out view never touches the reports table.
+    """
+    def __init__(self, max_zoom: int = DETAIL_ZOOM - 1):
+        self.max_zoom = max_zoom
+        self.levels: List[Dict[Tuple[int, int], Cell]] = [{} for _ in range(max_zoom + 1)]
+        self._lock = threading.Lock()
+
+    def add(self, contact: dict):
+        latitude = contact.get('latitude')
+        longitude = contact.get('longitude')
+        if latitude is None or longitude is None:
+            return
+        latitude, longitude = float(latitude), wrap_longitude(float(longitude))
+        vessel_type = contact.get('type') or 'unknown'
+        significance = contact.get('significance') or 'N/A'
+        # Cells at the finest level; coarser levels are right-shifts of it
+        x, y = tile_xy(latitude, longitude, self.max_zoom + CELL_SHIFT)
+        with self._lock:
+            for zoom in range(self.max_zoom, -1, -1):
+                shift = self.max_zoom - zoom
+                key = (x >> shift, y >> shift)
+                cells = self.levels[zoom]
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = Cell()
+                cell.add(latitude, longitude, vessel_type, significance)
+
+    def add_many(self, contacts):
+        for contact in contacts:
+            self.add(contact)
+
+    def clusters(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Dict]:
+        """
+        Clusters at a zoom level, optionally limited to (min_lon, min_lat,
+        max_lon, max_lat); a bbox with min_lon > max_lon crosses the
+        antimeridian. Only cells inside the bbox are serialized, looked up
+        by key when the bbox spans fewer cells than the level holds.
+        """
+        zoom = max(0, min(zoom, self.max_zoom))
+        cells = self.levels[zoom]
+        if bbox is None:
+            with self._lock:
+                return [cell.to_dict() for cell in cells.values()]
+        min_lon, min_lat, max_lon, max_lat = bbox
+        cell_zoom = zoom + CELL_SHIFT
+        n = 1 << cell_zoom
+        width = max_lon - min_lon if min_lon <= max_lon else max_lon - min_lon + 360
+        west = wrap_longitude(min_lon)
+        east = west + width
+        x0, y0 = tile_xy(max_lat, west, cell_zoom)
+        x1, y1 = tile_xy(min_lat, east if east <= 180 else east - 360, cell_zoom)
+        if width >= 360:
+            xs = range(n)
+        elif east <= 180:
+            xs = range(x0, x1 + 1)
+        else:
+            xs = list(dict.fromkeys([*range(x0, n), *range(0, x1 + 1)]))
+        ys = range(y0, y1 + 1)
+        with self._lock:
+            if len(xs) * len(ys) <= len(cells):
+                visible = [cells[key] for key in ((x, y) for x in xs for y in ys) if key in cells]
+            else:
+                in_x = set(xs)
+                visible = [cell for (x, y), cell in cells.items() if x in in_x and y0 <= y <= y1]
+            return [cell.to_dict() for cell in visible]
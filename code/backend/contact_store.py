@@ -0,0 +1,373 @@
+# backend/contact_store.py
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Column order of append_rows and of the rows database.iter_contacts yields
+STORE_FIELDS = ('id', 'latitude', 'longitude', 'speed', 'heading', 'type', 'significance', 'timestamp')
+EARTH_RADIUS_NM = 3440.065
+
+
+def _epoch(value) -> float:
+    """Epoch seconds of an ISO-8601 string, datetime or number; NaN if it does not parse"""
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return math.nan
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _floats(values: Sequence, dtype: str) -> np.ndarray:
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):  # numeric strings mixed with None
+        return np.array([math.nan if v is None else float(v) for v in values], dtype=dtype)
+
+
+def haversine_nm(lat: float, lon: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distances in nautical miles from one point to arrays of points"""
+    lat0, lon0 = math.radians(lat), math.radians(lon)
+    phi, lam = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((phi - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(phi) * np.sin((lam - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _Dictionary:
+    """String column values to dense int codes"""
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def encode(self, values: Iterable) -> np.ndarray:
+        codes = self.codes
+        out = []
+        for value in values:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.values)
+                self.values.append(value)
+            out.append(code)
+        return np.array(out, dtype='int32')
+
+    def lookup(self, values: Iterable) -> List[int]:
+        return [self.codes[v] for v in values if v in self.codes]
+
+
+class ContactStore:
+    """
+    Columnar in-memory copy of the reports table for analytics-style reads.
+
+    Positions and speed/heading are float64 arrays (so values read back
+    exactly as SQLite stores them), type and significance are
+    dictionary-encoded int codes and timestamps are epoch seconds, so a
+    query like "suspicious contacts within 50 nm in the last 6h" is a few
+    vectorized compares plus haversine over the candidates inside the
+    radius' bounding box. Rows are kept in id order; arrays grow by
+    doubling, and readers work on a consistent prefix without holding the
+    lock while they compute.
+
+    The store follows the reports change log: apply_changes upserts
+    changed rows in place, appends new ones and tombstones deleted ones,
+    and seq records the change seq it is complete up to.
+    """
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self.size = 0
+        self.seq = 0
+        self.ids = np.empty(capacity, dtype='int64')
+        self.latitude = np.empty(capacity, dtype='float64')
+        self.longitude = np.empty(capacity, dtype='float64')
+        self.speed = np.empty(capacity, dtype='float64')
+        self.heading = np.empty(capacity, dtype='float64')
+        self.type_codes = np.empty(capacity, dtype='int32')
+        self.significance_codes = np.empty(capacity, dtype='int32')
+        self.times = np.empty(capacity, dtype='float64')
+        self.timestamps = np.empty(capacity, dtype=object)
+        self.alive = np.empty(capacity, dtype=bool)
+        self.types = _Dictionary()
+        self.significances = _Dictionary()
+        self._parsed_times: Dict[Any, float] = {}
+        self._lat_order = np.empty(0, dtype='int64')
+        self._lat_sorted = np.empty(0, dtype='float64')
+        # Rows inside the sorted prefix whose latitude changed since the sort
+        self._lat_dirty = np.empty(0, dtype='int64')
+
+    def __len__(self) -> int:
+        return self.size
+
+    _COLUMNS = ('ids', 'latitude', 'longitude', 'speed', 'heading', 'type_codes', 'significance_codes',
+                'times', 'timestamps', 'alive')
+
+    def _reserve(self, n: int):
+        capacity = max(len(self.ids), 1)
+        if self.size + n <= capacity:
+            return
+        while capacity < self.size + n:
+            capacity *= 2
+        # Fresh arrays rather than resize, so readers holding the old ones are unaffected
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _parse_times(self, values: Sequence) -> np.ndarray:
+        # Reports repeat timestamps a lot; parse each distinct string once
+        cache = self._parsed_times
+        if len(cache) > 100000:
+            cache.clear()
+        out = np.empty(len(values), dtype='float64')
+        for i, value in enumerate(values):
+            parsed = cache.get(value)
+            if parsed is None:
+                parsed = cache[value] = _epoch(value)
+            out[i] = parsed
+        return out
+
+    def _encode_rows(self, rows: Sequence[Sequence]) -> tuple:
+        """Column arrays, in _COLUMNS order, for rows of values in STORE_FIELDS order"""
+        ids, lat, lon, speed, heading, types, significance, timestamps = zip(*rows)
+        return (
+            np.array(ids, dtype='int64'),
+            _floats(lat, 'float64'),
+            _floats(lon, 'float64'),
+            _floats(speed, 'float64'),
+            _floats(heading, 'float64'),
+            self.types.encode(types),
+            self.significances.encode(significance),
+            self._parse_times(timestamps),
+            np.array(timestamps, dtype=object),
+            np.ones(len(rows), dtype=bool),
+        )
+
+    def append_rows(self, rows: Sequence[Sequence]):
+        """Append rows of values in STORE_FIELDS order, with ids above every stored one"""
+        if not rows:
+            return
+        columns = self._encode_rows(rows)
+        with self._lock:
+            self._reserve(len(rows))
+            start, end = self.size, self.size + len(rows)
+            for name, values in zip(self._COLUMNS, columns):
+                getattr(self, name)[start:end] = values
+            self.size = end
+
+    def apply_changes(self, changes: Dict[str, Any]):
+        """
+        Apply one page of database.query_changes(self.seq, STORE_FIELDS).
+
+        Changed rows are overwritten in place and new ones appended; deleted
+        rows, and rows that lost their coordinates, are tombstoned. Readers
+        may see a row mid-update, never a torn array.
+        """
+        rows = [row for row in changes['rows'] if row[1] is not None and row[2] is not None]
+        gone = list(changes['deleted']) + [row[0] for row in changes['rows'] if row[1] is None or row[2] is None]
+        with self._lock:
+            n = self.size
+            ids = self.ids[:n]
+
+            def locate(wanted):
+                positions = np.searchsorted(ids, wanted)
+                found = positions < n
+                found[found] = ids[positions[found]] == wanted[found]
+                return positions, found
+
+            if gone:
+                positions, found = locate(np.array(gone, dtype='int64'))
+                self.alive[positions[found]] = False
+            new_rows = rows
+            if rows:
+                columns = self._encode_rows(rows)
+                positions, found = locate(columns[0])
+                if found.any():
+                    at = positions[found]
+                    for name, values in zip(self._COLUMNS, columns):
+                        getattr(self, name)[at] = values[found]
+                    moved = at[at < len(self._lat_order)]
+                    self._lat_dirty = np.concatenate([self._lat_dirty, moved])
+                new_rows = [row for row, exists in zip(rows, found) if not exists]
+        if new_rows:
+            new_rows.sort(key=lambda row: row[0])
+            in_order = not self.size or new_rows[0][0] > self.ids[self.size - 1]
+            self.append_rows(new_rows)
+            if not in_order:
+                self._sort_by_id()
+        self.seq = max(self.seq, changes['seq'])
+
+    def _sort_by_id(self):
+        """Restore id order after an insert below the highest id; rare, as SQLite hands out rowids ascending"""
+        with self._lock:
+            n = self.size
+            order = np.argsort(self.ids[:n], kind='stable')
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                fresh = np.empty(len(column), dtype=column.dtype)
+                fresh[:n] = column[:n][order]
+                setattr(self, name, fresh)
+            self._lat_order = np.empty(0, dtype='int64')
+            self._lat_sorted = np.empty(0, dtype='float64')
+            self._lat_dirty = np.empty(0, dtype='int64')
+
+    def load(self, batches: Iterable[Sequence[Sequence]]):
+        """Fill from batches of STORE_FIELDS rows, e.g. database.iter_contacts(STORE_FIELDS)"""
+        for rows in batches:
+            self.append_rows(rows)
+
+    def _view(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            n = self.size
+            return {name: getattr(self, name)[:n] for name in self._COLUMNS}
+
+    def _latitude_index(self, latitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (order, sorted latitudes, dirty positions) over a prefix of the rows.
+        Appends land in an unsorted tail and updated rows in the dirty list,
+        both of which queries scan; the sort is redone once they outgrow an
+        eighth of the store.
+        """
+        with self._lock:
+            order, sorted_lat, dirty = self._lat_order, self._lat_sorted, self._lat_dirty
+        if len(latitude) - len(order) + len(dirty) > max(len(latitude) // 8, 1024):
+            order = np.argsort(latitude, kind='stable')
+            sorted_lat = latitude[order]
+            with self._lock:
+                if len(order) >= len(self._lat_order):
+                    # Rows updated while we sorted stay dirty
+                    self._lat_dirty = self._lat_dirty[len(dirty):]
+                    self._lat_order, self._lat_sorted = order, sorted_lat
+                dirty = self._lat_dirty
+        return order, sorted_lat, dirty
+
+    def _latitude_window(self, latitude: np.ndarray, low: float, high: float) -> np.ndarray:
+        """
+        Positions with low <= latitude <= high, ascending, by binary search
+        plus a scan of the tail and of rows updated since the sort
+        """
+        order, sorted_lat, dirty = self._latitude_index(latitude)
+        start = np.searchsorted(sorted_lat, low, side='left')
+        end = np.searchsorted(sorted_lat, high, side='right')
+        tail = latitude[len(order):]
+        in_tail = np.flatnonzero((tail >= low) & (tail <= high)) + len(order)
+        if not len(dirty):
+            return np.concatenate([np.sort(order[start:end]), in_tail])
+        # Sorted entries of updated rows may be stale, so check candidates against current values
+        candidates = np.unique(np.concatenate([order[start:end], dirty]))
+        current = latitude[candidates]
+        candidates = candidates[(current >= low) & (current <= high)]
+        return np.concatenate([candidates, in_tail])
+
+    def select(self, near: Optional[Tuple[float, float]] = None, radius_nm: Optional[float] = None,
+               bbox: Optional[Sequence[float]] = None, types: Optional[Iterable[str]] = None,
+               significance: Optional[Iterable[str]] = None, since=None, until=None,
+               within_hours: Optional[float] = None, min_speed: Optional[float] = None,
+               max_speed: Optional[float] = None, now: Optional[float] = None) -> np.ndarray:
+        """
+        Row positions matching every given filter, in id order.
+
+        near is (lat, lon) and needs radius_nm; bbox is (min_lon, min_lat,
+        max_lon, max_lat); types/significance are lists of accepted values;
+        since/until take epoch seconds, datetimes or ISO strings and
+        within_hours is relative to now. Contacts without a parsable
+        timestamp never match a time filter.
+
+        Spatial filters first narrow the rows to a latitude window through
+        the sorted index, and the remaining filters only touch that window.
+        """
+        if near is not None and radius_nm is None:
+            raise ValueError("near needs radius_nm")
+        cols = self._view()
+        low, high = -math.inf, math.inf
+        min_lon, max_lon = -math.inf, math.inf
+        if bbox is not None:
+            min_lon, low, max_lon, high = bbox
+        if near is not None:
+            lat, lon = near
+            # One nm is one arcminute of latitude; the longitude window widens
+            # with latitude and is skipped near the poles or across the antimeridian
+            dlat = radius_nm / 60
+            low, high = max(low, lat - dlat), min(high, lat + dlat)
+            cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 90)))
+            if cos_lat > 1e-6 and dlat / cos_lat + abs(lon) < 180:
+                min_lon, max_lon = max(min_lon, lon - dlat / cos_lat), min(max_lon, lon + dlat / cos_lat)
+
+        if low > -math.inf or high < math.inf:
+            positions = self._latitude_window(cols['latitude'], low, high)
+            column = lambda name: cols[name][positions]
+        else:
+            positions = None
+            column = cols.__getitem__
+        mask = column('alive').copy()
+
+        if min_lon > -math.inf or max_lon < math.inf:
+            longitude = column('longitude')
+            mask &= (longitude >= min_lon) & (longitude <= max_lon)
+        if types is not None:
+            mask &= np.isin(column('type_codes'), self.types.lookup(types))
+        if significance is not None:
+            mask &= np.isin(column('significance_codes'), self.significances.lookup(significance))
+        lower = _epoch(since) if since is not None else None
+        if within_hours is not None:
+            cutoff = (time.time() if now is None else now) - float(within_hours) * 3600
+            lower = cutoff if lower is None else max(lower, cutoff)
+        # NaN compares False, so undated contacts drop out here
+        if lower is not None:
+            mask &= column('times') >= lower
+        if until is not None:
+            mask &= column('times') <= _epoch(until)
+        if min_speed is not None:
+            mask &= column('speed') >= min_speed
+        if max_speed is not None:
+            mask &= column('speed') <= max_speed
+
+        selected = np.flatnonzero(mask) if positions is None else positions[mask]
+        if near is not None:
+            distances = haversine_nm(lat, lon, cols['latitude'][selected], cols['longitude'][selected])
+            selected = selected[distances <= radius_nm]
+        return selected
+
+    def rows(self, positions: np.ndarray, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Contact dicts for row positions, in the field layout of
+        query_contacts plus heading, or only the given fields
+        """
+        cols = self._view()
+        types, significances = self.types.values, self.significances.values
+        rows = [self._row(cols, int(i), types, significances) for i in positions]
+        if fields is not None:
+            rows = [{field: row[field] for field in fields} for row in rows]
+        return rows
+
+    def _row(self, cols, i, types, significances) -> Dict[str, Any]:
+        speed, heading = cols['speed'][i], cols['heading'][i]
+        return {
+            'id': int(cols['ids'][i]),
+            'latitude': float(cols['latitude'][i]),
+            'longitude': float(cols['longitude'][i]),
+            'speed': None if np.isnan(speed) else float(speed),
+            'heading': None if np.isnan(heading) else float(heading),
+            'type': types[cols['type_codes'][i]],
+            'significance': significances[cols['significance_codes'][i]],
+            'timestamp': cols['timestamps'][i],
+        }
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        alive = np.flatnonzero(self._view()['alive'])
+        return self.rows(alive[-1:])[0] if len(alive) else None
+
+    def counts(self, positions: Optional[np.ndarray] = None, by: str = 'type') -> Dict[str, int]:
+        """Number of contacts per type or significance, optionally among positions"""
+        cols = self._view()
+        codes = cols['type_codes' if by == 'type' else 'significance_codes']
+        dictionary = self.types if by == 'type' else self.significances
+        codes = codes[positions] if positions is not None else codes[cols['alive']]
+        counts = np.bincount(codes, minlength=len(dictionary.values))
+        return {dictionary.values[code]: int(count) for code, count in enumerate(counts) if count}
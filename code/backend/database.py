@@ -1,9 +1,18 @@
 # database.py
 import sqlite3
+import threading
+
+DB_PATH = 'maritime.db'
+
+REQUIRED_FIELDS = ['latitude', 'longitude', 'speed', 'type', 'timestamp', 'significance']
+# Stored for the contact detail view, but not needed to place a marker
+DETAIL_COLUMNS = {'heading': 'REAL', 'confidence': 'REAL', 'description': 'TEXT'}
+DETAIL_FIELDS = list(DETAIL_COLUMNS)
+NUMERIC_FIELDS = ['latitude', 'longitude', 'speed', 'heading', 'confidence']
 
 def create_database():
     try:
-        conn = sqlite3.connect('maritime.db')
+        conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS reports (
@@ -13,9 +22,83 @@ def create_database():
                 speed REAL,
                 type TEXT,
                 timestamp TEXT,                
-                significance TEXT
+                significance TEXT,
+                heading REAL,
+                confidence REAL,
+                description TEXT
+            )
+        ''')
+        # Databases created before the detail columns existed
+        existing = {row[1] for row in c.execute('PRAGMA table_info(reports)')}
+        for column in DETAIL_FIELDS:
+            if column not in existing:
+                c.execute(f'ALTER TABLE reports ADD COLUMN {column} {DETAIL_COLUMNS[column]}')
+        # R*Tree over positions, kept in sync with reports by triggers
+        c.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_rtree USING rtree(
+                id, min_lat, max_lat, min_lon, max_lon
+            )
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS reports_rtree_insert AFTER INSERT ON reports
+            WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+            BEGIN
+                INSERT INTO reports_rtree VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS reports_rtree_delete AFTER DELETE ON reports
+            BEGIN
+                DELETE FROM reports_rtree WHERE id = OLD.id;
+            END
+        ''')
+        has_update_trigger = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'reports_rtree_update'").fetchone()
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS reports_rtree_update AFTER UPDATE OF id, latitude, longitude ON reports
+            BEGIN
+                DELETE FROM reports_rtree WHERE id = OLD.id;
+                INSERT INTO reports_rtree
+                SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+            END
+        ''')
+        if not has_update_trigger:
+            # Databases from before the update trigger may hold boxes of moved or uncoordinated rows
+            c.execute('''
+                DELETE FROM reports_rtree WHERE id IN (
+                    SELECT t.id FROM reports_rtree t LEFT JOIN reports r ON r.id = t.id
+                    WHERE r.latitude IS NULL OR r.longitude IS NULL
+                    OR r.latitude NOT BETWEEN t.min_lat AND t.max_lat
+                    OR r.longitude NOT BETWEEN t.min_lon AND t.max_lon
+                )
+            ''')
+        c.execute('''
+            INSERT OR IGNORE INTO reports_rtree
+            SELECT id, latitude, latitude, longitude, longitude FROM reports
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            AND id NOT IN (SELECT id FROM reports_rtree)
+        ''')
+        # ISO-8601 timestamps sort lexically, so a plain index serves time windows
+        c.execute('CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp)')
+        # Change log for client sync: AUTOINCREMENT never reuses a seq, so it
+        # keeps increasing across deletes and restarts
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS report_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                report_id INTEGER NOT NULL
             )
         ''')
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS report_changes_{event.lower()} AFTER {event} ON reports
+                BEGIN
+                    INSERT INTO report_changes (report_id) VALUES ({row}.id);
+                END
+            ''')
+        # Rows stored before the change log existed
+        if c.execute('SELECT NOT EXISTS (SELECT 1 FROM report_changes)').fetchone()[0]:
+            c.execute('INSERT INTO report_changes (report_id) SELECT id FROM reports ORDER BY id')
         conn.commit()
     except sqlite3.Error as e:
         print(f"Error creating database: {e}")
@@ -30,7 +113,7 @@ def store_in_database(data):
         return
         
     try:
-        conn = sqlite3.connect('maritime.db')
+        conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         if all(key in data for key in ['latitude', 'longitude', 'speed', 'type', 'timestamp', 'significance']):
             c.execute('''
@@ -48,7 +131,7 @@ def store_in_database(data):
 
 def get_latest_contact():
     try:
-        conn = sqlite3.connect('maritime.db')
+        conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         
         c.execute('''
@@ -79,7 +162,7 @@ def get_latest_contact():
 
 def get_all_contacts():
     try:
-        conn = sqlite3.connect('maritime.db')
+        conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
        
         cursor.execute('''
@@ -105,4 +188,289 @@ def get_all_contacts():
         return []
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+
+def query_contacts(bbox=None, start=None, end=None, types=None, significance=None,
+                   limit=500, cursor=None):
+    """
+    Viewport query over the reports table.
+
+    bbox is (min_lon, min_lat, max_lon, max_lat), start/end are ISO-8601
+    strings, types/significance are lists of accepted values. Results are
+    ordered by id; pass the returned next_cursor back to fetch the next page.
+    """
+    clauses = ['r.latitude IS NOT NULL', 'r.longitude IS NOT NULL']
+    params = []
+    source = 'reports r'
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        source = 'reports_rtree t JOIN reports r ON r.id = t.id'
+        clauses.append('t.min_lat >= ? AND t.max_lat <= ? AND t.min_lon >= ? AND t.max_lon <= ?')
+        params.extend([min_lat, max_lat, min_lon, max_lon])
+    if start is not None:
+        clauses.append('r.timestamp >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('r.timestamp <= ?')
+        params.append(end)
+    if types:
+        clauses.append(f"r.type IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if significance:
+        clauses.append(f"r.significance IN ({', '.join('?' * len(significance))})")
+        params.extend(significance)
+    if cursor is not None:
+        clauses.append('r.id > ?')
+        params.append(cursor)
+    params.append(limit + 1)
+
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        rows = conn.execute(f'''
+            SELECT r.id, r.latitude, r.longitude, r.speed, r.type, r.timestamp, r.significance
+            FROM {source}
+            WHERE {' AND '.join(clauses)}
+            ORDER BY r.id LIMIT ?
+        ''', params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error querying contacts: {e}")
+        return {'contacts': [], 'next_cursor': None}
+    finally:
+        if conn:
+            conn.close()
+
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    contacts = [
+        {
+            'id': row[0],
+            'latitude': row[1],
+            'longitude': row[2],
+            'speed': row[3],
+            'type': row[4],
+            'timestamp': row[5],
+            'significance': row[6]
+        }
+        for row in rows[:limit]
+    ]
+    return {'contacts': contacts, 'next_cursor': next_cursor}
+
+def get_contact(contact_id):
+    """Every stored field of one contact, including the details left out of live updates"""
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        row = conn.execute('''
+            SELECT id, latitude, longitude, speed, type, timestamp, significance,
+                   heading, confidence, description
+            FROM reports WHERE id = ?
+        ''', (contact_id,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error retrieving contact {contact_id}: {e}")
+        return None
+    finally:
+        if conn:
+            conn.close()
+    if row is None:
+        return None
+    return dict(zip(['id'] + REQUIRED_FIELDS + DETAIL_FIELDS, row))
+
+def latest_change_seq(conn=None):
+    """Sequence number of the most recent change to reports, 0 if there is none"""
+    own = conn is None
+    try:
+        if own:
+            conn = sqlite3.connect(DB_PATH)
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'report_changes'").fetchone()
+        return row[0] if row else 0
+    except sqlite3.Error as e:
+        print(f"Error reading change sequence: {e}")
+        return 0
+    finally:
+        if own and conn:
+            conn.close()
+
+def iter_contacts(fields, batch_size=50000):
+    """Every contact with coordinates as tuples in the order of fields, in id order and batches"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cursor = conn.execute(f'''
+            SELECT {', '.join(fields)} FROM reports
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            ORDER BY id
+        ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def query_changes(since, fields, limit=10000):
+    """
+    Changes to reports after seq since, oldest first, at most limit log entries.
+
+    Returns {'seq': last seq covered, 'rows': [...], 'deleted': [ids], 'more': bool}
+    where rows hold the current values of changed contacts in the order of
+    fields and deleted lists ids that no longer exist. Contacts changed
+    several times appear once. Errors propagate: an empty answer would tell
+    the client it is up to date.
+    """
+    columns = ', '.join(f'r.{field}' for field in fields)
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        changes = conn.execute(f'''
+            SELECT c.seq, c.report_id, r.id IS NOT NULL, {columns}
+            FROM report_changes c LEFT JOIN reports r ON r.id = c.report_id
+            WHERE c.seq > ?
+            ORDER BY c.seq LIMIT ?
+        ''', (since, limit)).fetchall()
+    finally:
+        if conn:
+            conn.close()
+
+    latest = {}
+    for change in changes:
+        latest.pop(change[1], None)
+        latest[change[1]] = change[3:] if change[2] else None
+    return {
+        'seq': changes[-1][0] if changes else since,
+        'rows': [list(row) for row in latest.values() if row is not None],
+        'deleted': [report_id for report_id, row in latest.items() if row is None],
+        'more': len(changes) == limit
+    }
+
+def validate_contact(data):
+    """Return None if the contact can be stored, otherwise the rejection reason"""
+    if not isinstance(data, dict):
+        return "contact is not an object"
+    missing = [key for key in REQUIRED_FIELDS if key not in data]
+    if missing:
+        return f"missing fields: {', '.join(missing)}"
+    if data['latitude'] is None or data['longitude'] is None:
+        return "missing coordinates"
+    try:
+        latitude = float(data['latitude'])
+        longitude = float(data['longitude'])
+    except (TypeError, ValueError, OverflowError):
+        return "coordinates are not numeric"
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        return "coordinates out of range"
+    for key in ('speed', 'heading', 'confidence'):
+        if data.get(key) is not None:
+            try:
+                float(data[key])
+            except (TypeError, ValueError, OverflowError):
+                return f"{key} is not numeric"
+    # Lists and objects would only fail later, when SQLite binds the whole batch
+    for key in ('type', 'timestamp', 'significance', 'description'):
+        if data.get(key) is not None and not isinstance(data[key], str):
+            return f"{key} is not a string"
+    return None
+
+
+def normalize_contact(data):
+    """
+    Copy of a valid contact with its numeric fields as floats, as stored.
+
+    SQLite cannot bind ints beyond 64 bits, so storing them as given would
+    fail the whole batch at insert time instead of at validation.
+    """
+    return {**data, **{key: float(data[key]) for key in NUMERIC_FIELDS if data.get(key) is not None}}
+
+
+INSERT_REPORT = '''
+    INSERT INTO reports (latitude, longitude, speed, type, timestamp, significance,
+                         heading, confidence, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+class ContactWriter:
+    """Single long-lived WAL connection that owns every write to the reports table"""
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        return self._conn
+
+    def store_many(self, contacts):
+        """
+        Validate and insert a whole report in one transaction, falling back
+        to one transaction per row if SQLite rejects the batch.
+
+        Returns one result per input contact, in order:
+        {'index': i, 'accepted': bool, 'reason': str or None}, plus the new
+        row 'id' and its change 'seq' for accepted contacts. Detail fields
+        are optional.
+        """
+        results = []
+        rows = []
+        for i, data in enumerate(contacts):
+            reason = validate_contact(data)
+            results.append({'index': i, 'accepted': reason is None, 'reason': reason})
+            if reason is None:
+                data = normalize_contact(data)
+                rows.append(tuple(data[key] for key in REQUIRED_FIELDS) +
+                            tuple(data.get(key) for key in DETAIL_FIELDS))
+
+        if not rows:
+            return results
+
+        accepted = [result for result in results if result['accepted']]
+        with self._lock:
+            conn = self._connection()
+            try:
+                with conn:
+                    conn.executemany(INSERT_REPORT, rows)
+                    # The transaction holds SQLite's write lock throughout, so the
+                    # batch got consecutive rowids and change seqs ending at the last ones
+                    last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                    last_seq = latest_change_seq(conn)
+                first_id, first_seq = last_id - len(rows) + 1, last_seq - len(rows) + 1
+                for i, result in enumerate(accepted):
+                    result['id'] = first_id + i
+                    result['seq'] = first_seq + i
+            except sqlite3.Error as e:
+                # The batch rolled back; retry row by row so one bad row only rejects itself
+                print(f"Error inserting batch, retrying row by row: {e}")
+                for result, row in zip(accepted, rows):
+                    try:
+                        with conn:
+                            result['id'] = conn.execute(INSERT_REPORT, row).lastrowid
+                            result['seq'] = latest_change_seq(conn)
+                    except sqlite3.Error as row_error:
+                        result['accepted'] = False
+                        result['reason'] = f"database error: {row_error}"
+        return results
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide ContactWriter, creating it on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ContactWriter()
+        return _writer
+
+def store_many(contacts):
+    """Bulk counterpart of store_in_database, see ContactWriter.store_many"""
+    return get_writer().store_many(contacts)
@@ -0,0 +1,99 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+STORE_NAME = "documents.dat"
+LEGACY_NAME = "documents.json"
+
+# Layout: magic, uint64 count, (count + 1) uint64 offsets into the blob, then
+# the blob of UTF-8 JSON documents. Document id i is blob[offsets[i]:offsets[i+1]];
+# an empty slice is a tombstone left by an incremental update.
+MAGIC = b"MDOCSTR1"
+_HEADER = struct.Struct("<8sQ")
+
+
+def write_document_store(path: Path, documents: List[Optional[Dict[str, Any]]]):
+    """Write documents (None for tombstones) to a store file at path"""
+    blobs = [b"" if doc is None else json.dumps(doc, ensure_ascii=False).encode('utf-8')
+             for doc in documents]
+    offsets = np.zeros(len(blobs) + 1, dtype='<u8')
+    np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(blobs)))
+        f.write(offsets.tobytes())
+        for blob in blobs:
+            f.write(blob)
+
+
+class DocumentStore:
+    """
+    Read-only, memory-mapped view of a documents.dat file.
+
+    Only the offsets table is touched at open; each lookup decodes a single
+    document, so memory stays flat as the corpus grows and every process
+    mapping the file shares the same page cache. A replaced file stays valid
+    for readers that still hold the old mapping.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a document store")
+        self._offsets = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=_HEADER.size)
+        self._blob_start = _HEADER.size + (count + 1) * 8
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, doc_id: int) -> Optional[Dict[str, Any]]:
+        if doc_id < 0 or doc_id >= self._count:
+            raise IndexError(doc_id)
+        start, end = int(self._offsets[doc_id]), int(self._offsets[doc_id + 1])
+        if start == end:
+            return None
+        return json.loads(self._mmap[self._blob_start + start:self._blob_start + end])
+
+    def __iter__(self) -> Iterator[Optional[Dict[str, Any]]]:
+        for doc_id in range(self._count):
+            yield self[doc_id]
+
+
+def open_documents(model_dir: Path):
+    """The document store in model_dir, falling back to a legacy documents.json list"""
+    model_dir = Path(model_dir)
+    if (model_dir / STORE_NAME).exists():
+        return DocumentStore(model_dir / STORE_NAME)
+    with open(model_dir / LEGACY_NAME, 'r') as f:
+        return json.load(f)
+
+
+def convert(model_dir: Path):
+    """Write documents.dat next to an existing documents.json"""
+    model_dir = Path(model_dir)
+    with open(model_dir / LEGACY_NAME, 'r') as f:
+        documents = json.load(f)
+    tmp_path = model_dir / f".{STORE_NAME}.tmp"
+    write_document_store(tmp_path, documents)
+    os.replace(tmp_path, model_dir / STORE_NAME)
+    print(f"Converted {len(documents)} documents to {model_dir / STORE_NAME}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert RAG artifacts from documents.json to documents.dat")
+    parser.add_argument("model_dir", type=Path)
+    args = parser.parse_args()
+    convert(args.model_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent embedding requests into one model call.
+
+    Callers on any thread (encode) or event loop (encode_async) enqueue
+    their texts; a single worker thread takes the first waiting request,
+    keeps collecting until max_batch_size texts or max_wait_ms have passed,
+    runs encode_fn once on the whole batch and hands each caller its slice.
+    A lone caller pays at most max_wait_ms extra; under load the model sees
+    full batches instead of many batch-size-1 calls.
+    """
+    def __init__(self, encode_fn: EncodeFn, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 history: int = 10000):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.batch_sizes: Counter = Counter()
+        self._waits = deque(maxlen=history)
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for the next batch; the future resolves to their embeddings"""
+        future = Future()
+        if not texts:
+            future.set_result(np.empty((0, 0), dtype='float32'))
+            return future
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Thread-safe, blocking front end"""
+        return self.submit(texts).result()
+
+    async def encode_async(self, texts: List[str]) -> np.ndarray:
+        """asyncio front end; the event loop stays free while the batch runs"""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _collect(self):
+        """
+        Block for one request, then gather more until the batch is full or the wait expires.
+
+        Requests whose caller already gave up (a cancelled future, e.g. an
+        encode_async that timed out) are dropped here; the rest are marked
+        running, so they can no longer be cancelled and always get a result.
+        """
+        batch, size, deadline = [], 0, None
+        while size < self.max_batch_size:
+            if deadline is None:
+                item = self._queue.get()
+            else:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not item[1].set_running_or_notify_cancel():
+                continue
+            if deadline is None:
+                deadline = time.perf_counter() + self.max_wait
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            started = time.perf_counter()
+            texts = [text for request_texts, _, _ in batch for text in request_texts]
+            try:
+                embeddings = np.asarray(self.encode_fn(texts), dtype='float32')
+            except Exception as e:
+                logger.error(f"Embedding batch of {size} texts failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future, _ in batch:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.texts += size
+                self.batch_sizes[size] += 1
+                self._waits.extend(started - enqueued for _, _, enqueued in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size distribution and queue wait percentiles since start"""
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            return {
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': self.texts / self.batches if self.batches else 0.0,
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'queue_wait_ms': {
+                    'p50': float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                    'p95': float(np.percentile(waits, 95)) if len(waits) else 0.0,
+                    'max': float(waits.max()) if len(waits) else 0.0
+                },
+                'pending': self._queue.qsize()
+            }
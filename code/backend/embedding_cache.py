@@ -0,0 +1,157 @@
+import fcntl
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by model name + normalized text hash.
+
+    On disk each model gets a directory holding a float32 row file
+    (vectors.f32, read through a memory map) and an append-only key log
+    (keys.txt, line N is the hash stored in row N). Writers serialize on a
+    lock file and pick up rows appended by other processes first, so the
+    trainer and any number of inference workers can share one cache.
+    Recently used vectors are also kept in an in-memory LRU tier. One
+    instance may be shared by threads; encode_fn runs outside the lock so
+    concurrent callers can still be batched together.
+    """
+    def __init__(self, cache_dir: str, model_name: str, dim: int, memory_size: int = 10000):
+        self.model_name = model_name
+        self.dim = dim
+        self.memory_size = memory_size
+        self.dir = Path(cache_dir) / re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.keys_path = self.dir / "keys.txt"
+        self.lock_path = self.dir / ".lock"
+        self.vectors_path.touch(exist_ok=True)
+        self.keys_path.touch(exist_ok=True)
+
+        self.rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._mmap = None
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._sync_keys()
+
+    def _hash(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def _sync_keys(self):
+        """Read key lines appended since the last sync (possibly by another process)"""
+        with open(self.keys_path, 'r') as f:
+            f.seek(self._keys_offset)
+            chunk = f.read()
+        # Only consume complete lines; a concurrent writer may be mid-append
+        complete = chunk[:chunk.rfind('\n') + 1]
+        for key in complete.splitlines():
+            self.rows.setdefault(key, len(self.rows))
+        self._keys_offset += len(complete.encode('utf-8'))
+
+    def _read_row(self, row: int) -> np.ndarray:
+        if self._mmap is None or row >= len(self._mmap):
+            n_rows = self.vectors_path.stat().st_size // (self.dim * 4)
+            self._mmap = np.memmap(self.vectors_path, dtype='float32', mode='r', shape=(n_rows, self.dim))
+        return np.array(self._mmap[row])
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return vector
+        row = self.rows.get(key)
+        if row is not None:
+            vector = self._read_row(row)
+            self._remember(key, vector)
+            self.hits += 1
+            self.disk_hits += 1
+            return vector
+        return None
+
+    def _store(self, keys: List[str], vectors: np.ndarray):
+        with open(self.lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._sync_keys()
+                new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self.rows]
+                if not new:
+                    return
+                with open(self.vectors_path, 'r+b') as f:
+                    f.seek(len(self.rows) * self.dim * 4)
+                    f.write(np.asarray([v for _, v in new], dtype='float32').tobytes())
+                with open(self.keys_path, 'a') as f:
+                    f.write("".join(f"{key}\n" for key, _ in new))
+                self._sync_keys()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, calling encode_fn only for cache misses.
+
+        encode_fn takes a list of texts and returns a float32 array of shape
+        (len(texts), dim).
+        """
+        keys = [self._hash(text) for text in texts]
+        result = np.empty((len(texts), self.dim), dtype='float32')
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lookup(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    result[i] = vector
+
+            if missing:
+                self._sync_keys()
+                for key in list(missing):
+                    vector = self._lookup(key)
+                    if vector is not None:
+                        result[missing.pop(key)] = vector
+
+        if missing:
+            miss_keys = list(missing)
+            vectors = np.asarray(encode_fn([texts[missing[key][0]] for key in miss_keys]), dtype='float32')
+            with self._lock:
+                self.misses += len(miss_keys)
+                for key, vector in zip(miss_keys, vectors):
+                    result[missing[key]] = vector
+                    self._remember(key, vector)
+                try:
+                    self._store(miss_keys, vectors)
+                except OSError as e:
+                    logger.warning(f"Could not persist embeddings to cache: {e}")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since this cache was opened"""
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_entries': len(self.rows)
+        }
@@ -0,0 +1,188 @@
+# backend/jobs.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue is at capacity; the API maps it to HTTP 429"""
+
+
+def _new_job(job_id: str) -> Dict[str, Any]:
+    return {'id': job_id, 'status': 'queued', 'created': time.time(),
+            'started': None, 'finished': None, 'result': None, 'error': None}
+
+
+class LocalJobQueue:
+    """
+    Bounded in-process job queue drained by a fixed number of worker tasks.
+
+    The handler does the actual work and is expected to push blocking steps
+    onto executors, so the event loop stays free for WebSockets and /health.
+    """
+    def __init__(self, handler: Handler, workers: int = 2, maxsize: int = 100, history: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.history = history
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._payloads: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Local job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, payload: str) -> str:
+        job_id = uuid.uuid4().hex
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFull(f"Job queue is full ({self.maxsize} pending)")
+        self._payloads[job_id] = payload
+        self.jobs[job_id] = _new_job(job_id)
+        self._trim()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def is_full(self) -> bool:
+        """Whether submit() would raise QueueFull right now"""
+        return self.pending() >= self.maxsize
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest['status'] in ('queued', 'running'):
+                break
+            self.jobs.popitem(last=False)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs[job_id]
+            payload = self._payloads.pop(job_id)
+            job['status'] = 'running'
+            job['started'] = time.time()
+            try:
+                job['result'] = await self.handler(payload)
+                job['status'] = 'done'
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                job['finished'] = time.time()
+                self._queue.task_done()
+
+
+class RedisJobQueue:
+    """
+    Same interface as LocalJobQueue backed by a Redis list, so several
+    backend processes share one queue and job status survives restarts.
+    Payloads are spool file paths, so workers need the same UPLOAD_DIR
+    (local disk or a shared mount).
+    """
+    def __init__(self, url: str, handler: Handler, workers: int = 2, maxsize: int = 100,
+                 ttl: int = 24 * 3600, prefix: str = "maritime:jobs"):
+        self.url = url
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prefix = prefix
+        self.redis = None
+        self._tasks = []
+
+    async def start(self):
+        import redis.asyncio as redis
+        self.redis = redis.from_url(self.url)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Redis job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.redis is not None:
+            await self.redis.close()
+
+    def _key(self, job_id: str, suffix: str = "") -> str:
+        return f"{self.prefix}:{job_id}{suffix}"
+
+    async def _set(self, job: Dict[str, Any]):
+        await self.redis.set(self._key(job['id']), json.dumps(job), ex=self.ttl)
+
+    async def submit(self, payload: str) -> str:
+        if await self.redis.llen(self.prefix) >= self.maxsize:
+            raise QueueFull(f"Job queue is full ({self.maxsize} pending)")
+        job_id = uuid.uuid4().hex
+        await self._set(_new_job(job_id))
+        await self.redis.set(self._key(job_id, ":payload"), payload, ex=self.ttl)
+        await self.redis.rpush(self.prefix, job_id)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    def pending(self) -> Optional[int]:
+        return None  # only known asynchronously; see LLEN on the queue key
+
+    async def is_full(self) -> bool:
+        """Whether submit() would raise QueueFull right now"""
+        return await self.redis.llen(self.prefix) >= self.maxsize
+
+    async def _worker(self):
+        while True:
+            _, raw_id = await self.redis.blpop(self.prefix)
+            job_id = raw_id.decode()
+            job = await self.get(job_id) or _new_job(job_id)
+            payload = await self.redis.getdel(self._key(job_id, ":payload"))
+            job['status'] = 'running'
+            job['started'] = time.time()
+            await self._set(job)
+            try:
+                if payload is None:
+                    raise RuntimeError("payload expired before the job ran")
+                job['result'] = await self.handler(payload.decode('utf-8'))
+                job['status'] = 'done'
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            job['finished'] = time.time()
+            await self._set(job)
+
+
+def create_job_queue(handler: Handler, workers: int = 2, maxsize: int = 100):
+    """Redis-backed queue when REDIS_URL is set and redis is installed, else in-process"""
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        try:
+            import redis.asyncio  # noqa: F401
+            return RedisJobQueue(redis_url, handler, workers, maxsize)
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed; using local queue")
+    return LocalJobQueue(handler, workers, maxsize)
@@ -0,0 +1,162 @@
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+LEXICAL_NAME = "lexical.npz"
+
+# Identifiers such as DTGs ("201700Z"), hull numbers and callsigns survive as
+# single tokens; everything is matched lower-cased.
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def document_text(doc: Dict[str, Any]) -> str:
+    """Every searchable string in a parsed document: zone fields, message text and metadata"""
+    parts = [str(doc[key]) for key in ('name', 'type', 'significance', 'text') if doc.get(key)]
+    parts.extend(str(value) for value in doc.get('metadata', {}).values())
+    return "\n".join(parts)
+
+
+def _contains_sequence(tokens: Sequence[str], sequence: Sequence[str]) -> bool:
+    n = len(sequence)
+    return any(tokens[i:i + n] == sequence for i in range(len(tokens) - n + 1)
+               if tokens[i] == sequence[0])
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the RAG documents, keyed by the same ids as
+    the FAISS index.
+
+    Postings are stored as one flat array of doc ids and term frequencies
+    with a per-term offset, so a query touches only the postings of its
+    own terms and scoring is a handful of vectorized numpy operations.
+    """
+    def __init__(self, terms: Sequence[str], offsets: np.ndarray, doc_ids: np.ndarray,
+                 tfs: np.ndarray, doc_len: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        live = doc_len > 0
+        self.n_docs = int(live.sum())
+        self.avg_len = float(doc_len[live].mean()) if self.n_docs else 0.0
+        # Per-document BM25 length normalisation, computed once
+        self._norm = (k1 * (1 - b + b * doc_len / max(self.avg_len, 1.0))).astype('float32')
+
+    @classmethod
+    def build(cls, documents: Iterable[Optional[Dict[str, Any]]], k1: float = 1.2, b: float = 0.75) -> 'LexicalIndex':
+        """Index documents by position; None entries (tombstones) get no postings"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len = []
+        for doc_id, doc in enumerate(documents):
+            tokens = tokenize(document_text(doc)) if doc is not None else []
+            doc_len.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, []).append((doc_id, count))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype='int64')
+        np.cumsum([len(postings[term]) for term in terms], out=offsets[1:])
+        pairs = [pair for term in terms for pair in postings[term]]
+        doc_ids = np.array([doc_id for doc_id, _ in pairs], dtype='int32')
+        tfs = np.array([count for _, count in pairs], dtype='float32')
+        return cls(terms, offsets, doc_ids, tfs, np.array(doc_len, dtype='float32'), k1, b)
+
+    def save(self, path: Path):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path, 'wb') as f:
+            # Terms as one newline-joined UTF-8 buffer rather than a fixed-width string array
+            np.savez(f, terms=np.frombuffer("\n".join(terms).encode('utf-8'), dtype='uint8'), offsets=self.offsets, doc_ids=self.doc_ids,
+                     tfs=self.tfs, doc_len=self.doc_len, params=np.array([self.k1, self.b]))
+
+    @classmethod
+    def load(cls, path: Path) -> 'LexicalIndex':
+        with np.load(path) as data:
+            k1, b = data['params']
+            terms = data['terms'].tobytes().decode('utf-8')
+            return cls(terms.split("\n") if terms else [], data['offsets'], data['doc_ids'],
+                       data['tfs'], data['doc_len'], float(k1), float(b))
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        i = self.vocabulary.get(term)
+        if i is None:
+            return self.doc_ids[:0], self.tfs[:0]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def search(self, query: str, k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, BM25 score) for a free-text query, optionally only over ids set in mask"""
+        ids_parts, score_parts = [], []
+        for term in set(tokenize(query)):
+            ids, tfs = self._postings(term)
+            # idf stays corpus-wide so scores do not depend on the filter
+            df = len(ids)
+            if mask is not None:
+                keep = mask[ids]
+                ids, tfs = ids[keep], tfs[keep]
+            if not len(ids):
+                continue
+            idf = np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            ids_parts.append(ids)
+            score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + self._norm[ids]))
+        if not ids_parts:
+            return []
+        ids = np.concatenate(ids_parts)
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(score_parts))
+        top = np.argsort(-totals, kind='stable')[:k]
+        return [(int(unique_ids[i]), float(totals[i])) for i in top]
+
+    def lookup(self, identifier: str, documents=None, mask: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Ids of documents containing every token of identifier.
+
+        With documents (the store indexed by the same ids), only documents
+        where the tokens appear consecutively, i.e. the exact identifier,
+        are returned. mask optionally restricts the result to ids set in it.
+        """
+        tokens = tokenize(identifier)
+        if not tokens:
+            return []
+        # Intersect the rarest postings first
+        postings = sorted((self._postings(term)[0] for term in set(tokens)), key=len)
+        ids = postings[0]
+        for other in postings[1:]:
+            if not len(ids):
+                break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        if mask is not None:
+            ids = ids[mask[ids]]
+        ids = [int(doc_id) for doc_id in ids]
+        if documents is None or len(tokens) == 1:
+            return ids
+        return [doc_id for doc_id in ids
+                if _contains_sequence(tokenize(document_text(documents[doc_id])), tokens)]
+
+
+def main():
+    import argparse
+    from document_store import open_documents
+    parser = argparse.ArgumentParser(description="Build lexical.npz for existing RAG artifacts")
+    parser.add_argument("model_dir", type=Path)
+    args = parser.parse_args()
+    index = LexicalIndex.build(open_documents(args.model_dir))
+    index.save(args.model_dir / LEXICAL_NAME)
+    print(f"Indexed {index.n_docs} documents, {len(index.vocabulary)} terms, into {args.model_dir / LEXICAL_NAME}")
+
+
+if __name__ == "__main__":
+    main()
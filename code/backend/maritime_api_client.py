@@ -1,17 +1,47 @@
 import requests
 import json
 import argparse
-from typing import List, Union
+import glob
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
 from pathlib import Path
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 from ocr_infer import MaritimeTextProcessor, MaritimeContact
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_MODEL_DIR = Path(__file__).resolve().parent.parent / "rag" / "maritime_rag"
+REPORT_SUFFIXES = ('.md', '.txt', '.png', '.jpg', '.jpeg', '.tiff')
+# Answers that mean the server did not take the upload (queue full, unavailable).
+# Uploads are not idempotent, so a 5xx or read timeout that may follow a commit
+# is never retried.
+RETRY_STATUS = {429, 503}
 
 class MaritimeAPIClient:
     """Client for sending maritime contact data to the backend API"""
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", model_dir: Union[str, Path] = DEFAULT_MODEL_DIR,
+                 pool_size: int = 8, retries: int = 3, backoff: float = 0.5, timeout: float = 30.0,
+                 use_markdown: bool = False):
         self.base_url = base_url
         self.process_endpoint = f"{base_url}/process_report/"
-        self.processor = MaritimeTextProcessor()
+        self.bulk_endpoint = f"{base_url}/contacts/bulk"
+        # The markdown report upload is kept for backends without /contacts/bulk
+        self.use_markdown = use_markdown
+        self.processor = MaritimeTextProcessor(str(model_dir))
+        # Load the models while the CLI is waiting for input
+        self.processor.warm_up()
+        # One keep-alive connection pool for every upload from this client
+        self.session = requests.Session()
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.retry_count = 0
+        self._retry_lock = threading.Lock()
 
     def process_input(self, input_data: Union[str, Path]) -> List[MaritimeContact]:
         """
@@ -46,15 +76,18 @@ class MaritimeAPIClient:
            
             formatted_data = self._format_contacts_for_backend(contacts)
             
-            
-            markdown_content = self._create_markdown_content(formatted_data)
-            
-            files = {
-                'file': ('report.md', markdown_content.encode('utf-8'), 'text/markdown')
-            }
-            
-            
-            response = requests.post(self.process_endpoint, files=files)
+            if self.use_markdown:
+                markdown_content = self._create_markdown_content(formatted_data)
+                files = {
+                    'file': ('report.md', markdown_content.encode('utf-8'), 'text/markdown')
+                }
+                response = self._post_with_retry(self.process_endpoint, files=files)
+            else:
+                response = self._post_with_retry(
+                    self.bulk_endpoint,
+                    data=json.dumps(formatted_data, separators=(',', ':')).encode('utf-8'),
+                    headers={'Content-Type': 'application/json'}
+                )
             response.raise_for_status()
             
             return response.json()
@@ -62,6 +95,81 @@ class MaritimeAPIClient:
         except Exception as e:
             return {"error": str(e)}
 
+    def _post_with_retry(self, url: str, **kwargs) -> requests.Response:
+        """
+        POST on the pooled session with exponential backoff, retrying only
+        failures where the server cannot have stored the upload: connect
+        errors and RETRY_STATUS.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(url, timeout=self.timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return response
+                delay = retry_after(response.headers.get('Retry-After'), self.backoff * 2 ** attempt)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries or not not_sent(e):
+                    raise
+                delay = self.backoff * 2 ** attempt
+            with self._retry_lock:
+                self.retry_count += 1
+            time.sleep(delay)
+
+    def process_batch(self, paths: List[Path], workers: int = 4, max_in_flight: int = 8) -> Dict:
+        """
+        Extract and upload many reports, reusing this client's processor and session.
+
+        Extraction runs on a pool of `workers` threads; each finished report
+        is handed to an upload pool of `max_in_flight` threads, which caps the
+        number of concurrent requests to the backend. Returns a summary with
+        files/sec and p50/p95 end-to-end latency (extraction start to upload
+        accepted).
+        """
+        def extract(path: Path):
+            started = time.perf_counter()
+            return path, started, self.process_input(path)
+
+        def upload(path: Path, started: float, contacts: List[MaritimeContact]):
+            response = self.send_to_backend(contacts)
+            return path, time.perf_counter() - started, len(contacts), response
+
+        start = time.perf_counter()
+        latencies, failures, contacts_sent = [], [], 0
+        retries_before = self.retry_count
+        with ThreadPoolExecutor(max_workers=workers) as extract_pool, \
+                ThreadPoolExecutor(max_workers=max_in_flight) as upload_pool:
+            uploads = []
+            extracts = {extract_pool.submit(extract, path): path for path in paths}
+            for future in as_completed(extracts):
+                try:
+                    uploads.append(upload_pool.submit(upload, *future.result()))
+                except Exception as e:
+                    failures.append({'file': str(extracts[future]), 'error': str(e)})
+            for future in as_completed(uploads):
+                path, latency, n_contacts, response = future.result()
+                if "error" in response:
+                    failures.append({'file': str(path), 'error': response['error']})
+                else:
+                    latencies.append(latency)
+                    contacts_sent += n_contacts
+
+        elapsed = time.perf_counter() - start
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            'files': len(paths),
+            'succeeded': len(latencies),
+            'failed': len(failures),
+            'contacts': contacts_sent,
+            'retries': self.retry_count - retries_before,
+            'seconds': round(elapsed, 3),
+            'files_per_sec': round(len(paths) / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies_ms, 50)), 1) if len(latencies) else None,
+                'p95': round(float(np.percentile(latencies_ms, 95)), 1) if len(latencies) else None
+            },
+            'errors': failures[:10]
+        }
+
     def _format_contacts_for_backend(self, contacts: List[MaritimeContact]) -> List[dict]:
         """Format contacts into the structure expected by the backend"""
         formatted_data = []
@@ -73,7 +181,10 @@ class MaritimeAPIClient:
                 "type": contact.type,
                 "significance": contact.significance,
                 "speed": contact.speed,
-                "timestamp": contact.timestamp
+                "timestamp": contact.timestamp,
+                "heading": contact.heading,
+                "confidence": contact.confidence,
+                "description": contact.description
             }
             formatted_data.append(contact_data)
             
@@ -88,12 +199,56 @@ class MaritimeAPIClient:
             
         return "".join(markdown_parts)
 
-def process_input(input_data: str, base_url: str = "http://localhost:8000") -> None:
+def not_sent(error: requests.RequestException) -> bool:
+    """True if the request failed before reaching the server, so retrying cannot duplicate it"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def retry_after(value: Optional[str], default: float) -> float:
+    """Seconds to wait from a Retry-After header, in delta-seconds or HTTP-date form"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def find_reports(pattern: str) -> List[Path]:
+    """Report files in a directory, or matching a glob such as 'reports/**/*.md'"""
+    path = Path(pattern)
+    if path.is_dir():
+        candidates = path.iterdir()
+    else:
+        candidates = (Path(p) for p in glob.glob(pattern, recursive=True))
+    return sorted(p for p in candidates if p.is_file() and p.suffix.lower() in REPORT_SUFFIXES)
+
+def process_batch(pattern: str, client: MaritimeAPIClient, workers: int = 4, max_in_flight: int = 8) -> None:
+    """Process every report matching pattern and print a throughput summary"""
+    paths = find_reports(pattern)
+    if not paths:
+        print(f"\nNo reports found for {pattern}")
+        return
+    print(f"\nProcessing {len(paths)} reports with {workers} workers, {max_in_flight} uploads in flight...")
+    print("=" * 50)
+    summary = client.process_batch(paths, workers, max_in_flight)
+    print(json.dumps(summary, indent=2))
+
+def process_input(input_data: str, base_url: str = "http://localhost:8000",
+                  client: Optional[MaritimeAPIClient] = None) -> None:
     """Process input and send to backend"""
     print(f"\nProcessing input...")
     print("=" * 50)
     
-    client = MaritimeAPIClient(base_url)
+    client = client or MaritimeAPIClient(base_url)
     
     try:
         
@@ -128,11 +283,29 @@ def main():
         type=str
     )
     
+    parser.add_argument(
+        "-b", "--batch",
+        help="Directory or glob of reports to process concurrently (e.g. 'reports/*.md')",
+        type=str
+    )
+
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR), help="Trained RAG artifacts")
+    parser.add_argument("--workers", type=int, default=4, help="Extraction threads in batch mode")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="Concurrent uploads in batch mode")
+    parser.add_argument("--retries", type=int, default=3, help="Upload retries with exponential backoff")
+    parser.add_argument("--markdown", action="store_true",
+                        help="Upload markdown reports to /process_report/ instead of JSON to /contacts/bulk")
+    
     args = parser.parse_args()
+    # One processor (models loaded once) and one connection pool for the whole session
+    client = MaritimeAPIClient(args.url, args.model_dir, pool_size=args.max_in_flight, retries=args.retries,
+                               use_markdown=args.markdown)
     
-    if args.input:
+    if args.batch:
+        process_batch(args.batch, client, args.workers, args.max_in_flight)
+    elif args.input:
         
-        process_input(args.input, args.url)
+        process_input(args.input, args.url, client)
     else:
         
         while True:
@@ -148,7 +321,7 @@ def main():
                 file_path = input("\nEnter the file path: ")
                 if file_path.lower() == 'exit':
                     break
-                process_input(file_path, args.url)
+                process_input(file_path, args.url, client)
                 
             elif choice == "2":
                 print("\nEnter your text (type 'END' on a new line when finished):")
@@ -159,7 +332,7 @@ def main():
                         break
                     lines.append(line)
                 text = '\n'.join(lines)
-                process_input(text, args.url)
+                process_input(text, args.url, client)
                 
             elif choice == "3":
                 break
@@ -1,40 +1,107 @@
-import re
 import json
-from datetime import datetime
+import codecs
+
+JSON_FENCE = '```json'
+CLOSE_FENCE = '```'
+# A single fenced block larger than this is dropped rather than buffered
+MAX_BLOCK_SIZE = 1024 * 1024
+
+
+def structure_block(block):
+    """Turn the body of one ```json block into a contact dict, or None if it is invalid"""
+    try:
+        data = json.loads(block.strip())
+
+        if 'coordinates' in data:
+            latitude = data['coordinates'][0]['lat']
+            longitude = data['coordinates'][0]['lon']
+        else:
+            latitude = data.get('latitude')
+            longitude = data.get('longitude')
+
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'type': data.get('type', data.get('name', 'Unknown Zone')),
+            'significance': data.get('significance', 'Not Available'),
+            'speed': data.get('speed', 0),
+            'timestamp': data.get('timestamp', '2024-10-20T05:30:00Z'),
+            'description': data.get('description', ''),
+            'heading': data.get('heading'),
+            'confidence': data.get('confidence', 1.0)
+        }
+    except json.JSONDecodeError:
+        print("Error parsing JSON block")
+    except Exception as e:
+        print(f"Error processing contact data: {str(e)}")
+    return None
+
+def structure_blocks(blocks):
+    """Structure a batch of raw blocks; a top-level function so process pools can run it"""
+    return [data for data in map(structure_block, blocks) if data is not None]
+
+def iter_json_blocks(chunks, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Incrementally find ```json fenced blocks in a stream of text chunks.
+
+    Yields the same block bodies as re.findall(r'```json(.*?)```', text, re.DOTALL)
+    over the concatenated text, while only ever buffering the current block.
+    """
+    buffer = ''
+    in_block = False
+    skipping = False
+    for chunk in chunks:
+        buffer += chunk
+        # Walk the buffer by position and slice once per chunk, not per block
+        pos = 0
+        while True:
+            if not in_block:
+                start = buffer.find(JSON_FENCE, pos)
+                if start < 0:
+                    # Keep a tail that could be the start of a split fence
+                    pos = max(pos, len(buffer) - (len(JSON_FENCE) - 1))
+                    break
+                pos = start + len(JSON_FENCE)
+                in_block = True
+            end = buffer.find(CLOSE_FENCE, pos)
+            if end < 0:
+                if len(buffer) - pos > max_block_size:
+                    if not skipping:
+                        print(f"Skipping JSON block larger than {max_block_size} bytes")
+                    # Discard the body but stay inside the block until its fence
+                    pos = len(buffer) - (len(CLOSE_FENCE) - 1)
+                    skipping = True
+                break
+            if not skipping:
+                yield buffer[pos:end]
+            pos = end + len(CLOSE_FENCE)
+            in_block = False
+            skipping = False
+        buffer = buffer[pos:]
+
+def iter_file_chunks(path, chunk_size=1 << 20):
+    """Read a UTF-8 file as text chunks without splitting multi-byte characters"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+def iter_block_batches(path, batch_size=500, chunk_size=1 << 20):
+    """Raw ```json block bodies from a file, grouped into lists of batch_size"""
+    batch = []
+    for block in iter_json_blocks(iter_file_chunks(path, chunk_size)):
+        batch.append(block)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 def parse_markdown(content):
-    
-    json_blocks = re.findall(r'```json(.*?)```', content, re.DOTALL)
-    
+
     # Extract structured data from each JSON block
-    extracted_data = []
-    for block in json_blocks:
-        try:
-            data = json.loads(block.strip())
-            
-           
-            if 'coordinates' in data:
-                latitude = data['coordinates'][0]['lat']
-                longitude = data['coordinates'][0]['lon']
-            else:
-                latitude = data.get('latitude')
-                longitude = data.get('longitude')
-
-            structured_data = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'type': data.get('type', data.get('name', 'Unknown Zone')),
-                'significance': data.get('significance', 'Not Available'),
-                'speed': data.get('speed', 0),
-                'timestamp': data.get('timestamp', '2024-10-20T05:30:00Z'),
-                'description': data.get('description', ''),
-                'heading': data.get('heading'),
-                'confidence': data.get('confidence', 1.0)
-            }
-            extracted_data.append(structured_data)
-        except json.JSONDecodeError:
-            print("Error parsing JSON block")
-        except Exception as e:
-            print(f"Error processing contact data: {str(e)}")
-    
-    return extracted_data
\ No newline at end of file
+    return structure_blocks(iter_json_blocks([content]))
@@ -0,0 +1,178 @@
+import fnmatch
+import json
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+METADATA_NAME = "metadata.npz"
+
+# Filterable string attributes: top-level fields first, then parsed metadata
+ATTRIBUTES = {
+    'document_type': lambda doc: doc.get('document_type', 'unknown'),
+    'source_file': lambda doc: doc.get('source_file'),
+    'priority': lambda doc: doc.get('metadata', {}).get('priority'),
+    'from': lambda doc: doc.get('metadata', {}).get('from'),
+    'location': lambda doc: doc.get('metadata', {}).get('location'),
+}
+TIME_FILTERS = ('since', 'until', 'within_hours')
+
+_MONTHS = {name: i for i, name in enumerate(
+    ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'], 1)}
+# Date-time group: DDHHMMZ MON YY, e.g. "250930Z OCT 24"
+_DTG_RE = re.compile(r'(\d{2})(\d{2})(\d{2})Z\s+([A-Z]{3})\s+(\d{2})')
+
+
+def parse_dtg(dtg: str) -> Optional[float]:
+    """Epoch seconds of a military date-time group, or None if it does not parse"""
+    match = _DTG_RE.search(dtg.upper())
+    if not match or match.group(4) not in _MONTHS:
+        return None
+    day, hour, minute, month, year = match.groups()
+    try:
+        return datetime(2000 + int(year), _MONTHS[month], int(day), int(hour), int(minute),
+                        tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def document_time(doc: Dict[str, Any]) -> Optional[float]:
+    """Epoch seconds of a message DTG or a surveillance log's date and time"""
+    metadata = doc.get('metadata', {})
+    if metadata.get('date_time'):
+        return parse_dtg(metadata['date_time'])
+    if metadata.get('date'):
+        clock = re.match(r'(\d{1,2}):(\d{2})', metadata.get('time', ''))
+        try:
+            stamp = datetime.strptime(metadata['date'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+        if clock:
+            stamp = stamp.replace(hour=int(clock.group(1)), minute=int(clock.group(2)))
+        return stamp.timestamp()
+    return None
+
+
+def _to_epoch(value) -> float:
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, str):
+        return _to_epoch(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    return float(value)
+
+
+class MetadataIndex:
+    """
+    Per-attribute id bitmaps over the RAG documents for filtered retrieval.
+
+    Every (attribute, value) pair owns one packed bitmap with bit i set when
+    document id i has that value, and document times are kept as one float
+    array, so a filter resolves to an id mask with a few vectorized ORs and
+    ANDs. The mask is handed to FAISS as an IDSelector and to BM25 as a
+    postings filter, so filtering happens inside the search.
+    """
+    def __init__(self, keys: List[List[str]], bitmaps: np.ndarray, live: np.ndarray, times: np.ndarray):
+        self.n_docs = len(times)
+        self.values: Dict[str, Dict[str, int]] = {}
+        for row, (attribute, value) in enumerate(keys):
+            self.values.setdefault(attribute, {})[value] = row
+        self.bitmaps = bitmaps
+        self.live = live
+        self.times = times
+
+    @classmethod
+    def build(cls, documents: Iterable[Optional[Dict[str, Any]]]) -> 'MetadataIndex':
+        """Index documents by position; None entries (tombstones) match no filter"""
+        members: Dict[tuple, List[int]] = {}
+        live, times = [], []
+        for doc_id, doc in enumerate(documents):
+            live.append(doc is not None)
+            times.append(document_time(doc) if doc is not None else None)
+            if doc is None:
+                continue
+            for attribute, get in ATTRIBUTES.items():
+                value = get(doc)
+                if value:
+                    members.setdefault((attribute, str(value)), []).append(doc_id)
+
+        n_docs = len(live)
+        keys = sorted(members)
+        # Set bits straight into the packed rows from each value's id list, so
+        # memory stays at n_docs / 8 bytes per value rather than a dense bool matrix
+        bitmaps = np.zeros((len(keys), (n_docs + 7) // 8), dtype='uint8')
+        for row, key in enumerate(keys):
+            ids = np.array(members[key], dtype='int64')
+            np.bitwise_or.at(bitmaps[row], ids >> 3, (1 << (ids & 7)).astype('uint8'))
+        return cls([list(key) for key in keys], bitmaps,
+                   np.array(live, dtype=bool),
+                   np.array([np.nan if t is None else t for t in times], dtype='float64'))
+
+    def save(self, path: Path):
+        keys = sorted(((attribute, value) for attribute, values in self.values.items() for value in values),
+                      key=lambda key: self.values[key[0]][key[1]])
+        with open(path, 'wb') as f:
+            np.savez(f, keys=np.frombuffer(json.dumps(keys).encode('utf-8'), dtype='uint8'),
+                     bitmaps=self.bitmaps, live=self.live, times=self.times)
+
+    @classmethod
+    def load(cls, path: Path) -> 'MetadataIndex':
+        with np.load(path) as data:
+            keys = json.loads(data['keys'].tobytes().decode('utf-8'))
+            return cls(keys, data['bitmaps'], data['live'], data['times'])
+
+    def _bitmap(self, row: int) -> np.ndarray:
+        return np.unpackbits(self.bitmaps[row], count=self.n_docs, bitorder='little').astype(bool)
+
+    def select(self, filters: Dict[str, Any], now: Optional[float] = None) -> np.ndarray:
+        """
+        Boolean mask over document ids matching every filter.
+
+        Attribute filters take a value or a list of values (OR-ed), matched
+        case-insensitively as shell patterns, e.g. {'priority': 'URGENT'} or
+        {'source_file': 'indian-navy-operation-zones_*'}. Time filters are
+        'since' / 'until' (epoch seconds, datetime or ISO string) and
+        'within_hours' (relative to now); documents without a time never match them.
+        """
+        mask = self.live.copy()
+        for name, wanted in filters.items():
+            if name in TIME_FILTERS:
+                continue
+            if name not in ATTRIBUTES:
+                raise ValueError(f"Unknown filter '{name}'; expected one of {list(ATTRIBUTES) + list(TIME_FILTERS)}")
+            patterns = [wanted] if isinstance(wanted, str) else list(wanted)
+            matched = np.zeros(self.n_docs, dtype=bool)
+            for value, row in self.values.get(name, {}).items():
+                if any(fnmatch.fnmatchcase(value.lower(), pattern.lower()) for pattern in patterns):
+                    matched |= self._bitmap(row)
+            mask &= matched
+
+        since = filters.get('since')
+        if filters.get('within_hours') is not None:
+            cutoff = (time.time() if now is None else now) - float(filters['within_hours']) * 3600
+            since = cutoff if since is None else max(_to_epoch(since), cutoff)
+        # NaN times compare False, so undated documents drop out here
+        if since is not None:
+            mask &= self.times >= _to_epoch(since)
+        if filters.get('until') is not None:
+            mask &= self.times <= _to_epoch(filters['until'])
+        return mask
+
+
+def main():
+    import argparse
+    from document_store import open_documents
+    parser = argparse.ArgumentParser(description="Build metadata.npz for existing RAG artifacts")
+    parser.add_argument("model_dir", type=Path)
+    args = parser.parse_args()
+    index = MetadataIndex.build(open_documents(args.model_dir))
+    index.save(args.model_dir / METADATA_NAME)
+    n_values = sum(len(values) for values in index.values.values())
+    print(f"Indexed {index.n_docs} documents, {n_values} attribute values, into {args.model_dir / METADATA_NAME}")
+
+
+if __name__ == "__main__":
+    main()
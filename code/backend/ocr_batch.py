@@ -0,0 +1,159 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:  # preprocessing degrades to PIL grayscale only
+    cv2 = None
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OCRConfig:
+    """Preprocessing and tesseract settings for scanned reports"""
+    target_dpi: int = 300
+    source_dpi: int = 300        # assumed when the image carries no DPI metadata
+    deskew: bool = True
+    crop: bool = True
+    oem: int = 1                 # LSTM engine only
+    psm: int = 6                 # reports are a single uniform block of text
+    # Restrict recognised characters, e.g. "0123456789.,°'NSEW " for
+    # coordinate-only forms. Leave unset for free-text reports.
+    whitelist: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'OCRConfig':
+        fields = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in (data or {}).items() if k in fields})
+
+    def tesseract_args(self) -> str:
+        args = f"--oem {self.oem} --psm {self.psm} -c preserve_interword_spaces=1"
+        if self.whitelist:
+            args += f" -c tessedit_char_whitelist={self.whitelist}"
+        return args
+
+
+def _deskew(gray: np.ndarray) -> np.ndarray:
+    """Rotate so text lines are horizontal, using the min-area rect of ink pixels"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    coords = np.column_stack(np.where(binary > 0))
+    if len(coords) < 50:
+        return gray
+    angle = cv2.minAreaRect(coords[:, ::-1].astype(np.float32))[-1]
+    # The reported range differs across OpenCV versions; fold into (-45, 45]
+    while angle > 45:
+        angle -= 90
+    while angle <= -45:
+        angle += 90
+    if abs(angle) < 0.1:
+        return gray
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def _crop_to_text(gray: np.ndarray, margin: int = 10) -> np.ndarray:
+    """Crop to the bounding box of the text regions"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    # Merge characters into blocks so isolated specks don't widen the box
+    blocks = cv2.dilate(binary, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 5)))
+    points = cv2.findNonZero(blocks)
+    if points is None:
+        return gray
+    x, y, w, h = cv2.boundingRect(points)
+    return gray[max(0, y - margin):y + h + margin, max(0, x - margin):x + w + margin]
+
+
+def preprocess_image(image_path: str, config: OCRConfig) -> np.ndarray:
+    """Grayscale, downscale to the target DPI, deskew and crop a scanned page"""
+    from PIL import Image
+    with Image.open(image_path) as image:
+        dpi = image.info.get('dpi', (config.source_dpi,))[0] or config.source_dpi
+        gray = np.array(image.convert('L'))
+
+    if cv2 is None:
+        return gray
+
+    if dpi > config.target_dpi:
+        scale = config.target_dpi / dpi
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if config.deskew:
+        gray = _deskew(gray)
+    if config.crop:
+        gray = _crop_to_text(gray)
+    return gray
+
+
+def ocr_page(image_path: str, config: OCRConfig, cache=None) -> str:
+    """Preprocess and OCR one page, consulting an OCRCache first if given"""
+    if cache is not None:
+        key = cache.key(image_path, asdict(config))
+        text = cache.get(key)
+        if text is not None:
+            return text
+    import pytesseract
+    text = pytesseract.image_to_string(preprocess_image(image_path, config),
+                                       config=config.tesseract_args())
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+
+def _init_worker():
+    # One tesseract thread per process; the pool provides the parallelism
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def _ocr_worker(image_path: str, config_dict: Dict[str, Any]) -> str:
+    return ocr_page(image_path, OCRConfig(**config_dict))
+
+
+def ocr_batch(image_paths: Iterable[str], config: Optional[OCRConfig] = None,
+              workers: Optional[int] = None, cache=None) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    OCR many pages on a process pool sized to the machine.
+
+    Yields (image_path, text, error) as each page finishes, so callers can
+    start extraction before the whole batch is done. Pages found in the
+    optional OCRCache are yielded first without touching the pool.
+    """
+    config = config or OCRConfig()
+    workers = workers or os.cpu_count() or 1
+    config_dict = asdict(config)
+    pending = []
+    for path in map(str, image_paths):
+        try:
+            key = cache.key(path, config_dict) if cache is not None else None
+            text = cache.get(key) if cache is not None else None
+        except OSError as e:
+            # Hashing reads the whole file, so a missing or unreadable page fails here
+            logger.error(f"Error processing image {path}: {e}")
+            yield path, None, str(e)
+            continue
+        if text is not None:
+            yield path, text, None
+        else:
+            pending.append((path, key))
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_ocr_worker, path, config_dict): (path, key) for path, key in pending}
+        for future in as_completed(futures):
+            path, key = futures[future]
+            try:
+                text = future.result()
+                if cache is not None:
+                    cache.put(key, text)
+                yield path, text, None
+            except Exception as e:
+                logger.error(f"Error processing image {path}: {e}")
+                yield path, None, str(e)
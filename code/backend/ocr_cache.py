@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_tesseract_version = None
+
+
+def tesseract_version() -> str:
+    """Installed tesseract version, looked up once per process"""
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            import pytesseract
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception as e:
+            logger.warning(f"Could not determine tesseract version: {e}")
+            _tesseract_version = "unknown"
+    return _tesseract_version
+
+
+class OCRCache:
+    """
+    Content-addressed store of OCR text.
+
+    Keys are SHA-256 over the image bytes, the tesseract version and the
+    OCR settings, so a parser fix or a tesseract upgrade never serves stale
+    text. Entries are one file each; a hit touches the file's mtime and the
+    least recently used files are evicted once the store exceeds max_bytes.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = sum(path.stat().st_size for path in self.dir.glob("*.txt"))
+
+    def key(self, image_path: str, settings: Dict) -> str:
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(tesseract_version().encode('utf-8'))
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.dir / f"{key}.txt"
+        try:
+            text = path.read_text(encoding='utf-8')
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        path = self.dir / f"{key}.txt"
+        tmp_path = self.dir / f".{key}.{os.getpid()}.tmp"
+        data = text.encode('utf-8')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.size_bytes += len(data)
+            if self.size_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the store is at 90% of budget"""
+        entries = []
+        for path in self.dir.glob("*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self.size_bytes = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self.size_bytes <= target:
+                break
+            try:
+                path.unlink()
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            self.size_bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size_bytes': self.size_bytes
+        }
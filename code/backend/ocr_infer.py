@@ -1,23 +1,148 @@
 import json
 from pathlib import Path
-import pytesseract
-from PIL import Image
 import re
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 from datetime import datetime
 import logging
-from sentence_transformers import SentenceTransformer
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
-import faiss
 import numpy as np
+from embedding_cache import EmbeddingCache
+from document_store import open_documents
+from lexical_index import LEXICAL_NAME, LexicalIndex
+from metadata_index import METADATA_NAME, MetadataIndex
+from onnx_embedder import cache_model_name
+from embedding_batcher import MicroBatcher
+
+# ocr_batch (pytesseract/PIL/cv2), sentence_transformers (torch), transformers
+# and faiss are imported on first use so regex-only callers never pay for them.
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+# Extraction patterns, compiled once at import. Everything except the
+# degree/minute coordinate pattern runs against the lower-cased segment.
+VESSEL_TYPES = [
+   
+    'cargo vessel', 'container ship', 'tanker', 'oil tanker', 'crude carrier',
+    'cruise ship', 'passenger ship',
+    
+    
+    'fishing vessel', 'fishing fleet', 'fishing boat',
+    
+    
+    'patrol vessel', 'patrol boat', 'submarine', 'naval vessel',
+    
+    
+    'pleasure yacht', 'yacht', 'sailing yacht',
+    
+    
+    'research ship', 'research vessel',
+    
+    
+    'suspicious vessel', 'unidentified vessel', 'unidentified craft',
+    'unlit vessel', 'fast-moving craft', 'small craft',
+    
+    
+    'pacific trader', 'ocean star', 'black pearl', 'sea breeze',
+    'asian enterprise', 'windseeker', 'global freight', 'shadow runner',
+    'lucky star', 'serenity'
+]
+
+COMPASS_DEGREES = {
+    'north': 0, 'northeast': 45, 'east': 90, 'southeast': 135,
+    'south': 180, 'southwest': 225, 'west': 270, 'northwest': 315
+}
+
+# Longest types first (list order breaks ties), so the first substring hit
+# is the longest match and the scan can stop there. Measured faster than an
+# overlapping-alternation regex on the naval_data corpus.
+_VESSEL_TYPES_BY_LENGTH = sorted(VESSEL_TYPES, key=lambda vtype: -len(vtype))
+_SEGMENT_SPLIT_RE = re.compile(r'(?:\d+\.\s+|\n\s*\n)')
+_SPEED_RE = re.compile(r'(\d+\.?\d*)\s*(?:knots?|kts?)')
+_KNOTS_RE = re.compile(r'(\d+\.?\d*)\s*knots')
+_DEGREES_RE = re.compile(r'(\d+\.?\d*)\s*degrees')
+_DEG_MIN_RE = re.compile(r"(\d+)°(\d+)'([NSns]),\s*(\d+)°(\d+)'([EWew])")
+_LAT_LON_RE = re.compile(r'latitude\s*(-?\d+\.?\d*)\s*[NSns],\s*longitude\s*(-?\d+\.?\d*)\s*[EWew]')
+_HEADING_RULES = [
+    (re.compile(r'heading\s+(\d+\.?\d*)\s*(?:degrees|°)'), float),
+    (re.compile(r'bearing\s+(\d+\.?\d*)\s*(?:degrees|°)'), float),
+    (re.compile(r'moving\s+(north|south|east|west|northeast|northwest|southeast|southwest)'),
+        lambda x: COMPASS_DEGREES[x]),
+]
+
+
+def detect_vessel_type(lowered: str) -> str:
+    """Longest known vessel type occurring in the text, earliest-listed on ties"""
+    for vtype in _VESSEL_TYPES_BY_LENGTH:
+        if vtype in lowered:
+            return vtype
+    return 'unknown'
+
+
+def extract_coordinates(text: str, lowered: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """Extract latitude and longitude from text with support for various formats"""
+    match = _DEG_MIN_RE.search(text)
+    if match:
+        lat_deg, lat_min, lat_dir, lon_deg, lon_min, lon_dir = match.groups()
+        lat = float(lat_deg) + float(lat_min)/60
+        lon = float(lon_deg) + float(lon_min)/60
+        if lat_dir.upper() == 'S':
+            lat = -lat
+        if lon_dir.upper() == 'W':
+            lon = -lon
+        return (lat, lon)
+
+    match = _LAT_LON_RE.search(lowered if lowered is not None else text.lower())
+    if match:
+        lat = float(match.group(1))
+        lon = float(match.group(2))
+        return (lat, lon)
+
+    return None
+
+
+def parse_segment(segment: str):
+    """
+    Single pass over one report segment.
+
+    Returns (coordinates, speed, vessel_type, heading, context) and lower-cases
+    the segment exactly once.
+    """
+    lowered = segment.lower()
+    
+    coordinates = extract_coordinates(segment, lowered)
+    
+    speed_match = _SPEED_RE.search(lowered)
+    speed = float(speed_match.group(1)) if speed_match else None
+    
+    detected_type = detect_vessel_type(lowered)
+    if 'multiple' in lowered and 'vessels' in lowered:
+        detected_type = 'multiple vessels'
+    
+    heading = None
+    for pattern, converter in _HEADING_RULES:
+        match = pattern.search(lowered)
+        if match:
+            heading = converter(match.group(1))
+            break
+    
+    
+    context = []
+    if 'illegal' in lowered:
+        context.append('illegal activity suspected')
+    if 'suspicious' in lowered:
+        context.append('suspicious behavior')
+    if 'routine' in lowered:
+        context.append('routine transit')
+    if 'distress' in lowered:
+        context.append('vessel in distress')
+    return coordinates, speed, detected_type, heading, context
+
+
 @dataclass
 class MaritimeContact:
     """Structured data class for maritime contacts matching backend requirements"""
@@ -30,6 +155,7 @@ class MaritimeContact:
     confidence: float
     description: str
     heading: Optional[float]
+    related_documents: List[Dict[str, Any]] = field(default_factory=list)
 
     @classmethod
     def from_extracted_data(cls, timestamp: str, coordinates: Optional[Tuple[float, float]], 
@@ -59,54 +185,301 @@ class MaritimeContact:
             'significance': self.significance,
             'confidence': self.confidence,
             'description': self.description,
-            'heading': self.heading
+            'heading': self.heading,
+            'related_documents': self.related_documents
         }
         
         
 class MaritimeTextProcessor:
-    def __init__(self, model_dir: str = "/home/systemx86/Desktop/Hack/naval/code/rag/maritime_rag"):
-        """Initialize the text processor with trained RAG model"""
+    def __init__(self, model_dir: str = "/home/systemx86/Desktop/Hack/naval/code/rag/maritime_rag",
+                 retrieval: Optional[bool] = None):
+        """
+        Initialize the text processor with trained RAG model
+
+        Args:
+            model_dir: Directory with the trained RAG artifacts
+            retrieval: Attach retrieved reference documents to each contact.
+                False gives regex-only extraction with no embedding or search;
+                None uses the 'retrieval' setting in config.json (default on).
+        """
         self.model_dir = Path(model_dir)
         if not self.model_dir.exists():
             raise FileNotFoundError(f"Model directory {model_dir} not found")
 
       
-        logger.info("Loading trained models and artifacts...")
-        self._load_trained_models()
+        with open(self.model_dir / "config.json", 'r') as f:
+            self.config = json.load(f)
+        # 'torch' (SentenceTransformer) or 'onnx' (ONNX Runtime, int8 unless onnx_quantized is false)
+        self.embedding_backend = self.config.get('embedding_backend', 'torch')
+
+        # Heavy components, loaded lazily by the properties below
+        self._embedding_cache = None
+        self._embedding_model = None
+        self._embedding_batcher = None
+        self._tokenizer = None
+        self._generator = None
+        self._index = None
+        self._documents = None
+        self._lexical_index = None
+        self._metadata_index = None
+        self._artifacts_mtime = None
+        self._ocr_cache = None
+        self._load_lock = threading.RLock()
         
-        self.ocr = pytesseract.pytesseract
+        self.retrieval = self.config.get('retrieval', True) if retrieval is None else retrieval
+        self.retrieval_k = self.config.get('retrieval_k', 3)
+        # 'vector' or 'hybrid' (BM25 + vector, fused by reciprocal rank)
+        self.retrieval_mode = self.config.get('retrieval_mode', 'vector')
         logger.info("Text processor initialized successfully")
 
-    def _load_trained_models(self):
-        """Load trained models and artifacts"""
-       
-        with open(self.model_dir / "config.json", 'r') as f:
-            self.config = json.load(f)
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        """Opened on the first embed, so regex-only processors never touch the cache directory"""
+        if self._embedding_cache is None:
+            with self._load_lock:
+                if self._embedding_cache is None:
+                    self._embedding_cache = EmbeddingCache(
+                        self.config.get('embedding_cache_dir', self.model_dir / "embedding_cache"),
+                        cache_model_name(self.config['embedding_model'], self.embedding_backend,
+                                         self.config.get('onnx_quantized', True)),
+                        self.config['embedding_dim']
+                    )
+        return self._embedding_cache
 
-       
-        self.embedding_model = SentenceTransformer(self.config['embedding_model'])
-        self.tokenizer = AutoTokenizer.from_pretrained(self.config['generator_model'])
-        self.generator = AutoModelForSeq2SeqLM.from_pretrained(self.config['generator_model'])
+    @property
+    def embedding_model(self):
+        if self._embedding_model is None:
+            with self._load_lock:
+                if self._embedding_model is None:
+                    logger.info(f"Loading embedding model {self.config['embedding_model']} "
+                                f"({self.embedding_backend})")
+                    if self.embedding_backend == 'onnx':
+                        from onnx_embedder import OnnxEmbedder
+                        self._embedding_model = OnnxEmbedder(
+                            self.config.get('onnx_model_dir', self.model_dir / "onnx"),
+                            quantized=self.config.get('onnx_quantized', True),
+                            threads=self.config.get('onnx_threads')
+                        )
+                    else:
+                        from sentence_transformers import SentenceTransformer
+                        self._embedding_model = SentenceTransformer(self.config['embedding_model'])
+        return self._embedding_model
 
-        
-        self.index = faiss.read_index(str(self.model_dir / "maritime.index"))
+    @property
+    def embedding_batcher(self) -> MicroBatcher:
+        """Coalesces concurrent encode calls (e.g. from threads sharing this processor)"""
+        if self._embedding_batcher is None:
+            with self._load_lock:
+                if self._embedding_batcher is None:
+                    self._embedding_batcher = MicroBatcher(
+                        self._run_embedding_model,
+                        max_batch_size=self.config.get('embedding_max_batch', 64),
+                        max_wait_ms=self.config.get('embedding_max_wait_ms', 5.0)
+                    )
+        return self._embedding_batcher
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            with self._load_lock:
+                if self._tokenizer is None:
+                    from transformers import AutoTokenizer
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.config['generator_model'])
+        return self._tokenizer
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            with self._load_lock:
+                if self._generator is None:
+                    logger.info(f"Loading generator model {self.config['generator_model']}")
+                    from transformers import AutoModelForSeq2SeqLM
+                    self._generator = AutoModelForSeq2SeqLM.from_pretrained(self.config['generator_model'])
+        return self._generator
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._load_lock:
+                if self._index is None:
+                    self._load_index_artifacts()
+        return self._index
+
+    @property
+    def documents(self):
+        if self._documents is None:
+            with self._load_lock:
+                if self._documents is None:
+                    self._load_index_artifacts()
+        return self._documents
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        """BM25 index written by the trainer, or None for artifacts that predate it"""
+        if self._artifacts_mtime is None:
+            with self._load_lock:
+                if self._artifacts_mtime is None:
+                    self._load_index_artifacts()
+        return self._lexical_index
+
+    @property
+    def metadata_index(self) -> Optional[MetadataIndex]:
+        """Per-attribute id bitmaps for filtered retrieval, or None for older artifacts"""
+        if self._artifacts_mtime is None:
+            with self._load_lock:
+                if self._artifacts_mtime is None:
+                    self._load_index_artifacts()
+        return self._metadata_index
 
+    @property
+    def ocr_cache(self):
+        if self._ocr_cache is None:
+            from ocr_cache import OCRCache
+            self._ocr_cache = OCRCache(
+                self.config.get('ocr_cache_dir', self.model_dir / "ocr_cache"),
+                int(self.config.get('ocr_cache_max_mb', 256) * 1024 * 1024)
+            )
+        return self._ocr_cache
+
+    @property
+    def ocr(self):
+        import pytesseract
+        return pytesseract.pytesseract
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load the components retrieval needs ahead of the first request.
+
+        With background=True this runs in a daemon thread and returns it;
+        requests arriving meanwhile block on the same load lock.
+        """
+        def load():
+            if self.retrieval:
+                _ = self.embedding_model
+                _ = self.index
+            logger.info("Text processor warm-up complete")
+
+        if not background:
+            load()
+            return None
+        thread = threading.Thread(target=load, name="maritime-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _load_index_artifacts(self):
+        """Load config, index and documents, then swap them in together"""
+        config_path = self.model_dir / "config.json"
+        # The trainer replaces config.json last, so its mtime marks a complete update
+        mtime = config_path.stat().st_mtime_ns
+        with open(config_path, 'r') as f:
+            config = json.load(f)
         
-        with open(self.model_dir / "documents.json", 'r') as f:
-            self.documents = json.load(f)
+        index = self._read_index(self.model_dir / "maritime.index", config)
+
+        documents = open_documents(self.model_dir)
+        lexical_path = self.model_dir / LEXICAL_NAME
+        lexical_index = LexicalIndex.load(lexical_path) if lexical_path.exists() else None
+        metadata_path = self.model_dir / METADATA_NAME
+        metadata_index = MetadataIndex.load(metadata_path) if metadata_path.exists() else None
+
+        self.config, self._index, self._documents = config, index, documents
+        self._lexical_index, self._metadata_index = lexical_index, metadata_index
+        self._artifacts_mtime = mtime
+
+    def reload_if_changed(self) -> bool:
+        """Hot-reload the index and documents if the trainer has written new artifacts"""
+        try:
+            mtime = (self.model_dir / "config.json").stat().st_mtime_ns
+        except OSError:
+            return False
+        if self._artifacts_mtime is None or mtime == self._artifacts_mtime:
+            return False
+        with self._load_lock:
+            if mtime != self._artifacts_mtime:
+                logger.info("RAG artifacts changed on disk, reloading index")
+                self._load_index_artifacts()
+        return True
+
+    def _read_index(self, index_path: Path, config: Dict[str, Any]):
+        """
+        Open the FAISS index and apply search-time parameters.
+
+        With mmap_index (the default) IVF inverted lists are memory-mapped,
+        and so are the vectors of flat and HNSW indexes where FAISS has
+        IO_FLAG_MMAP_IFC (1.10+). Older FAISS reads flat and HNSW indexes
+        fully into RAM; use an IVF index_type there when the index should
+        stay on disk.
+        """
+        import faiss
+        index_type = config.get('index_type', 'flat')
+        if config.get('mmap_index', True):
+            mmap_codes = getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+            if not mmap_codes and index_type in ('flat', 'hnsw'):
+                logger.info(f"This FAISS cannot memory-map {index_type} vectors; they are read into RAM")
+            try:
+                # Pages are shared between worker processes and loaded on demand
+                index = faiss.read_index(str(index_path),
+                                         faiss.IO_FLAG_MMAP | mmap_codes | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError as e:
+                logger.warning(f"mmap not supported for this index, reading into memory: {e}")
+                index = faiss.read_index(str(index_path))
+        else:
+            index = faiss.read_index(str(index_path))
+
+        params = config.get('index_params', {})
+        search_keys = {'ivf': ('nprobe',), 'ivfpq': ('nprobe',), 'hnsw': ('efSearch',)}.get(index_type, ())
+        search_params = [f"{key}={params[key]}" for key in search_keys if key in params]
+        if search_params:
+            faiss.ParameterSpace().set_index_parameters(index, ",".join(search_params))
+        logger.info(f"Loaded {index_type} index with {index.ntotal} vectors")
+        return index
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed cache misses; callers go through self.embedding_cache"""
+        if self.config.get('embedding_batching', True):
+            return self.embedding_batcher.encode(texts)
+        return self._run_embedding_model(texts)
+
+    def _run_embedding_model(self, texts: List[str]) -> np.ndarray:
+        if self.embedding_backend == 'onnx':
+            return self.embedding_model.encode(texts)
+        return self.embedding_model.encode(texts, convert_to_tensor=True).cpu().numpy()
+
+    def embedding_cache_stats(self) -> Dict[str, int]:
+        return self.embedding_cache.stats()
+
+    def embedding_batcher_stats(self) -> Dict[str, Any]:
+        return self._embedding_batcher.stats() if self._embedding_batcher is not None else {}
 
     def process_image(self, image_path: str) -> str:
         """Process image through OCR"""
         logger.info(f"Processing image: {image_path}")
         try:
-            image = Image.open(image_path)
-            text = self.ocr.image_to_string(image)
-            logger.info("OCR processing successful")
+            from ocr_batch import OCRConfig, ocr_page
+            text = ocr_page(image_path, OCRConfig.from_dict(self.config.get('ocr')), self.ocr_cache)
+            logger.info(f"OCR processing successful (cache: {self.ocr_cache.stats()})")
             return text
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}")
             raise
 
+    def process_images(self, image_paths: List[str], workers: Optional[int] = None
+                       ) -> Iterator[Tuple[str, Optional[List[MaritimeContact]], Optional[str]]]:
+        """
+        OCR a batch of scanned reports in parallel and extract contacts.
+
+        Yields (image_path, contacts, error) in completion order; extraction
+        of finished pages overlaps with OCR of the rest.
+        """
+        from ocr_batch import OCRConfig, ocr_batch
+        config = OCRConfig.from_dict(self.config.get('ocr'))
+        for path, text, error in ocr_batch(image_paths, config, workers, self.ocr_cache):
+            if error is not None:
+                yield path, None, error
+                continue
+            yield path, self.extract_maritime_info(text), None
+        logger.info(f"OCR cache: {self.ocr_cache.stats()}")
+
     def process_report(self, report_path: str) -> List[MaritimeContact]:
         """Process a report file and return structured maritime contacts"""
         logger.info(f"Processing report: {report_path}")
@@ -124,6 +497,8 @@ class MaritimeTextProcessor:
             
            
             self._print_contacts(contacts)
+            if report_path.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff')):
+                print(f"OCR cache: {json.dumps(self.ocr_cache.stats())}")
             
             return contacts
             
@@ -143,51 +518,23 @@ class MaritimeTextProcessor:
 
     def _extract_speed(self, text: str) -> Optional[float]:
         """Extract speed information from text"""
-        speed_pattern = r'(\d+\.?\d*)\s*knots'
-        match = re.search(speed_pattern, text.lower())
+        match = _KNOTS_RE.search(text.lower())
         return float(match.group(1)) if match else None
 
     def _extract_heading(self, text: str) -> Optional[float]:
         """Extract heading information from text"""
-        
-        compass_dirs = {
-            'north': 0, 'northeast': 45, 'east': 90, 'southeast': 135,
-            'south': 180, 'southwest': 225, 'west': 270, 'northwest': 315
-        }
-        
-        for direction, degrees in compass_dirs.items():
-            if direction in text.lower():
+        lowered = text.lower()
+        for direction, degrees in COMPASS_DEGREES.items():
+            if direction in lowered:
                 return float(degrees)
                 
        
-        degree_pattern = r'(\d+\.?\d*)\s*degrees'
-        match = re.search(degree_pattern, text.lower())
+        match = _DEGREES_RE.search(lowered)
         return float(match.group(1)) if match else None
 
     def _extract_coordinates(self, text: str) -> Optional[Tuple[float, float]]:
         """Extract latitude and longitude from text with support for various formats"""
-        
-        deg_min_pattern = r"(\d+)°(\d+)'([NSns]),\s*(\d+)°(\d+)'([EWew])"
-        match = re.search(deg_min_pattern, text)
-        if match:
-            lat_deg, lat_min, lat_dir, lon_deg, lon_min, lon_dir = match.groups()
-            lat = float(lat_deg) + float(lat_min)/60
-            lon = float(lon_deg) + float(lon_min)/60
-            if lat_dir.upper() == 'S':
-                lat = -lat
-            if lon_dir.upper() == 'W':
-                lon = -lon
-            return (lat, lon)
-
-        
-        coord_pattern = r'latitude\s*(-?\d+\.?\d*)\s*[NSns],\s*longitude\s*(-?\d+\.?\d*)\s*[EWew]'
-        match = re.search(coord_pattern, text.lower())
-        if match:
-            lat = float(match.group(1))
-            lon = float(match.group(2))
-            return (lat, lon)
-
-        return None
+        return extract_coordinates(text)
 
     def _calculate_confidence(self, coordinates: Optional[Tuple[float, float]], 
                             speed: Optional[float], 
@@ -205,104 +552,159 @@ class MaritimeTextProcessor:
             score += 0.3
         return min(score, 1.0)  
 
+    def _hit(self, doc_id: int, **scores) -> Optional[Dict[str, Any]]:
+        """Summary of one retrieved document, or None for ids with no live document"""
+        if doc_id < 0 or doc_id >= len(self.documents):
+            return None
+        doc = self.documents[doc_id]
+        if doc is None:
+            return None
+        return {
+            'id': int(doc_id),
+            **scores,
+            'name': doc.get('name', doc.get('document_type', 'unknown')),
+            'type': doc.get('type'),
+            'source_file': doc.get('source_file')
+        }
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean id mask for metadata filters (see MetadataIndex.select), None when unfiltered"""
+        if not filters:
+            return None
+        metadata = self.metadata_index
+        if metadata is None:
+            raise RuntimeError(f"No {METADATA_NAME} in {self.model_dir}; retrain to build it")
+        return metadata.select(filters)
+
+    def _search_parameters(self, mask: np.ndarray):
+        """
+        FAISS search parameters restricting results to ids set in mask.
+
+        The selector is checked inside the scan, so a narrow filter does not
+        need over-fetching. Parameter objects replace the index's own
+        nprobe / efSearch, so those are carried over from config.
+        """
+        import faiss
+        bitmap = np.packbits(mask, bitorder='little')
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        params = self.config.get('index_params', {})
+        index_type = self.config.get('index_type', 'flat')
+        if index_type in ('ivf', 'ivfpq'):
+            search_params = faiss.SearchParametersIVF(sel=selector, nprobe=params.get('nprobe', 1))
+        elif index_type == 'hnsw':
+            search_params = faiss.SearchParametersHNSW(sel=selector, efSearch=params.get('efSearch', 16))
+        else:
+            search_params = faiss.SearchParameters(sel=selector)
+        # The selector only points at the bitmap, so it must outlive the search
+        search_params.bitmap = bitmap
+        return search_params
+
+    def _vector_search(self, segments: List[str], k: int,
+                       mask: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """(doc_id, distance) per segment from one batched encode + search"""
+        if mask is not None and not mask.any():
+            return [[] for _ in segments]
+        embeddings = self.embedding_cache.encode(segments, self._encode)
+        if mask is None:
+            distances, indices = self.index.search(embeddings, k)
+        else:
+            distances, indices = self.index.search(embeddings, k, params=self._search_parameters(mask))
+        return [[(int(doc_id), float(distance)) for distance, doc_id in zip(row_distances, row_indices)
+                 if doc_id >= 0]
+                for row_distances, row_indices in zip(distances, indices)]
+
+    def retrieve(self, segments: List[str], k: Optional[int] = None,
+                 filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Nearest reference documents (zones, chokepoints, messages) for each segment.
+
+        filters restricts the search to matching documents, e.g.
+        {'priority': 'URGENT'}, {'document_type': 'surveillance_log', 'within_hours': 48}
+        or {'source_file': 'indian-navy-operation-zones_*'}.
+        """
+        if not segments:
+            return []
+        self.reload_if_changed()
+        k = k or self.retrieval_k
+        if self.retrieval_mode == 'hybrid' and self.lexical_index is not None:
+            return self.hybrid_retrieve(segments, k, filters)
+
+        results = []
+        for row in self._vector_search(segments, k, self._filter_mask(filters)):
+            hits = [self._hit(doc_id, distance=distance) for doc_id, distance in row]
+            results.append([hit for hit in hits if hit is not None])
+        return results
+
+    def hybrid_retrieve(self, segments: List[str], k: Optional[int] = None,
+                        filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Fuse BM25 and vector rankings per segment with reciprocal rank fusion.
+
+        Each ranking contributes 1 / (rrf_k + rank) for the documents in its
+        top 'hybrid_candidates', so exact tokens (DTGs, vessel names,
+        callsigns) that embeddings miss still surface. filters applies to
+        both rankings as in retrieve().
+        """
+        if not segments:
+            return []
+        self.reload_if_changed()
+        k = k or self.retrieval_k
+        lexical = self.lexical_index
+        if lexical is None:
+            raise RuntimeError(f"No {LEXICAL_NAME} in {self.model_dir}; retrain to build it")
+        candidates = max(k, self.config.get('hybrid_candidates', 50))
+        rrf_k = self.config.get('rrf_k', 60)
+        mask = self._filter_mask(filters)
+
+        results = []
+        for segment, vector_row in zip(segments, self._vector_search(segments, candidates, mask)):
+            fused: Dict[int, Dict[str, Any]] = {}
+            for rank, (doc_id, distance) in enumerate(vector_row, 1):
+                fused[doc_id] = {'score': 1 / (rrf_k + rank), 'vector_rank': rank, 'distance': distance}
+            for rank, (doc_id, _) in enumerate(lexical.search(segment, candidates, mask), 1):
+                entry = fused.setdefault(doc_id, {'score': 0.0})
+                entry['score'] += 1 / (rrf_k + rank)
+                entry['lexical_rank'] = rank
+            ranked = sorted(fused.items(), key=lambda item: item[1]['score'], reverse=True)
+            hits = []
+            for doc_id, scores in ranked:
+                hit = self._hit(doc_id, **scores)
+                if hit is not None:
+                    hits.append(hit)
+                    if len(hits) == k:
+                        break
+            results.append(hits)
+        return results
+
+    def lookup(self, identifier: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Documents containing an exact identifier such as a DTG ("201700Z OCT 24"),
+        vessel name or callsign, resolved from the inverted index alone.
+        """
+        self.reload_if_changed()
+        lexical = self.lexical_index
+        if lexical is None:
+            raise RuntimeError(f"No {LEXICAL_NAME} in {self.model_dir}; retrain to build it")
+        doc_ids = lexical.lookup(identifier, self.documents, self._filter_mask(filters))
+        hits = [self._hit(doc_id) for doc_id in doc_ids]
+        return [hit for hit in hits if hit is not None]
+
     def extract_maritime_info(self, text: str) -> List[MaritimeContact]:
         """Extract structured maritime information using RAG"""
         logger.info("Extracting maritime information from text")
-        
-        
-        query_embedding = self.embedding_model.encode([text], convert_to_tensor=True)
-        query_embedding_np = query_embedding.cpu().numpy()
-
-       
-        k = 3
-        distances, indices = self.index.search(query_embedding_np, k)
-        
-       
-        vessel_types = [
-           
-            'cargo vessel', 'container ship', 'tanker', 'oil tanker', 'crude carrier',
-            'cruise ship', 'passenger ship',
-            
-            
-            'fishing vessel', 'fishing fleet', 'fishing boat',
-            
-            
-            'patrol vessel', 'patrol boat', 'submarine', 'naval vessel',
-            
-            
-            'pleasure yacht', 'yacht', 'sailing yacht',
-            
-            
-            'research ship', 'research vessel',
-            
-            
-            'suspicious vessel', 'unidentified vessel', 'unidentified craft',
-            'unlit vessel', 'fast-moving craft', 'small craft',
-            
-            
-            'pacific trader', 'ocean star', 'black pearl', 'sea breeze',
-            'asian enterprise', 'windseeker', 'global freight', 'shadow runner',
-            'lucky star', 'serenity'
-        ]
+        start_time = time.perf_counter()
         
         contacts = []
         
         
-        report_segments = re.split(r'(?:\d+\.\s+|\n\s*\n)', text)
+        report_segments = [
+            segment for segment in _SEGMENT_SPLIT_RE.split(text)
+            if segment.strip()
+        ]
+        related = self.retrieve(report_segments) if self.retrieval else [[] for _ in report_segments]
         
-        for segment in report_segments:
-            if not segment.strip():
-                continue
-                
-            
-            coordinates = self._extract_coordinates(segment)
-            
-            # Extract speed - enhanced pattern
-            speed_pattern = r'(\d+\.?\d*)\s*(?:knots?|kts?)'
-            speed_match = re.search(speed_pattern, segment.lower())
-            speed = float(speed_match.group(1)) if speed_match else None
-            
-           
-            detected_type = 'unknown'
-            longest_match = ''
-            
-            for vtype in vessel_types:
-                if vtype.lower() in segment.lower():
-                    if len(vtype) > len(longest_match):
-                        longest_match = vtype
-                        detected_type = vtype
-            
-            
-            if 'multiple' in segment.lower() and 'vessels' in segment.lower():
-                detected_type = 'multiple vessels'
-                
-            
-            heading_patterns = {
-                r'heading\s+(\d+\.?\d*)\s*(?:degrees|°)': lambda x: float(x),
-                r'bearing\s+(\d+\.?\d*)\s*(?:degrees|°)': lambda x: float(x),
-                r'moving\s+(north|south|east|west|northeast|northwest|southeast|southwest)': 
-                    lambda x: {'north': 0, 'northeast': 45, 'east': 90, 'southeast': 135,
-                            'south': 180, 'southwest': 225, 'west': 270, 'northwest': 315}[x.lower()]
-            }
-            
-            heading = None
-            for pattern, converter in heading_patterns.items():
-                match = re.search(pattern, segment.lower())
-                if match:
-                    heading = converter(match.group(1))
-                    break
-            
-            
-            context = []
-            if 'illegal' in segment.lower():
-                context.append('illegal activity suspected')
-            if 'suspicious' in segment.lower():
-                context.append('suspicious behavior')
-            if 'routine' in segment.lower():
-                context.append('routine transit')
-            if 'distress' in segment.lower():
-                context.append('vessel in distress')
-                
+        for segment, related_documents in zip(report_segments, related):
+            coordinates, speed, detected_type, heading, context = parse_segment(segment)
            
             confidence = self._calculate_confidence(coordinates, speed, heading, detected_type)
             
@@ -330,10 +732,13 @@ class MaritimeTextProcessor:
                 description=description,
                 confidence=confidence
             )
+            contact.related_documents = related_documents
             
             contacts.append(contact)
         
-        logger.info(f"Extracted {len(contacts)} contacts from text")
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        mode = "retrieval" if self.retrieval else "regex-only"
+        logger.info(f"Extracted {len(contacts)} contacts from text in {elapsed_ms:.1f} ms ({mode})")
         return contacts
 
     def _print_contacts(self, contacts: List[MaritimeContact]):
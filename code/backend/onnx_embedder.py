@@ -0,0 +1,139 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+ONNX_CONFIG = "onnx_config.json"
+FP32_MODEL = "model.onnx"
+INT8_MODEL = "model_int8.onnx"
+
+
+def cache_model_name(model_name: str, backend: str = 'torch', quantized: bool = True) -> str:
+    """
+    Embedding cache namespace for a model and backend.
+
+    int8 vectors differ slightly from fp32 ones, so they must not share
+    cache entries with the PyTorch model.
+    """
+    if backend != 'onnx':
+        return model_name
+    return f"{model_name}@onnx-int8" if quantized else f"{model_name}@onnx"
+
+
+def export(model_name: str, output_dir: Path, quantize: bool = True, opset: int = 14):
+    """
+    Export a sentence-transformers model to ONNX, plus a dynamically
+    int8-quantized copy, with the tokenizer and pooling settings needed to
+    reproduce SentenceTransformer.encode without PyTorch.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(str(output_dir))
+
+    sample = dict(tokenizer(["vessel sighted at 12.5N 45.2E"], return_tensors='pt'))
+    input_names = list(sample)
+    output_names = ['last_hidden_state', 'pooler_output']
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    dynamic_axes['pooler_output'] = {0: 'batch'}
+    fp32_path = output_dir / FP32_MODEL
+    with torch.no_grad():
+        # A trailing dict is passed as keyword arguments, so input order doesn't matter
+        torch.onnx.export(transformer, (sample,), str(fp32_path), input_names=input_names,
+                          output_names=output_names, dynamic_axes=dynamic_axes, opset_version=opset)
+    logger.info(f"Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(output_dir / INT8_MODEL), weight_type=QuantType.QInt8)
+        logger.info(f"Quantized weights to int8 in {output_dir / INT8_MODEL}")
+
+    config = {
+        'model_name': model_name,
+        'pooling': model[1].get_pooling_mode_str(),
+        'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+        'max_length': model.max_seq_length,
+        'embedding_dim': model.get_sentence_embedding_dimension(),
+    }
+    with open(output_dir / ONNX_CONFIG, 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+class OnnxEmbedder:
+    """
+    CPU embedding backend on ONNX Runtime, a drop-in for the PyTorch
+    SentenceTransformer in the trainer and the text processor.
+
+    Reads a directory written by export(). Texts are sorted by length before
+    batching, as SentenceTransformer does, so padding stays small.
+    """
+    def __init__(self, model_dir: str, quantized: bool = True, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        with open(self.model_dir / ONNX_CONFIG, 'r') as f:
+            self.config = json.load(f)
+        self.quantized = quantized
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = self.model_dir / (INT8_MODEL if quantized else FP32_MODEL)
+        self.session = ort.InferenceSession(str(model_path), options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        logger.info(f"Loaded ONNX embedding model {model_path}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['embedding_dim']
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.config['pooling'] == 'cls':
+            embeddings = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config['normalize']:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Embeddings of shape (len(texts), dim) as float32"""
+        result = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype='float32')
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start:start + batch_size]
+            encoded = self.tokenizer([texts[i] for i in batch_ids], padding=True, truncation=True,
+                                     max_length=self.config['max_length'], return_tensors='np')
+            feeds = {name: encoded[name].astype('int64') for name in self.input_names}
+            hidden = self.session.run(['last_hidden_state'], feeds)[0]
+            result[batch_ids] = self._pool(hidden, encoded['attention_mask'])
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX with int8 quantization")
+    parser.add_argument("output_dir", type=Path, help="e.g. the RAG artifacts dir + /onnx")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    export(args.model, args.output_dir, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,298 @@
-from fastapi import WebSocket
-from backend.database import get_latest_contact
+# backend/websocket.py
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:  # binary frames are opt-in; JSON text frames always work
+    msgpack = None
+
+try:
+    import orjson
+
+    def _dumps(frame) -> str:
+        return orjson.dumps(frame).decode('utf-8')
+except ImportError:
+    def _dumps(frame) -> str:
+        return json.dumps(frame, separators=(',', ':'), ensure_ascii=False)
+
+# What a map needs to place a marker; everything else is fetched from
+# GET /contacts/{id} when a popup opens
+LIVE_FIELDS = ('id', 'latitude', 'longitude', 'type', 'significance')
+PROJECTABLE_FIELDS = LIVE_FIELDS + ('speed', 'timestamp', 'heading')
+FORMATS = ('json', 'msgpack')
+
+
+class Subscriber:
+    """
+    One connected client: its subscription and a bounded queue of encoded
+    frames waiting to be sent.
+    """
+    def __init__(self, maxsize: int):
+        self.frames = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.bbox: Optional[Tuple[float, float, float, float]] = None
+        self.types: Optional[frozenset] = None
+        self.fields: Tuple[str, ...] = LIVE_FIELDS
+        self.binary = False
+        # Seq the last frame offered to this subscriber ended at
+        self.seq: Optional[int] = None
+        self._ready = asyncio.Event()
+
+    def configure(self, bbox: Optional[Sequence[float]] = None, types: Optional[Iterable[str]] = None,
+                  fields: Optional[Iterable[str]] = None, format: Optional[str] = None):
+        """
+        Set the subscription; arguments left as None keep their current value.
+
+        bbox is (min_lon, min_lat, max_lon, max_lat) and types a list of
+        contact types; an empty bbox or types list clears that filter.
+        Changes apply from the next flush. Raises ValueError for a
+        malformed subscription.
+        """
+        if bbox is not None:
+            if len(bbox) == 0:
+                self.bbox = None
+            elif len(bbox) == 4:
+                self.bbox = tuple(float(v) for v in bbox)
+            else:
+                raise ValueError("bbox must be [min_lon, min_lat, max_lon, max_lat]")
+        if types is not None:
+            if isinstance(types, str):
+                types = [types]
+            self.types = frozenset(types) or None
+        if fields is not None:
+            fields = tuple(fields)
+            unknown = [field for field in fields if field not in PROJECTABLE_FIELDS]
+            if unknown or not fields:
+                raise ValueError(f"fields must be a subset of {list(PROJECTABLE_FIELDS)}")
+            self.fields = fields
+        if format is not None:
+            if format not in FORMATS:
+                raise ValueError(f"format must be one of {list(FORMATS)}")
+            if format == 'msgpack' and msgpack is None:
+                logger.warning("msgpack is not installed; sending JSON text frames instead")
+            self.binary = format == 'msgpack' and msgpack is not None
+
+    @property
+    def key(self) -> tuple:
+        """Subscribers with equal keys receive byte-identical frames"""
+        return (self.fields, self.binary, self.bbox, self.types)
+
+    @property
+    def filtered(self) -> bool:
+        return self.bbox is not None or self.types is not None
+
+    def matches(self, data: dict) -> bool:
+        if self.types is not None and data.get('type') not in self.types:
+            return False
+        if self.bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            try:
+                return (min_lat <= data['latitude'] <= max_lat and
+                        min_lon <= data['longitude'] <= max_lon)
+            except (KeyError, TypeError):
+                return False
+        return True
+
+    def encode(self, batch: list, first_seq: int, seq: int):
+        """
+        One frame for a batch of (seq, event) pairs:
+        {'first_seq': first_seq, 'seq': seq, 'fields': [...], 'rows': [[...], ...]}.
+
+        The frame holds every matching event with first_seq <= seq' <= seq,
+        and first_seq is one past the previous frame's seq, so a client
+        whose last applied seq is below first_seq - 1 has missed frames.
+        Rows are positional, in the order of fields, so per-contact keys and
+        unrequested fields never go on the wire. Returns bytes for MessagePack
+        and str for JSON, matching binary and text WebSocket messages.
+        """
+        fields = self.fields
+        frame = {
+            'first_seq': first_seq,
+            'seq': seq,
+            'fields': fields,
+            'rows': [[data.get(field) for field in fields] for _, data in batch]
+        }
+        if self.binary:
+            return msgpack.packb(frame)
+        return _dumps(frame)
+
+    def offer(self, frame, seq: int):
+        """
+        Enqueue without blocking. A full queue means the client fell behind:
+        its frames are dropped and replaced by a resync message, so the
+        client knows to catch up with /sync/changes instead of silently
+        missing contacts.
+        """
+        if len(self.frames) >= self.maxsize:
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            self.frames.append(_dumps({'resync': True, 'dropped': self.dropped}))
+            logger.warning(f"Subscriber fell behind, dropped {self.dropped} frames and asked it to resync")
+        self.frames.append(frame)
+        self.seq = seq
+        self._ready.set()
+
+    async def next_frame(self):
+        await self._ready.wait()
+        frame = self.frames.popleft()
+        if not self.frames:
+            self._ready.clear()
+        return frame
+
+
+class _BatchColumns:
+    """Positions and type codes of one batch as arrays, so each filter is a few vectorized compares"""
+    def __init__(self, batch: list):
+        self.latitude = np.array([data.get('latitude') for _, data in batch], dtype='float64')
+        self.longitude = np.array([data.get('longitude') for _, data in batch], dtype='float64')
+        self.type_codes: Dict[str, int] = {}
+        self.types = np.array([self.type_codes.setdefault(data.get('type'), len(self.type_codes))
+                               for _, data in batch], dtype='int32')
+
+    def select(self, subscriber: Subscriber) -> np.ndarray:
+        mask = np.ones(len(self.types), dtype=bool)
+        if subscriber.types is not None:
+            wanted = [self.type_codes[t] for t in subscriber.types if t in self.type_codes]
+            mask &= np.isin(self.types, wanted)
+        if subscriber.bbox is not None:
+            # NaN coordinates compare False and drop out
+            min_lon, min_lat, max_lon, max_lat = subscriber.bbox
+            mask &= (self.latitude >= min_lat) & (self.latitude <= max_lat)
+            mask &= (self.longitude >= min_lon) & (self.longitude <= max_lon)
+        return np.flatnonzero(mask)
+
+
+def _insert_sorted(events, event: tuple):
+    """Insert a (seq, data) pair into a seq-ordered deque or list, scanning from the newest end"""
+    i = len(events)
+    while i and events[i - 1][0] > event[0]:
+        i -= 1
+    if len(events) == getattr(events, 'maxlen', None):
+        if i == 0:
+            return  # older than everything a full history keeps
+        events.popleft()
+        i -= 1
+    events.insert(i, event)
+
+
+class ContactHub:
+    """
+    In-process pub/sub for live contacts.
+
+    The ingest path publishes each stored contact once. Published events
+    are batched and flushed every flush_interval seconds, or as soon as
+    batch_size are pending; a flush filters the batch per subscription with
+    vectorized compares and encodes one frame per distinct subscription, so
+    viewers sharing a subscription share the encoded bytes. Every socket
+    owns a Subscriber with its own frame queue, so a slow client only ever
+    delays itself. Recent events are kept in a ring buffer keyed by a
+    monotonically increasing sequence number so reconnecting clients can resume.
+    """
+    def __init__(self, history_size: int = 1000, queue_size: int = 64, batch_size: int = 500,
+                 flush_interval: float = 0.1, last_seq: int = 0):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+        self.last_seq = last_seq
+        self._pending = []
+        self._timer = None
+
+    def publish(self, data: dict, seq: Optional[int] = None) -> int:
+        """
+        Publish an event under seq, e.g. its database change seq, or the
+        next number. Callers should publish in seq order; a late event is
+        still slotted into place so last_seq never goes backwards and the
+        replay history stays sorted.
+        """
+        seq = self.last_seq + 1 if seq is None else seq
+        if seq > self.last_seq:
+            self.last_seq = seq
+            self.history.append((seq, data))
+            self._pending.append((seq, data))
+        else:
+            logger.warning(f"Event {seq} published after {self.last_seq}")
+            _insert_sorted(self.history, (seq, data))
+            _insert_sorted(self._pending, (seq, data))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            try:
+                self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self.flush)
+            except RuntimeError:  # no event loop to wait on, e.g. a synchronous caller
+                self.flush()
+        return seq
+
+    def flush(self):
+        """Turn pending events into frames on every subscriber's queue"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch or not self.subscribers:
+            return
+        seq = batch[-1][0]
+        columns = None
+        selections = {}
+        frames = {}
+        for subscriber in self.subscribers:
+            key = subscriber.key
+            if key not in selections:
+                selected = batch
+                if subscriber.filtered:
+                    columns = columns or _BatchColumns(batch)
+                    selected = [batch[i] for i in columns.select(subscriber)]
+                selections[key] = selected
+            if not selections[key]:
+                continue
+            # Subscribers whose last frames ended together share first_seq, and so the encoded frame
+            first_seq = batch[0][0] if subscriber.seq is None else subscriber.seq + 1
+            if (key, first_seq) not in frames:
+                frames[key, first_seq] = subscriber.encode(selections[key], first_seq, seq)
+            subscriber.offer(frames[key, first_seq], seq)
+
+    def subscribe(self, last_seq: Optional[int] = None, **subscription) -> Subscriber:
+        """
+        Register a client, replaying buffered events newer than last_seq
+        that match its subscription (see Subscriber.configure).
+        """
+        subscriber = Subscriber(self.queue_size)
+        subscriber.configure(**subscription)
+        # Pending events go out with the next flush
+        flushed = self._pending[0][0] - 1 if self._pending else self.last_seq
+        subscriber.seq = flushed
+        if last_seq is not None:
+            subscriber.seq = last_seq
+            missed = [(seq, data) for seq, data in self.history
+                      if last_seq < seq <= flushed and subscriber.matches(data)]
+            for start in range(0, len(missed), self.batch_size):
+                chunk = missed[start:start + self.batch_size]
+                subscriber.offer(subscriber.encode(chunk, subscriber.seq + 1, chunk[-1][0]), chunk[-1][0])
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def oldest_seq(self) -> Optional[int]:
+        return self.history[0][0] if self.history else None
+
+
+async def send_frames(websocket, subscriber: Subscriber):
+    """Per-client sender task: drain the subscriber's frame queue onto the socket"""
     while True:
-        # Fetch the latest contact data from the database
-        data = get_latest_contact()
-        
-        # Send the data to the WebSocket client
-        await websocket.send_json(data)
+        frame = await subscriber.next_frame()
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
@@ -0,0 +1,89 @@
+# benchmarks/bench_batcher.py
+# Run from the code/ directory: python -m benchmarks.bench_batcher --clients 32
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "backend"))
+from embedding_batcher import MicroBatcher  # noqa: E402
+
+
+def simulated_model(call_overhead_ms: float, per_text_ms: float, dim: int = 384):
+    """
+    Stand-in with the cost shape of a CPU transformer: a fixed per-call cost
+    (tokenizer, graph dispatch) plus a per-text cost, both releasing the GIL.
+    """
+    def encode(texts):
+        time.sleep((call_overhead_ms + per_text_ms * len(texts)) / 1000)
+        return np.ones((len(texts), dim), dtype='float32')
+    return encode
+
+
+def run_threads(encode, clients, requests_per_client):
+    def client(i):
+        for j in range(requests_per_client):
+            encode([f"vessel {i} report {j}"])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return clients * requests_per_client / (time.perf_counter() - start)
+
+
+async def run_async(batcher, clients, requests_per_client):
+    async def client(i):
+        for j in range(requests_per_client):
+            await batcher.encode_async([f"vessel {i} report {j}"])
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return clients * requests_per_client / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/sec of single-text encodes: direct vs micro-batched")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="Per client")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--call-overhead-ms", type=float, default=8.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.3)
+    parser.add_argument("--model", help="Use a real SentenceTransformer model instead of the simulated one")
+    args = parser.parse_args()
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model, device='cpu')
+        encode_fn = lambda texts: model.encode(texts, show_progress_bar=False)  # noqa: E731
+    else:
+        encode_fn = simulated_model(args.call_overhead_ms, args.per_text_ms)
+
+    direct_lock = threading.Lock()
+
+    def direct(texts):
+        # One model instance serves one call at a time, as in the processor
+        with direct_lock:
+            return encode_fn(texts)
+
+    direct_rate = run_threads(direct, args.clients, args.requests)
+    batcher = MicroBatcher(encode_fn, args.max_batch, args.max_wait_ms)
+    thread_rate = run_threads(batcher.encode, args.clients, args.requests)
+    thread_stats = batcher.stats()
+    batcher = MicroBatcher(encode_fn, args.max_batch, args.max_wait_ms)
+    async_rate = asyncio.run(run_async(batcher, args.clients, args.requests))
+
+    print(f"{args.clients} clients x {args.requests} single-text requests")
+    print(f"direct, batch size 1:  {direct_rate:,.0f} requests/sec")
+    print(f"batched, threads:      {thread_rate:,.0f} requests/sec  ({thread_rate / direct_rate:.1f}x)")
+    print(f"batched, asyncio:      {async_rate:,.0f} requests/sec  ({async_rate / direct_rate:.1f}x)")
+    print(f"thread run: {json.dumps({k: thread_stats[k] for k in ('batches', 'mean_batch_size', 'queue_wait_ms')})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_bulk.py
+# Run from the code/ directory: python -m benchmarks.bench_bulk --contacts 10000
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+from benchmarks.bench_ingest import make_contacts
+
+
+def markdown_report(contacts):
+    """The client's legacy encoding: one indented ```json block per contact"""
+    parts = ["# Maritime Contact Report\n\n"]
+    for i, contact in enumerate(contacts, 1):
+        parts.append(f"## Contact {i}\n\n```json\n{json.dumps(contact, indent=2)}\n```\n\n")
+    return "".join(parts)
+
+
+def via_process_report(client, contacts):
+    start = time.perf_counter()
+    body = markdown_report(contacts).encode('utf-8')
+    job_id = client.post("/process_report/", files={'file': ('report.md', body, 'text/markdown')}).json()['job_id']
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.005)
+    assert job['result']['accepted_count'] == len(contacts), job
+    return time.perf_counter() - start, len(body)
+
+
+def via_bulk(client, contacts, ndjson):
+    start = time.perf_counter()
+    if ndjson:
+        body = "\n".join(json.dumps(c, separators=(',', ':')) for c in contacts).encode('utf-8')
+        content_type = 'application/x-ndjson'
+    else:
+        body = json.dumps(contacts, separators=(',', ':')).encode('utf-8')
+        content_type = 'application/json'
+    result = client.post("/contacts/bulk", content=body, headers={'Content-Type': content_type}).json()
+    assert result['accepted_count'] == len(contacts), result
+    return time.perf_counter() - start, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contacts/sec: markdown /process_report/ vs JSON /contacts/bulk")
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # The app opens maritime.db in the working directory
+    os.chdir(tempfile.mkdtemp())
+    from backend.app import app
+    contacts = make_contacts(args.contacts)
+    runs = {
+        'markdown /process_report/': lambda c: via_process_report(c, contacts),
+        'JSON array /contacts/bulk': lambda c: via_bulk(c, contacts, ndjson=False),
+        'NDJSON /contacts/bulk': lambda c: via_bulk(c, contacts, ndjson=True),
+    }
+    with TestClient(app) as client:
+        print(f"{args.contacts} contacts per request, best of {args.repeats} (client encode to stored)")
+        baseline = None
+        for name, run in runs.items():
+            seconds, size = min(run(client) for _ in range(args.repeats))
+            rate = args.contacts / seconds
+            baseline = baseline or rate
+            print(f"{name:<26} {rate:>9,.0f} contacts/sec  {size / 1024:>7,.0f} KB  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
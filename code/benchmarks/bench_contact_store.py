@@ -0,0 +1,146 @@
+# benchmarks/bench_contact_store.py
+# Run from the code/ directory: python -m benchmarks.bench_contact_store --contacts 1000000
+import argparse
+import math
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from backend import database
+from backend.contact_store import EARTH_RADIUS_NM, STORE_FIELDS, ContactStore
+
+NOW = datetime(2024, 10, 22, 12, 0, tzinfo=timezone.utc)
+CENTER = (12.5, 65.0)
+RADIUS_NM = 50
+HOURS = 6
+
+
+def make_contacts(n, seed=42):
+    """Contacts over the Arabian Sea and Bay of Bengal, timestamped over the last 48h"""
+    rng = random.Random(seed)
+    return [
+        {
+            'latitude': rng.uniform(-10, 25),
+            'longitude': rng.uniform(50, 95),
+            'speed': rng.uniform(0, 30),
+            'heading': rng.uniform(0, 360),
+            'type': rng.choice(['tanker', 'fishing vessel', 'submarine', 'cargo', 'unknown']),
+            'timestamp': (NOW - timedelta(seconds=rng.randrange(48 * 3600))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'significance': rng.choice(['routine', 'routine', 'suspicious', 'threatening'])
+        }
+        for _ in range(n)
+    ]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(a))
+
+
+def cutoff_iso():
+    return (NOW - timedelta(hours=HOURS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def sqlite_python_loop():
+    """Today's path: fetch every contact as a dict, filter in Python"""
+    cutoff = cutoff_iso()
+    return [c for c in database.get_all_contacts()
+            if c['significance'] == 'suspicious' and c['timestamp'] >= cutoff
+            and haversine(CENTER[0], CENTER[1], c['latitude'], c['longitude']) <= RADIUS_NM]
+
+
+def sqlite_rtree():
+    """Best SQLite can do: R*Tree box and SQL filters, haversine on the candidates in Python"""
+    dlat = RADIUS_NM / 60
+    dlon = dlat / math.cos(math.radians(abs(CENTER[0]) + dlat))
+    conn = sqlite3.connect(database.DB_PATH)
+    rows = conn.execute('''
+        SELECT r.id, r.latitude, r.longitude FROM reports_rtree t JOIN reports r ON r.id = t.id
+        WHERE t.min_lat >= ? AND t.max_lat <= ? AND t.min_lon >= ? AND t.max_lon <= ?
+        AND r.significance = 'suspicious' AND r.timestamp >= ?
+    ''', (CENTER[0] - dlat, CENTER[0] + dlat, CENTER[1] - dlon, CENTER[1] + dlon, cutoff_iso())).fetchall()
+    conn.close()
+    return [row for row in rows if haversine(CENTER[0], CENTER[1], row[1], row[2]) <= RADIUS_NM]
+
+
+def sqlite_group_by():
+    conn = sqlite3.connect(database.DB_PATH)
+    rows = conn.execute('''
+        SELECT type, COUNT(*) FROM reports
+        WHERE significance = 'suspicious' AND timestamp >= ? AND speed >= 10 GROUP BY type
+    ''', (cutoff_iso(),)).fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def timed(fn, repeats):
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar contact store vs SQLite for analytics reads")
+    parser.add_argument("--contacts", type=int, default=1000000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = str(Path(tmp) / "maritime.db")
+        database.create_database()
+        start = time.perf_counter()
+        for offset in range(0, args.contacts, 50000):
+            database.store_many(make_contacts(min(50000, args.contacts - offset), seed=offset))
+        print(f"Stored {args.contacts:,} contacts in {time.perf_counter() - start:.1f}s")
+
+        store = ContactStore()
+        start = time.perf_counter()
+        store.load(database.iter_contacts(STORE_FIELDS))
+        print(f"Loaded contact store in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        store.select(near=CENTER, radius_nm=1)
+        nbytes = sum(getattr(store, name).nbytes for name in ContactStore._COLUMNS)
+        nbytes += store._lat_order.nbytes + store._lat_sorted.nbytes
+        print(f"Latitude index built by the first spatial query in {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"{nbytes / 2**20:.0f} MB of arrays")
+
+        now = NOW.timestamp()
+        suspicious_nearby = lambda: store.select(near=CENTER, radius_nm=RADIUS_NM, significance=['suspicious'],
+                                                 within_hours=HOURS, now=now)
+        by_type = lambda: store.counts(store.select(significance=['suspicious'], within_hours=HOURS,
+                                                    min_speed=10, now=now))
+        runs = [
+            (f"suspicious within {RADIUS_NM} nm, last {HOURS}h", [
+                ('SQLite rows + Python loop', sqlite_python_loop, 1),
+                ('SQLite R*Tree + Python haversine', sqlite_rtree, args.repeats),
+                ('contact store', suspicious_nearby, args.repeats),
+            ]),
+            ("suspicious, last 6h, >= 10 kn, count by type", [
+                ('SQLite GROUP BY', sqlite_group_by, args.repeats),
+                ('contact store', by_type, args.repeats),
+            ]),
+            ("latest contact", [
+                ('get_latest_contact', lambda: [database.get_latest_contact()], args.repeats),
+                ('contact store', lambda: [store.latest()], args.repeats),
+            ]),
+        ]
+        for title, variants in runs:
+            print(title)
+            baseline = None
+            for name, fn, repeats in variants:
+                seconds, result = timed(fn, repeats)
+                baseline = baseline or seconds
+                size = len(result)
+                print(f"  {name:<34} {seconds * 1000:>10,.2f} ms  ({baseline / seconds:,.0f}x, {size} results)")
+
+
+if __name__ == "__main__":
+    main()
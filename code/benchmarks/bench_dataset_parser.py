@@ -0,0 +1,60 @@
+# benchmarks/bench_dataset_parser.py
+# Run from the code/ directory: python -m benchmarks.bench_dataset_parser
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "rag"))
+from Dataset_parser import parse_corpus_incremental, parse_markdown_to_json  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Files/sec of the corpus parser: serial, parallel, incremental")
+    parser.add_argument("--data-dir", type=Path, default=CODE_DIR / "rag" / "naval_data")
+    parser.add_argument("--copies", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    work_dir = Path(tempfile.mkdtemp())
+    corpus = work_dir / "corpus"
+    corpus.mkdir()
+    for i in range(args.copies):
+        for path in sorted(args.data_dir.glob("*.md")):
+            shutil.copy(path, corpus / f"{i:04d}_{path.name}")
+    files = sorted(corpus.glob("*.md"))
+
+    start = time.perf_counter()
+    serial = parse_markdown_to_json(files, workers=1)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = parse_markdown_to_json(files, workers=args.workers)
+    parallel_time = time.perf_counter() - start
+    assert parallel == serial
+
+    output, cache_dir = work_dir / "parsed.jsonl", work_dir / "cache"
+    start = time.perf_counter()
+    parse_corpus_incremental(files, output, cache_dir, args.workers)
+    cold_time = time.perf_counter() - start
+    start = time.perf_counter()
+    parse_corpus_incremental(files, output, cache_dir, args.workers)
+    warm_time = time.perf_counter() - start
+
+    shutil.rmtree(work_dir)
+    n = len(files)
+    print(f"{n} files, {len(serial)} documents, {args.workers} workers")
+    print(f"serial:                 {n / serial_time:,.0f} files/sec")
+    print(f"parallel:               {n / parallel_time:,.0f} files/sec  ({serial_time / parallel_time:.1f}x)")
+    print(f"incremental, cold:      {n / cold_time:,.0f} files/sec")
+    print(f"incremental, unchanged: {n / warm_time:,.0f} files/sec  ({serial_time / warm_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
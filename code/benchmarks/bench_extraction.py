@@ -0,0 +1,43 @@
+# benchmarks/bench_extraction.py
+# Run from the code/ directory: python -m benchmarks.bench_extraction
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "backend"))
+from ocr_infer import MaritimeTextProcessor  # noqa: E402
+
+
+def measure(processor, texts, repeats):
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            processor.extract_maritime_info(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-report extraction latency with and without retrieval")
+    parser.add_argument("--model-dir", type=Path, default=CODE_DIR / "rag" / "maritime_rag")
+    parser.add_argument("--data-dir", type=Path, default=CODE_DIR / "rag" / "naval_data")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [path.read_text(encoding='utf-8') for path in sorted(args.data_dir.glob("*.md"))]
+    processor = MaritimeTextProcessor(str(args.model_dir))
+    for retrieval in (False, True):
+        processor.retrieval = retrieval
+        p50, p95 = measure(processor, texts, args.repeats)
+        mode = "retrieval" if retrieval else "regex-only"
+        print(f"{mode:>10}: p50={p50:.1f} ms p95={p95:.1f} ms over {len(texts)} reports x {args.repeats}")
+    print(f"embedding cache: {processor.embedding_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
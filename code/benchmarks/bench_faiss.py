@@ -0,0 +1,81 @@
+# benchmarks/bench_faiss.py
+# Run from the code/ directory: python -m benchmarks.bench_faiss --k 10
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# rag_train imports its backend helpers as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from rag.rag_train import DEFAULT_INDEX_PARAMS, INDEX_TYPES, build_index
+from document_store import open_documents
+
+MODEL_DIR = Path(__file__).resolve().parent.parent / "rag" / "maritime_rag"
+
+
+def load_vectors(model_dir: Path, scale: int, seed: int = 0) -> np.ndarray:
+    """Vectors from the trained flat index, tiled with noise up to `scale` copies"""
+    flat = faiss.read_index(str(model_dir / "maritime.index"))
+    base = flat.reconstruct_n(0, flat.ntotal).astype('float32')
+    assert len(open_documents(model_dir)) == flat.ntotal
+    if scale <= 1:
+        return base
+    rng = np.random.default_rng(seed)
+    copies = [base] + [base + rng.normal(0, 0.02, base.shape).astype('float32') for _ in range(scale - 1)]
+    return np.vstack(copies)
+
+
+def timed_search(index, queries, k):
+    start = time.perf_counter()
+    _, indices = index.search(queries, k)
+    return indices, (time.perf_counter() - start) / len(queries)
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency of ANN indexes against the flat index")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=1, help="Tile the corpus to simulate a larger one")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.model_dir, args.scale)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)]
+    queries = queries + rng.normal(0, 0.01, queries.shape).astype('float32')
+    dim = vectors.shape[1]
+    print(f"corpus: {len(vectors)} vectors x {dim} dims, {len(queries)} queries, k={args.k}")
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    truth, flat_latency = timed_search(flat, queries, args.k)
+
+    for index_type in INDEX_TYPES:
+        params = dict(DEFAULT_INDEX_PARAMS[index_type])
+        if index_type == 'ivfpq':
+            # pq_m must divide the embedding dimension and have enough training points
+            params['pq_bits'] = min(params['pq_bits'], max(1, int(np.log2(len(vectors))) - 1))
+        if 'nlist' in params:
+            params['nlist'] = min(params['nlist'], max(1, len(vectors) // 39))
+        index = build_index(index_type, dim, params, len(vectors))
+        start = time.perf_counter()
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        build_time = time.perf_counter() - start
+        found, latency = timed_search(index, queries, args.k)
+        print(f"{index_type:>6}: recall@{args.k}={recall_at_k(truth, found):.3f} "
+              f"latency={latency * 1e3:.3f} ms/query "
+              f"(flat {flat_latency * 1e3:.3f} ms) build={build_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_hybrid.py
+# Run from the code/ directory: python -m benchmarks.bench_hybrid
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "backend"))
+from document_store import open_documents  # noqa: E402
+from lexical_index import LEXICAL_NAME, LexicalIndex  # noqa: E402
+
+
+def identifier_queries(documents):
+    """(identifier, doc_id) pairs: message DTGs and originators, zone names"""
+    queries = []
+    for doc_id, doc in enumerate(documents):
+        if doc is None:
+            continue
+        metadata = doc.get('metadata', {})
+        for key in ('date_time', 'from'):
+            if metadata.get(key):
+                queries.append((metadata[key], doc_id))
+        if doc.get('name'):
+            queries.append((doc['name'], doc_id))
+    return queries
+
+
+def evaluate(name, search, queries, k):
+    """Recall@k of the source document and mean latency per query"""
+    found = 0
+    start = time.perf_counter()
+    for identifier, doc_id in queries:
+        if doc_id in search(identifier)[:k]:
+            found += 1
+    latency_us = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"{name:<16} recall@{k} {found / len(queries):.3f}   {latency_us:,.0f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of exact-identifier queries: lexical vs vector vs hybrid")
+    parser.add_argument("--model-dir", type=Path, default=CODE_DIR / "rag" / "maritime_rag")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lexical-only", action="store_true",
+                        help="Skip the vector and hybrid runs (no FAISS or embedding model needed)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    documents = open_documents(args.model_dir)
+    lexical_path = args.model_dir / LEXICAL_NAME
+    lexical = LexicalIndex.load(lexical_path) if lexical_path.exists() else LexicalIndex.build(documents)
+    queries = identifier_queries(documents)
+    print(f"{len(queries)} identifier queries over {len(documents)} documents")
+
+    evaluate("exact lookup", lambda q: lexical.lookup(q, documents), queries, args.k)
+    evaluate("bm25", lambda q: [doc_id for doc_id, _ in lexical.search(q, args.k)], queries, args.k)
+    if args.lexical_only:
+        return
+
+    from ocr_infer import MaritimeTextProcessor
+    processor = MaritimeTextProcessor(str(args.model_dir), retrieval=True)
+    processor.retrieval_mode = 'vector'
+    processor.warm_up(background=False)
+    # Encode every query once so both runs measure search, not the first model call
+    processor.embedding_cache.encode([q for q, _ in queries], processor._encode)
+    evaluate("vector", lambda q: [hit['id'] for hit in processor.retrieve([q], args.k)[0]], queries, args.k)
+    evaluate("hybrid (rrf)", lambda q: [hit['id'] for hit in processor.hybrid_retrieve([q], args.k)[0]],
+             queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
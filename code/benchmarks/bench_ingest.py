@@ -0,0 +1,59 @@
+# benchmarks/bench_ingest.py
+# Run from the code/ directory: python -m benchmarks.bench_ingest --contacts 500
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import backend.database as database
+
+
+def make_contacts(n):
+    rng = random.Random(42)
+    return [
+        {
+            'latitude': rng.uniform(-10, 25),
+            'longitude': rng.uniform(50, 95),
+            'speed': rng.uniform(0, 30),
+            'type': rng.choice(['tanker', 'fishing vessel', 'submarine', 'unknown']),
+            'timestamp': '2024-10-20T05:30:00Z',
+            'significance': rng.choice(['routine', 'suspicious'])
+        }
+        for _ in range(n)
+    ]
+
+
+def bench_per_row(contacts):
+    start = time.perf_counter()
+    for contact in contacts:
+        database.store_in_database(contact)
+    return time.perf_counter() - start
+
+
+def bench_batched(contacts):
+    writer = database.ContactWriter()
+    start = time.perf_counter()
+    writer.store_many(contacts)
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and batched contact ingest")
+    parser.add_argument("--contacts", type=int, default=500)
+    args = parser.parse_args()
+
+    contacts = make_contacts(args.contacts)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, fn in [('per-row', bench_per_row), ('batched', bench_batched)]:
+            database.DB_PATH = str(Path(tmp) / f"{name}.db")
+            database.create_database()
+            elapsed = fn(contacts)
+            print(f"{name:>8}: {len(contacts)} contacts in {elapsed:.3f}s "
+                  f"({len(contacts) / elapsed:,.0f} contacts/sec)")
+
+
+if __name__ == "__main__":
+    main()
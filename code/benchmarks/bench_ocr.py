@@ -0,0 +1,57 @@
+# benchmarks/bench_ocr.py
+# Run from the code/ directory: python -m benchmarks.bench_ocr --copies 8
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "backend"))
+from ocr_batch import OCRConfig, ocr_batch  # noqa: E402
+
+
+def serial_baseline(paths):
+    """The original path: one full-resolution image_to_string call per page"""
+    import pytesseract
+    from PIL import Image
+    for path in paths:
+        pytesseract.image_to_string(Image.open(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR throughput in pages/min, serial vs batch")
+    parser.add_argument("--images", type=Path, nargs="*",
+                        default=sorted((CODE_DIR / "rag").glob("*.png")))
+    parser.add_argument("--copies", type=int, default=4, help="Replicate the input pages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.copies):
+            for image in args.images:
+                target = Path(tmp) / f"{i}_{image.name}"
+                shutil.copy(image, target)
+                paths.append(str(target))
+
+        start = time.perf_counter()
+        serial_baseline(paths)
+        serial = len(paths) / (time.perf_counter() - start) * 60
+
+        start = time.perf_counter()
+        first = None
+        for _ in ocr_batch(paths, OCRConfig(), args.workers):
+            if first is None:
+                first = time.perf_counter() - start
+        batch = len(paths) / (time.perf_counter() - start) * 60
+
+    print(f"{len(paths)} pages, {args.workers} workers")
+    print(f"serial: {serial:.1f} pages/min")
+    print(f"batch:  {batch:.1f} pages/min ({batch / serial:.1f}x), first page after {first:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_onnx.py
+# Run from the code/ directory: python -m benchmarks.bench_onnx
+# Needs sentence-transformers, onnxruntime and faiss; exports the ONNX model on first run.
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(CODE_DIR / "backend"))
+from onnx_embedder import ONNX_CONFIG, OnnxEmbedder, export  # noqa: E402
+
+MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+
+def report_segments(data_dir: Path):
+    """Query texts: the same segments extract_maritime_info retrieves for"""
+    texts = [path.read_text(encoding='utf-8') for path in sorted(data_dir.glob("*.md"))]
+    return [s.strip() for text in texts for s in re.split(r'(?:\d+\.\s+|\n\s*\n)', text) if len(s.strip()) > 20]
+
+
+def throughput(encode, texts, batch_size, repeats):
+    encode(texts[:batch_size], batch_size)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode(texts, batch_size)
+    return len(texts) * repeats / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-k overlap and sentences/sec: PyTorch fp32 vs ONNX fp32 vs ONNX int8")
+    parser.add_argument("--model-dir", type=Path, default=CODE_DIR / "rag" / "maritime_rag")
+    parser.add_argument("--data-dir", type=Path, default=CODE_DIR / "rag" / "naval_data")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="1,8,32,64")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    onnx_dir = args.model_dir / "onnx"
+    if not (onnx_dir / ONNX_CONFIG).exists():
+        export(MODEL_NAME, onnx_dir)
+
+    from sentence_transformers import SentenceTransformer
+    torch_model = SentenceTransformer(MODEL_NAME, device='cpu')
+    backends = {
+        'torch fp32': lambda texts, bs: torch_model.encode(texts, batch_size=bs, show_progress_bar=False),
+        'onnx fp32': OnnxEmbedder(str(onnx_dir), quantized=False).encode,
+        'onnx int8': OnnxEmbedder(str(onnx_dir), quantized=True).encode,
+    }
+
+    queries = report_segments(args.data_dir)[:args.queries]
+    index = faiss.read_index(str(args.model_dir / "maritime.index"))
+    reference = np.asarray(backends['torch fp32'](queries, 32), dtype='float32')
+    _, truth = index.search(reference, args.k)
+    print(f"{len(queries)} queries against the fp32 index ({index.ntotal} vectors), k={args.k}")
+    for name, encode in backends.items():
+        embeddings = np.asarray(encode(queries, 32), dtype='float32')
+        _, found = index.search(embeddings, args.k)
+        overlap = np.mean([len(set(t) & set(f)) / args.k for t, f in zip(truth, found)])
+        cosine = np.mean(np.sum(embeddings * reference, axis=1) /
+                         (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1)))
+        print(f"{name:<11} top-{args.k} overlap {overlap:.3f}   mean cosine to fp32 {cosine:.4f}")
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    print("\nsentences/sec")
+    print(f"{'batch':<11}" + "".join(f"{b:>10}" for b in batch_sizes))
+    for name, encode in backends.items():
+        rates = [throughput(encode, queries, b, args.repeats) for b in batch_sizes]
+        print(f"{name:<11}" + "".join(f"{r:>10,.0f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_startup.py
+# Run from the code/ directory: python -m benchmarks.bench_startup
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# Each scenario runs in a fresh interpreter so import costs are not shared
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {backend!r})
+from ocr_infer import MaritimeTextProcessor
+processor = MaritimeTextProcessor({model_dir!r}, retrieval={retrieval})
+if {warm}:
+    processor.warm_up(background=False)
+processor.extract_maritime_info("Unidentified vessel at latitude 12.34 N, longitude 45.67 E, 12 knots")
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'torch_loaded': 'torch' in sys.modules
+}}))
+"""
+
+
+def run(model_dir: Path, retrieval: bool, warm: bool) -> dict:
+    code = CHILD.format(backend=str(CODE_DIR / "backend"), model_dir=str(model_dir),
+                        retrieval=retrieval, warm=warm)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start time and peak RSS of MaritimeTextProcessor")
+    parser.add_argument("--model-dir", type=Path, default=CODE_DIR / "rag" / "maritime_rag")
+    args = parser.parse_args()
+
+    for name, retrieval, warm in [("regex-only", False, False), ("retrieval", True, True)]:
+        result = run(args.model_dir, retrieval, warm)
+        print(f"{name:>10}: first result after {result['seconds']:.2f}s, "
+              f"peak RSS {result['max_rss_mb']:.0f} MB, torch imported: {result['torch_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_sync.py
+# Run from the code/ directory: python -m benchmarks.bench_sync --contacts 100000 --clients 50
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from benchmarks.bench_ingest import make_contacts
+
+
+def storm(client, clients, request):
+    """Every client issues one request at once; returns (seconds, total response bytes)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        sizes = list(pool.map(lambda _: request(client), range(clients)))
+    return time.perf_counter() - start, sum(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconnect storm: full reload vs viewport page + delta sync")
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--missed", type=int, default=500, help="Changes each reconnecting client missed")
+    parser.add_argument("--bbox", default="66,18,69,21", help="Viewport the map loads at detail zoom")
+    args = parser.parse_args()
+
+    # The app opens maritime.db in the working directory
+    os.chdir(tempfile.mkdtemp())
+    from backend import database
+    from backend.app import app
+    database.create_database()
+    contacts = make_contacts(args.contacts)
+    for start in range(0, len(contacts), 5000):
+        database.store_many(contacts[start:start + 5000])
+    seq = database.latest_change_seq()
+
+    with TestClient(app) as client:
+        def full_reload(c):
+            return len(c.get("/initial_contacts").content)
+
+        def viewport(c):
+            return len(c.get(f"/contacts?bbox={args.bbox}&limit=2000").content)
+
+        def changes(c):
+            return len(c.get(f"/sync/changes?since={seq - args.missed}").content)
+
+        print(f"{args.contacts} contacts, {args.clients} clients reconnecting at once")
+        runs = [
+            ('GET /initial_contacts', full_reload),
+            ('/contacts viewport page', viewport),
+            (f'/sync/changes ({args.missed} missed)', changes),
+        ]
+        for name, request in runs:
+            seconds, size = storm(client, args.clients, request)
+            print(f"{name:<32} {seconds:>7.2f}s  {args.clients / seconds:>8,.0f} req/s  "
+                  f"{size / args.clients / 1024:>9,.1f} KB per client")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/bench_ws.py
+# Run from the code/ directory: python -m benchmarks.bench_ws --viewers 1000
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+
+from backend.websocket import ContactHub, msgpack, send_frames
+from benchmarks.bench_ingest import make_contacts
+
+
+class CountingSocket:
+    """Stands in for a WebSocket: counts payload bytes, optionally permessage-deflate compressed"""
+    def __init__(self, deflate=False):
+        # Raw deflate with context takeover and a sync flush per message, as permessage-deflate does
+        self.compressor = zlib.compressobj(wbits=-15) if deflate else None
+        self.bytes = 0
+        self.messages = 0
+
+    async def send_text(self, text):
+        await self.send_bytes(text.encode('utf-8'))
+
+    async def send_bytes(self, data):
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.bytes += len(data)
+        self.messages += 1
+
+
+class LegacyHub:
+    """The previous protocol: every full contact dict fanned out per event and sent as its own send_json"""
+    def __init__(self):
+        self.queues = []
+        self.seq = 0
+
+    def subscribe(self, **subscription):
+        queue = asyncio.Queue(maxsize=256)
+        self.queues.append(queue)
+        return queue
+
+    def publish(self, data):
+        self.seq += 1
+        for queue in self.queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((self.seq, data))
+
+    def flush(self):
+        pass
+
+    @staticmethod
+    async def send_events(socket, queue):
+        while True:
+            seq, data = await queue.get()
+            await socket.send_text(json.dumps({**data, 'seq': seq}, separators=(',', ':'), ensure_ascii=False))
+
+
+def make_events(n):
+    rng = random.Random(7)
+    events = []
+    for i, contact in enumerate(make_contacts(n), 1):
+        events.append({
+            'id': i,
+            **contact,
+            'heading': rng.uniform(0, 360),
+            'confidence': 0.9,
+            'description': ("Vessel observed on a steady course with no AIS transmission; "
+                            "visual identification pending, continuing to monitor. ") * 2
+        })
+    return events
+
+
+def random_viewport(rng):
+    """A viewport a quarter of the synthetic area (lat -10..25, lon 50..95)"""
+    lon = rng.uniform(50, 72.5)
+    lat = rng.uniform(-10, 7.5)
+    return [lon, lat, lon + 22.5, lat + 17.5]
+
+
+async def run(mode, events, viewers, tick, per_tick, flush_interval):
+    rng = random.Random(1)
+    hub = LegacyHub() if mode == 'legacy' else ContactHub(flush_interval=flush_interval)
+    sender = LegacyHub.send_events if mode == 'legacy' else send_frames
+    sockets, tasks, subscribers = [], [], []
+    for _ in range(viewers):
+        subscriber = hub.subscribe(
+            bbox=random_viewport(rng) if mode == 'json+bbox' else None,
+            format='msgpack' if mode.startswith('msgpack') else 'json'
+        )
+        socket = CountingSocket(deflate=mode.endswith('deflate'))
+        sockets.append(socket)
+        subscribers.append(subscriber)
+        tasks.append(asyncio.create_task(sender(socket, subscriber)))
+
+    cpu_start = time.process_time()
+    ticks = 0
+    for start in range(0, len(events), per_tick):
+        for data in events[start:start + per_tick]:
+            hub.publish(data)
+        ticks += 1
+        await asyncio.sleep(tick)
+    # Flush the last partial batch and wait until every client has drained
+    hub.flush()
+    while any(s.qsize() if mode == 'legacy' else s.frames for s in subscribers):
+        await asyncio.sleep(0.01)
+    cpu = time.process_time() - cpu_start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        'feed_seconds': ticks * tick,
+        'cpu': cpu,
+        'bytes': sum(s.bytes for s in sockets),
+        'messages': sum(s.messages for s in sockets)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live update bytes/sec per client and broadcast CPU at N viewers")
+    parser.add_argument("--viewers", type=int, default=1000)
+    parser.add_argument("--rate", type=int, default=200, help="Contacts published per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--flush-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    tick = 0.1
+    per_tick = max(1, int(args.rate * tick))
+    events = make_events(int(args.rate * args.seconds))
+    modes = ['legacy', 'json', 'json+deflate', 'json+bbox']
+    if msgpack is not None:
+        modes[3:3] = ['msgpack', 'msgpack+deflate']
+    print(f"{args.viewers} viewers, {args.rate} contacts/sec for {args.seconds:g}s, "
+          f"{args.flush_ms:g} ms flush (CPU above 100% means the loop cannot keep up)")
+    baseline = None
+    for mode in modes:
+        stats = asyncio.run(run(mode, events, args.viewers, tick, per_tick, args.flush_ms / 1000))
+        per_client = stats['bytes'] / args.viewers / stats['feed_seconds']
+        baseline = baseline or per_client
+        print(f"{mode:<16} {per_client / 1024:>8,.1f} KB/s per client  "
+              f"{stats['messages'] / args.viewers / stats['feed_seconds']:>6,.0f} msgs/s  "
+              f"CPU {stats['cpu'] / stats['feed_seconds']:>6.0%} of a core  "
+              f"({baseline / per_client:.1f}x fewer bytes)")
+
+
+if __name__ == "__main__":
+    main()
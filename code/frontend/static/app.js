@@ -7,40 +7,65 @@ let socket = null;
 let reconnectAttempts = 0;
 const MAX_RECONNECT_ATTEMPTS = 5;
 const RECONNECT_DELAY = 5000;
-let markers = []; // Array to store markers
+let markers = []; // Cluster markers
+let contactMarkers = new Map(); // Contact id -> marker
+let lastSeq = null; // Change sequence the viewport's markers are complete up to
+let catchingUp = false; // Live frames may run ahead of lastSeq while /sync/changes is paged in
+let resyncPending = false; // The server dropped frames during a catch-up; page again before trusting liveSeq
+let liveSeq = null; // Highest seq seen in a live frame
 
-function clearAllMarkers() {
+function clearClusterMarkers() {
     markers.forEach(marker => map.removeLayer(marker));
     markers = [];
 }
 
+function clearAllMarkers() {
+    clearClusterMarkers();
+    contactMarkers.forEach(marker => map.removeLayer(marker));
+    contactMarkers.clear();
+}
+
 function addMarkerToMap(contact) {
     if (contact.latitude && contact.longitude) {
-        const marker = L.marker([parseFloat(contact.latitude), parseFloat(contact.longitude)])
-            .bindPopup(createPopupContent(contact));
-        markers.push(marker);
+        const position = [parseFloat(contact.latitude), parseFloat(contact.longitude)];
+        const existing = contactMarkers.get(contact.id);
+        if (existing) {
+            existing.setLatLng(position);
+            return;
+        }
+        const marker = L.marker(position)
+            .bindPopup('<div class="contact-popup">Loading...</div>');
+        // Viewport pages and live rows only carry what places the marker; the full
+        // record is fetched the first time its popup opens
+        marker.once('popupopen', () => loadContactDetails(marker, contact.id));
+        contactMarkers.set(contact.id, marker);
         marker.addTo(map);
-        
-        // Center map on the latest marker
-        map.setView([contact.latitude, contact.longitude], map.getZoom());
     }
 }
 
-function addMarkersToMap(contacts) {
-    clearAllMarkers();
-    contacts.forEach(contact => {
-        if (contact.latitude && contact.longitude) {
-            addMarkerToMap(contact);
-        }
-    });
-   
-    
-    if (markers.length > 0) {
-        const group = new L.featureGroup(markers);
-        map.fitBounds(group.getBounds().pad(0.1));
+function removeMarker(contactId) {
+    const marker = contactMarkers.get(contactId);
+    if (marker) {
+        map.removeLayer(marker);
+        contactMarkers.delete(contactId);
     }
 }
 
+function loadContactDetails(marker, contactId) {
+    fetch(`http://localhost:8000/contacts/${contactId}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(contact => marker.setPopupContent(createPopupContent(contact)))
+        .catch(error => {
+            console.error("Error fetching contact details:", error);
+            marker.setPopupContent('<div class="contact-popup">Details unavailable</div>');
+        });
+}
+
 function createPopupContent(contact) {
    
     const timestamp = contact.timestamp ? new Date(contact.timestamp).toLocaleString() : 'N/A';
@@ -63,34 +88,161 @@ function createPopupContent(contact) {
     `;
 }
 
+// Change pages and live frames share one shape: {seq, fields, rows} with
+// one positional row per contact; live frames add first_seq.
+function toContact(fields, row) {
+    const contact = {};
+    fields.forEach((field, i) => { contact[field] = row[i]; });
+    return contact;
+}
+
+// Only what is on screen is kept: markers at detail zoom, clusters below it.
+// Returns the received contacts.
+function applyRows(fields, rows) {
+    const received = rows.map(row => toContact(fields, row));
+    if (map.getZoom() < DETAIL_ZOOM) {
+        if (received.some(inView)) {
+            scheduleClusterRefresh();
+        }
+    } else {
+        received.forEach(contact => {
+            if (inView(contact)) {
+                addMarkerToMap(contact);
+            } else {
+                removeMarker(contact.id);
+            }
+        });
+    }
+    return received;
+}
+
+function inView(contact) {
+    return contact.latitude != null && contact.longitude != null &&
+        map.getBounds().contains([contact.latitude, contact.longitude]);
+}
+
+function fetchJson(url) {
+    return fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+// A viewport page reflects every change up to seq. Changes after it may be
+// missing, e.g. ones made before the socket's bbox followed the new viewport.
+function syncFrom(seq) {
+    lastSeq = lastSeq === null ? seq : Math.min(lastSeq, seq);
+    catchUp();
+}
+
+function catchUp() {
+    if (lastSeq === null) {
+        // Nothing loaded at detail zoom yet; the first viewport page syncs
+        return;
+    }
+    if (catchingUp) {
+        resyncPending = true;
+        return;
+    }
+    catchingUp = true;
+    resyncPending = false;
+    const nextPage = () => fetchJson(`http://localhost:8000/sync/changes?since=${lastSeq}`)
+        .then(changes => {
+            if (changes.reset) {
+                // Our seq is from a replaced database; reload the viewport, which syncs again
+                lastSeq = null;
+                liveSeq = null;
+                loadInitialContacts();
+                return null;
+            }
+            applyRows(changes.fields, changes.rows);
+            changes.deleted.forEach(removeMarker);
+            lastSeq = changes.seq;
+            if (!changes.more && resyncPending) {
+                // Live frames were dropped meanwhile, possibly after the page we just read
+                resyncPending = false;
+                return nextPage();
+            }
+            return changes.more ? nextPage() : null;
+        });
+    nextPage()
+        .then(() => {
+            // Frames that arrived meanwhile are already applied
+            if (lastSeq !== null) {
+                lastSeq = Math.max(lastSeq, liveSeq ?? lastSeq);
+            }
+        })
+        .catch(error => console.error("Error syncing changes:", error))
+        .finally(() => {
+            catchingUp = false;
+            // Asked for again after our last page, e.g. by a viewport reload
+            if (resyncPending) {
+                catchUp();
+            }
+        });
+}
+
+function subscribeToViewport() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+        const b = map.getBounds();
+        socket.send(JSON.stringify({
+            subscribe: { bbox: [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()] }
+        }));
+    }
+}
+
 function connectWebSocket() {
     if (socket && socket.readyState === WebSocket.OPEN) {
         console.log("WebSocket is already connected");
         return;
     }
 
-    socket = new WebSocket("ws://localhost:8000/ws");
+    // Live rows only for the viewport. The server replays what we missed,
+    // or answers resync if it no longer can.
+    const params = new URLSearchParams({ bbox: map.getBounds().toBBoxString() });
+    if (lastSeq !== null) {
+        params.set('last_seq', lastSeq);
+    }
+    socket = new WebSocket(`ws://localhost:8000/ws?${params}`);
 
     socket.onmessage = function(event) {
         try {
-            let contact = JSON.parse(event.data);
-            console.log("Received contact:", contact);
+            let message = JSON.parse(event.data);
 
-            if (contact.latitude && contact.longitude) {
-                // Add new marker
-                addMarkerToMap(contact);
+            if (message.resync) {
+                // Missed too many events while disconnected, or fell behind and had
+                // frames dropped: fetch just the changes
+                catchUp();
+                return;
+            }
+            if (message.error) {
+                console.error("WebSocket subscription error:", message.error);
+                return;
+            }
+            // A frame holds every change from first_seq to seq; starting past
+            // the seq we hold means frames went missing, so page them in
+            const expected = catchingUp ? liveSeq : lastSeq;
+            const received = applyRows(message.fields, message.rows);
+            if (expected !== null && message.first_seq > expected + 1) {
+                catchUp();
+            }
+            liveSeq = Math.max(liveSeq ?? message.seq, message.seq);
+            if (!catchingUp && lastSeq !== null) {
+                lastSeq = Math.max(lastSeq, message.seq);
+            }
+            console.log(`Received ${received.length} contacts`);
 
-                // Update radar chart
+            // Update radar chart once per frame
+            received.slice(-10).forEach(contact => {
                 radarChartData.push({
                     type: contact.type,
                     significance_level: getSignificanceLevel(contact.significance)
                 });
-
-                if (radarChartData.length > 10) {
-                    radarChartData.shift();
-                }
-                updateRadarChart(radarChartData);
-            }
+            });
+            radarChartData = radarChartData.slice(-10);
+            updateRadarChart(radarChartData);
         } catch (error) {
             console.error("Error processing websocket message:", error);
         }
@@ -115,25 +267,111 @@ function connectWebSocket() {
     socket.onopen = function() {
         console.log("WebSocket connected successfully");
         reconnectAttempts = 0;
-        
-        // Fetch initial contacts
-        fetch('http://localhost:8000/initial_contacts')
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                return response.json();
-            })
-            .then(data => {
-                console.log("Initial contacts:", data);
-                addMarkersToMap(data);
-            })
-            .catch(error => {
-                console.error("Error fetching initial data:", error);
-            });
+        // The viewport may have moved while we were disconnected
+        subscribeToViewport();
     };
 }
 
+const DETAIL_ZOOM = 10; // Below this zoom the backend serves clusters
+const VIEWPORT_PAGE_SIZE = 2000;
+const CLUSTER_REFRESH_MS = 1000; // Live contacts below detail zoom refresh clusters at most this often
+let viewportRequest = 0; // Bumped on every reload so stale pages are ignored
+let clusterTimer = null;
+
+function loadInitialContacts() {
+    const requestId = ++viewportRequest;
+    const bbox = map.getBounds().toBBoxString();
+    clearAllMarkers();
+    if (map.getZoom() < DETAIL_ZOOM) {
+        loadClusters(requestId, bbox, map.getZoom());
+    } else {
+        loadViewportPage(requestId, bbox, null);
+    }
+}
+
+function scheduleClusterRefresh() {
+    if (clusterTimer !== null) {
+        return;
+    }
+    clusterTimer = setTimeout(() => {
+        clusterTimer = null;
+        if (map.getZoom() < DETAIL_ZOOM) {
+            loadClusters(++viewportRequest, map.getBounds().toBBoxString(), map.getZoom());
+        }
+    }, CLUSTER_REFRESH_MS);
+}
+
+function loadViewportPage(requestId, bbox, cursor) {
+    let url = `http://localhost:8000/contacts?bbox=${bbox}&limit=${VIEWPORT_PAGE_SIZE}`;
+    if (cursor !== null) {
+        url += `&cursor=${cursor}`;
+    }
+    fetchJson(url)
+        .then(data => {
+            if (requestId !== viewportRequest) {
+                return;
+            }
+            if (cursor === null) {
+                syncFrom(data.seq);
+            }
+            data.contacts.forEach(addMarkerToMap);
+            if (data.next_cursor !== null) {
+                loadViewportPage(requestId, bbox, data.next_cursor);
+            }
+        })
+        .catch(error => {
+            console.error("Error fetching viewport contacts:", error);
+        });
+}
+
+function loadClusters(requestId, bbox, zoom) {
+    fetch(`http://localhost:8000/clusters?z=${zoom}&bbox=${bbox}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (requestId !== viewportRequest) {
+                return;
+            }
+            // Swapped in only now, so a refresh does not flicker
+            clearClusterMarkers();
+            data.clusters.forEach(addClusterToMap);
+        })
+        .catch(error => {
+            console.error("Error fetching clusters:", error);
+        });
+}
+
+function addClusterToMap(cluster) {
+    const radius = Math.min(8 + Math.log2(cluster.count) * 3, 40);
+    const marker = L.circleMarker([cluster.latitude, cluster.longitude], {
+        radius: radius,
+        color: getSignificanceLevel(cluster.significance) >= 60 ? '#d9534f' : '#3388ff'
+    })
+        .bindTooltip(`${cluster.count}`, { permanent: true, direction: 'center' })
+        .bindPopup(`
+            <div class="contact-popup">
+                <div class="popup-row"><strong>Contacts:</strong> ${cluster.count}</div>
+                <div class="popup-row"><strong>Dominant type:</strong> ${cluster.type}</div>
+                <div class="popup-row"><strong>Significance:</strong> ${cluster.significance}</div>
+            </div>
+        `);
+    markers.push(marker);
+    marker.addTo(map);
+}
+
+let viewportTimer = null;
+map.on('moveend', () => {
+    clearTimeout(viewportTimer);
+    viewportTimer = setTimeout(() => {
+        subscribeToViewport();
+        loadInitialContacts();
+    }, 250);
+});
+
 function getSignificanceLevel(significance) {
     switch(significance?.toLowerCase()) {
         case 'routine':
@@ -187,6 +425,7 @@ function updateRadarChart(data) {
 // Initialize the application
 document.addEventListener('DOMContentLoaded', () => {
     updateRadarChart([]);
+    loadInitialContacts();
     connectWebSocket();
 });
 
@@ -3,6 +3,11 @@ from pathlib import Path
 import re
 from datetime import datetime
 import logging
+import argparse
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 
 logging.basicConfig(
@@ -11,6 +16,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Part of every manifest fingerprint; bump it when parsing changes so cached shards are re-parsed
+PARSER_VERSION = 2
+
 def parse_json_block(block):
     """Parse JSON blocks found in the markdown files."""
     try:
@@ -103,67 +111,173 @@ def parse_surveillance_log(block):
         logger.error(f"Error parsing surveillance log: {str(e)}\nBlock content: {clean_block[:200]}...")
         return None
 
-def parse_markdown_to_json(file_paths):
-    """Enhanced parser to handle different types of maritime data formats."""
+def parse_file(file_path, source_file=None):
+    """Parse one markdown file into a list of documents tagged with source_file (default: its name)"""
+    file_path = Path(file_path)
+    source_file = source_file or file_path.name
     documents = []
-    total_files = len(file_paths)
-    
-    logger.info(f"Starting to process {total_files} files")
-    
-    for idx, file_path in enumerate(file_paths, 1):
-        logger.info(f"Processing file {idx}/{total_files}: {file_path.name}")
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                if not content.strip():
-                    logger.warning(f"Empty file: {file_path.name}")
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            content = file.read()
+            if not content.strip():
+                logger.warning(f"Empty file: {file_path.name}")
+                return documents
+            
+            # Split content into numbered blocks
+            # Look for patterns like "1. ```", "2. ```", etc.
+            blocks = re.split(r'\n\d+\.\s*(?=```)', content)
+            logger.info(f"Found {len(blocks)} blocks in {file_path.name}")
+            
+            for block_num, block in enumerate(blocks, 1):
+                if not block.strip():
                     continue
-                
-                # Split content into numbered blocks
-                # Look for patterns like "1. ```", "2. ```", etc.
-                blocks = re.split(r'\n\d+\.\s*(?=```)', content)
-                logger.info(f"Found {len(blocks)} blocks in {file_path.name}")
-                
-                for block_num, block in enumerate(blocks, 1):
-                    if not block.strip():
-                        continue
-                        
-                    logger.debug(f"Processing block {block_num} in {file_path.name}")
-                    parsed_doc = None
-                    
-                    # Try parsing as JSON first
-                    if 'json' in block.lower():
-                        parsed_doc = parse_json_block(block)
-                    # Try parsing as military message
-                    elif 'FROM:' in block and 'TO:' in block:
-                        parsed_doc = parse_message_block(block)
-                    # Try parsing as surveillance log
-                    elif 'Date:' in block and 'Report:' in block:
-                        parsed_doc = parse_surveillance_log(block)
                     
-                    if parsed_doc:
-                        parsed_doc['source_file'] = file_path.name
-                        parsed_doc['block_number'] = block_num
-                        documents.append(parsed_doc)
-                        logger.debug(f"Successfully parsed block {block_num}")
-                    else:
-                        logger.warning(f"Failed to parse block {block_num} in {file_path.name}")
-                        logger.debug(f"Block content: {block[:200]}...")
+                logger.debug(f"Processing block {block_num} in {file_path.name}")
+                parsed_doc = None
                 
-                logger.info(f"Successfully processed {file_path.name}, found {len([d for d in documents if d['source_file'] == file_path.name])} valid documents")
+                # Try parsing as JSON first
+                if 'json' in block.lower():
+                    parsed_doc = parse_json_block(block)
+                # Try parsing as military message
+                elif 'FROM:' in block and 'TO:' in block:
+                    parsed_doc = parse_message_block(block)
+                # Try parsing as surveillance log
+                elif 'Date:' in block and 'Report:' in block:
+                    parsed_doc = parse_surveillance_log(block)
                 
-        except Exception as e:
-            logger.error(f"Error processing {file_path.name}: {str(e)}")
-            continue
+                if parsed_doc:
+                    parsed_doc['source_file'] = source_file
+                    parsed_doc['block_number'] = block_num
+                    documents.append(parsed_doc)
+                    logger.debug(f"Successfully parsed block {block_num}")
+                else:
+                    logger.warning(f"Failed to parse block {block_num} in {file_path.name}")
+                    logger.debug(f"Block content: {block[:200]}...")
+            
+            logger.info(f"Successfully processed {file_path.name}, found {len(documents)} valid documents")
+            
+    except Exception as e:
+        logger.error(f"Error processing {file_path.name}: {str(e)}")
+    return documents
+
+def parse_markdown_to_json(file_paths, workers=None):
+    """Enhanced parser to handle different types of maritime data formats."""
+    total_files = len(file_paths)
+    logger.info(f"Starting to process {total_files} files")
+    
+    documents = []
+    for file_docs in _parse_files(file_paths, workers):
+        documents.extend(file_docs)
     
     logger.info(f"Parsing complete. Total documents processed: {len(documents)}")
     return documents
 
+def _parse_files(file_paths, workers=None, source_files=None):
+    """Parse files on a process pool, yielding per-file results in input order"""
+    source_files = source_files or [None] * len(file_paths)
+    if workers == 1 or len(file_paths) <= 1:
+        yield from map(parse_file, file_paths, source_files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Larger chunks amortize pickling for corpora of many small files
+        chunksize = max(1, len(file_paths) // ((workers or os.cpu_count() or 1) * 4))
+        yield from pool.map(parse_file, file_paths, source_files, chunksize=chunksize)
+
+def _file_fingerprint(file_path):
+    stat = file_path.stat()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+def _file_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _shard_name(key):
+    # Keys are relative paths; hashing keeps shards of nested files flat in cache_dir
+    return f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.jsonl"
+
+def parse_corpus_incremental(file_paths, output_file, cache_dir, workers=None, root=None):
+    """
+    Parse a corpus to JSON Lines, re-parsing only files that changed.
+
+    Files are keyed by their path relative to root (default: the deepest
+    directory containing them all), which is also their documents'
+    source_file. Each file's documents are kept as a JSONL shard in
+    cache_dir alongside a manifest of mtime/size/hash and PARSER_VERSION.
+    Files whose mtime and size match are skipped outright; if only the
+    mtime moved, a matching hash still skips the parse. A different parser
+    version always re-parses. The output is the shards concatenated in
+    sorted key order.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = cache_dir / "manifest.json"
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    file_paths = [Path(p).resolve() for p in file_paths]
+    if root is None:
+        root = Path(os.path.commonpath([p.parent for p in file_paths])) if file_paths else Path('.')
+    root = Path(root).resolve()
+    files = sorted((p.relative_to(root).as_posix(), p) for p in file_paths)
+    to_parse = []
+    for key, file_path in files:
+        entry = manifest.get(key)
+        fingerprint = _file_fingerprint(file_path)
+        if entry and entry.get('parser_version') == PARSER_VERSION and (cache_dir / entry['shard']).exists():
+            if all(entry.get(k) == v for k, v in fingerprint.items()):
+                continue
+            if entry.get('sha256') == _file_hash(file_path):
+                entry.update(fingerprint)
+                continue
+        to_parse.append((key, file_path))
+
+    logger.info(f"{len(files) - len(to_parse)} unchanged files skipped, {len(to_parse)} to parse")
+    parsed = _parse_files([p for _, p in to_parse], workers, [key for key, _ in to_parse])
+    for (key, file_path), file_docs in zip(to_parse, parsed):
+        shard = _shard_name(key)
+        with open(cache_dir / shard, 'w', encoding='utf-8') as f:
+            for doc in file_docs:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        old = manifest.get(key)
+        if old and old.get('shard', f"{key}.jsonl") != shard:
+            (cache_dir / old.get('shard', f"{key}.jsonl")).unlink(missing_ok=True)
+        manifest[key] = {**_file_fingerprint(file_path), 'sha256': _file_hash(file_path),
+                         'parser_version': PARSER_VERSION, 'shard': shard, 'documents': len(file_docs)}
+
+    # Drop files that disappeared from the corpus
+    keys = {key for key, _ in files}
+    for key in [k for k in manifest if k not in keys]:
+        entry = manifest.pop(key)
+        (cache_dir / entry.get('shard', f"{key}.jsonl")).unlink(missing_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    with open(tmp_file, 'wb') as out:
+        for key, _ in files:
+            with open(cache_dir / manifest[key]['shard'], 'rb') as shard:
+                shutil.copyfileobj(shard, out)
+    os.replace(tmp_file, output_file)
+
+    total = sum(manifest[key]['documents'] for key, _ in files)
+    logger.info(f"Wrote {total} documents to {output_file}")
+    return total
+
 def main():
     """Main function with enhanced error handling and debugging."""
+    parser = argparse.ArgumentParser(description="Parse maritime markdown files into JSON Lines")
+    parser.add_argument("--data-dir", type=Path, default=Path("/kaggle/input/naval-hack/naval_data"))
+    parser.add_argument("--output", type=Path, default=Path("/kaggle/working/parsed_maritime_data.jsonl"))
+    parser.add_argument("--cache-dir", type=Path, default=Path("/kaggle/working/parse_cache"),
+                        help="Per-file shards and manifest used to skip unchanged files")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    args = parser.parse_args()
     try:
-        data_dir = Path("/kaggle/input/naval-hack/naval_data")
+        data_dir = args.data_dir
         if not data_dir.exists():
             raise FileNotFoundError(f"Data directory not found: {data_dir}")
         
@@ -175,26 +289,20 @@ def main():
         logger.info(f"Found {len(file_paths)} markdown files to process")
         
        
-        parsed_data = parse_markdown_to_json(file_paths)
+        total = parse_corpus_incremental(file_paths, args.output, args.cache_dir, args.workers, root=data_dir)
         
         
-        if not parsed_data:
+        if not total:
             raise ValueError("No documents were successfully parsed")
         
-       
-        output_file = Path('/kaggle/working/parsed_maritime_data.json')
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as json_file:
-            json.dump(parsed_data, json_file, indent=4, ensure_ascii=False)
-        
-        logger.info(f"Successfully saved {len(parsed_data)} documents to {output_file}")
+        logger.info(f"Successfully saved {total} documents to {args.output}")
         
         
         doc_types = {}
-        for doc in parsed_data:
-            doc_type = doc.get('document_type', 'unknown')
-            doc_types[doc_type] = doc_types.get(doc_type, 0) + 1
+        with open(args.output, 'r', encoding='utf-8') as f:
+            for line in f:
+                doc_type = json.loads(line).get('document_type', 'unknown')
+                doc_types[doc_type] = doc_types.get(doc_type, 0) + 1
         
         logger.info("Document type statistics:")
         for doc_type, count in doc_types.items():
@@ -205,4 +313,4 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
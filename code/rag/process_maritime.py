@@ -1,6 +1,9 @@
 import argparse
+import sys
 from pathlib import Path
-from ocr_infer import MaritimeTextProcessor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from ocr_infer import MaritimeTextProcessor  # noqa: E402
 
 def process_input(input_path: str) -> None:
     """
@@ -8,27 +8,110 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM  # Fixed import
 import logging
 import pickle
+import argparse
+import hashlib
+import os
+import sys
 from tqdm import tqdm
 
+# The index modules are shared with MaritimeTextProcessor and live in code/backend;
+# resolve it from this file so the trainer runs from any working directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from embedding_cache import EmbeddingCache  # noqa: E402
+from document_store import STORE_NAME, open_documents, write_document_store  # noqa: E402
+from lexical_index import LEXICAL_NAME, LexicalIndex  # noqa: E402
+from metadata_index import METADATA_NAME, MetadataIndex  # noqa: E402
+from onnx_embedder import ONNX_CONFIG, OnnxEmbedder, cache_model_name, export as export_onnx  # noqa: E402
+
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = ('flat', 'ivf', 'ivfpq', 'hnsw')
+EMBEDDING_BACKENDS = ('torch', 'onnx')
+
+# Build and search defaults for each index type; recorded in config.json so
+# the processor can apply the search-time ones (nprobe / efSearch).
+DEFAULT_INDEX_PARAMS = {
+    'flat': {},
+    'ivf': {'nlist': 1024, 'nprobe': 16},
+    'ivfpq': {'nlist': 1024, 'nprobe': 16, 'pq_m': 48, 'pq_bits': 8},
+    'hnsw': {'hnsw_m': 32, 'efConstruction': 200, 'efSearch': 64},
+}
+
+
+def build_index(index_type: str, dim: int, params: dict, n_vectors: int):
+    """Create an empty FAISS index of the requested type"""
+    if index_type == 'flat':
+        return faiss.IndexFlatL2(dim)
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, params['hnsw_m'])
+        index.hnsw.efConstruction = params['efConstruction']
+        index.hnsw.efSearch = params['efSearch']
+        return index
+    # IVF needs at least one training point per list
+    nlist = max(1, min(params['nlist'], n_vectors))
+    params['nlist'] = nlist
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == 'ivf':
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    elif index_type == 'ivfpq':
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, params['pq_m'], params['pq_bits'])
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    index.nprobe = params['nprobe']
+    return index
+
+
+def document_key(doc) -> str:
+    """Stable identity of a parsed block across corpus re-parses"""
+    return f"{doc.get('source_file')}:{doc.get('block_number')}"
+
+
+def document_hash(doc) -> str:
+    """Content hash covering source file, block number and every parsed field"""
+    return hashlib.sha256(json.dumps(doc, sort_keys=True).encode('utf-8')).hexdigest()
+
+
 class MaritimeRAGTrainer:
-    def __init__(self, output_dir: str = "/kaggle/working/maritime_rag"):
+    def __init__(self, output_dir: str = "/kaggle/working/maritime_rag",
+                 index_type: str = 'flat', index_params: dict = None,
+                 embedding_backend: str = 'torch'):
         """Initialize the RAG training system"""
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}")
+        self.index_type = index_type
+        self.index_params = {**DEFAULT_INDEX_PARAMS[index_type], **(index_params or {})}
+     
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"embedding_backend must be one of {EMBEDDING_BACKENDS}")
+        self.embedding_backend = embedding_backend
      
         logger.info("Loading models...")
-        self.embedding_model = SentenceTransformer("BAAI/bge-small-en-v1.5")
+        if embedding_backend == 'onnx':
+            # int8 ONNX Runtime model next to the index, exported on first use
+            onnx_dir = self.output_dir / "onnx"
+            if not (onnx_dir / ONNX_CONFIG).exists():
+                export_onnx("BAAI/bge-small-en-v1.5", onnx_dir)
+            self.embedding_model = OnnxEmbedder(str(onnx_dir))
+        else:
+            self.embedding_model = SentenceTransformer("BAAI/bge-small-en-v1.5")
         self.tokenizer = AutoTokenizer.from_pretrained("google/flan-t5-small")
         
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
+        # Shared with MaritimeTextProcessor, which reads the same output_dir
+        self.embedding_cache = EmbeddingCache(self.output_dir / "embedding_cache",
+                                              cache_model_name("BAAI/bge-small-en-v1.5", embedding_backend),
+                                              self.embedding_dim)
+        # Created on the first batch: IVF variants need the corpus size to train
+        self.index = None
         
         self.documents = []
+        # source_file:block_number -> {'hash': content hash, 'id': index id}
+        self.manifest = {}
 
     def _prepare_text(self, doc):
         """Prepare document text for embedding"""
@@ -40,66 +123,212 @@ class MaritimeRAGTrainer:
                 fields.append(f"{key}: {value}")
         return " ".join(fields)
 
-    def process_documents(self, documents):
-        """Process and index documents"""
-        logger.info(f"Processing {len(documents)} documents...")
-        
-        
-        texts = [self._prepare_text(doc) for doc in documents]
-        
-        # Generate embeddings in batches  batch_size = 32
+    def _embed(self, texts, batch_size: int = 32) -> np.ndarray:
+        """Generate embeddings in batches"""
         embeddings = []
         
         for i in tqdm(range(0, len(texts), batch_size), desc="Generating embeddings"):
             batch_texts = texts[i:i + batch_size]
-            batch_embeddings = self.embedding_model.encode(
-                batch_texts, 
-                convert_to_tensor=True, 
-                show_progress_bar=False
-            )
-            embeddings.append(batch_embeddings.cpu().numpy())
+            embeddings.append(self.embedding_cache.encode(batch_texts, self._encode_batch))
+        
+        logger.info(f"Embedding cache: {self.embedding_cache.stats()}")
+        return np.vstack(embeddings)
+
+    def _encode_batch(self, texts) -> np.ndarray:
+        if self.embedding_backend == 'onnx':
+            return self.embedding_model.encode(texts)
+        batch_embeddings = self.embedding_model.encode(
+            texts, 
+            convert_to_tensor=True, 
+            show_progress_bar=False
+        )
+        return batch_embeddings.cpu().numpy()
+
+    def _add(self, documents, embeddings_np: np.ndarray):
+        """Add embedded documents under fresh ids; documents[id] is the document for that id"""
+        if self.index is None:
+            base = build_index(self.index_type, self.embedding_dim,
+                               self.index_params, len(embeddings_np))
+            self.index = faiss.IndexIDMap(base)
+        if not self.index.is_trained:
+            logger.info(f"Training {self.index_type} index on {len(embeddings_np)} vectors")
+            self.index.train(embeddings_np)
+        ids = np.arange(len(self.documents), len(self.documents) + len(documents), dtype='int64')
+        self.index.add_with_ids(embeddings_np, ids)
+        for doc_id, doc in zip(ids, documents):
+            self.documents.append(doc)
+            self.manifest[document_key(doc)] = {'hash': document_hash(doc), 'id': int(doc_id)}
+
+    def process_documents(self, documents, batch_size: int = 32):
+        """Process and index documents"""
+        logger.info(f"Processing {len(documents)} documents...")
         
-        embeddings_np = np.vstack(embeddings)
         
-        self.index.add(embeddings_np)
-        self.documents.extend(documents)
+        texts = [self._prepare_text(doc) for doc in documents]
+        self._add(documents, self._embed(texts, batch_size))
         
         logger.info("Document processing complete")
 
+    def load_artifacts(self):
+        """Load a previously saved index, documents and manifest for incremental updates"""
+        logger.info(f"Loading existing artifacts from {self.output_dir}")
+        index = faiss.read_index(str(self.output_dir / "maritime.index"))
+        self.documents = list(open_documents(self.output_dir))
+
+        if not isinstance(index, faiss.IndexIDMap):
+            # Artifacts from before id mapping: ids were list positions
+            if not isinstance(index, faiss.IndexFlat):
+                raise ValueError("Existing index has no id map; run a full rebuild instead")
+            vectors = index.reconstruct_n(0, index.ntotal)
+            index = faiss.IndexIDMap(faiss.IndexFlatL2(self.embedding_dim))
+            index.add_with_ids(vectors, np.arange(len(vectors), dtype='int64'))
+        self.index = index
+
+        manifest_path = self.output_dir / "manifest.json"
+        if manifest_path.exists():
+            with open(manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {
+                document_key(doc): {'hash': document_hash(doc), 'id': doc_id}
+                for doc_id, doc in enumerate(self.documents) if doc is not None
+            }
+
+        config_path = self.output_dir / "config.json"
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        self.index_type = config.get('index_type', 'flat')
+        self.index_params = config.get('index_params', {})
+        if config.get('embedding_backend', 'torch') != self.embedding_backend:
+            raise ValueError(f"Existing index was embedded with {config.get('embedding_backend', 'torch')}; "
+                             f"run a full rebuild to switch to {self.embedding_backend}")
+
+    def update_documents(self, documents, batch_size: int = 32) -> dict:
+        """
+        Apply a new corpus snapshot incrementally.
+
+        Only new or changed blocks are embedded; removed and superseded blocks
+        are deleted from the index by id and tombstoned in documents.
+        """
+        incoming = {document_key(doc): doc for doc in documents}
+        stale_ids = []
+        to_add = []
+        for key, doc in incoming.items():
+            entry = self.manifest.get(key)
+            if entry is None:
+                to_add.append(doc)
+            elif entry['hash'] != document_hash(doc):
+                stale_ids.append(entry['id'])
+                to_add.append(doc)
+        removed = [key for key in self.manifest if key not in incoming]
+        stale_ids.extend(self.manifest[key]['id'] for key in removed)
+
+        if stale_ids:
+            if self.index_type == 'hnsw':
+                raise ValueError("HNSW indexes do not support removal; run a full rebuild instead")
+            self.index.remove_ids(np.array(stale_ids, dtype='int64'))
+            for doc_id in stale_ids:
+                self.documents[doc_id] = None
+            for key in removed:
+                del self.manifest[key]
+
+        if to_add:
+            texts = [self._prepare_text(doc) for doc in to_add]
+            self._add(to_add, self._embed(texts, batch_size))
+
+        stats = {
+            'added': len(to_add) - (len(stale_ids) - len(removed)),
+            'changed': len(stale_ids) - len(removed),
+            'removed': len(removed),
+            'unchanged': len(incoming) - len(to_add)
+        }
+        logger.info(f"Incremental update: {stats}")
+        return stats
+
+    def _write_atomic(self, name: str, write):
+        """Write an artifact to a temp file and rename it into place"""
+        tmp_path = self.output_dir / f".{name}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, self.output_dir / name)
+
+    def _write_json(self, name: str, data):
+        def write(path):
+            with open(path, 'w') as f:
+                json.dump(data, f)
+        self._write_atomic(name, write)
+
     def save_artifacts(self):
         """Save all necessary artifacts"""
         logger.info(f"Saving artifacts to {self.output_dir}")
         
+        # The document store only ever grows, so writing it before the index
+        # keeps every id in the live index resolvable for a processor that
+        # reloads in between. config.json goes last and signals a complete update.
+        self._write_atomic(STORE_NAME, lambda path: write_document_store(path, self.documents))
+        self._write_atomic("maritime.index", lambda path: faiss.write_index(self.index, str(path)))
+        self._write_atomic(LEXICAL_NAME, lambda path: LexicalIndex.build(self.documents).save(path))
+        self._write_atomic(METADATA_NAME, lambda path: MetadataIndex.build(self.documents).save(path))
+        self._write_json("manifest.json", self.manifest)
         
-        faiss.write_index(self.index, str(self.output_dir / "maritime.index"))
-     
-        with open(self.output_dir / "documents.json", 'w') as f:
-            json.dump(self.documents, f)
-        
-        config = {
+        # Only the index-owned keys are ours; processor settings such as
+        # retrieval, OCR and batching options survive every rebuild
+        config_path = self.output_dir / "config.json"
+        config = {}
+        if config_path.exists():
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        config.update({
             'embedding_model': "BAAI/bge-small-en-v1.5",
             'generator_model': "google/flan-t5-small",
-            'embedding_dim': self.embedding_dim
-        }
+            'embedding_dim': self.embedding_dim,
+            'index_type': self.index_type,
+            'index_params': self.index_params,
+            'embedding_backend': self.embedding_backend
+        })
         
-        with open(self.output_dir / "config.json", 'w') as f:
-            json.dump(config, f)
+        self._write_json("config.json", config)
         
         logger.info("Artifacts saved successfully")
 
+def load_documents(data_path: Path):
+    """Load parsed documents from Dataset_parser output (JSON Lines or legacy JSON)"""
+    with open(data_path, 'r', encoding='utf-8') as f:
+        if data_path.suffix == '.jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
 def main():
+    parser = argparse.ArgumentParser(description="Build the maritime RAG index")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default='flat')
+    parser.add_argument("--nlist", type=int, help="IVF inverted lists")
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed per query")
+    parser.add_argument("--ef-search", type=int, help="HNSW search depth")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default='torch',
+                        help="onnx: int8-quantized ONNX Runtime model for CPU-only nodes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Embed only new or changed blocks into the existing artifacts")
+    args = parser.parse_args()
+    index_params = {key: value for key, value in [
+        ('nlist', args.nlist), ('nprobe', args.nprobe), ('efSearch', args.ef_search)
+    ] if value is not None}
    
-    data_path = Path("/kaggle/working/parsed_maritime_data.json")
+    data_path = Path("/kaggle/working/parsed_maritime_data.jsonl")
+    if not data_path.exists():
+        data_path = data_path.with_suffix(".json")
     output_dir = Path("/kaggle/working/maritime_rag")
     
    
     logger.info(f"Loading data from {data_path}")
-    with open(data_path, 'r') as f:
-        documents = json.load(f)
+    documents = load_documents(data_path)
     
     
-    trainer = MaritimeRAGTrainer(output_dir=str(output_dir))
-    trainer.process_documents(documents)
+    trainer = MaritimeRAGTrainer(output_dir=str(output_dir), index_type=args.index_type,
+                                 index_params=index_params, embedding_backend=args.embedding_backend)
+    if args.incremental and (output_dir / "maritime.index").exists():
+        trainer.load_artifacts()
+        trainer.update_documents(documents)
+    else:
+        trainer.process_documents(documents)
     trainer.save_artifacts()
     
     logger.info("Training complete!")
@@ -0,0 +1,46 @@
+# tests/conftest.py
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh reports database in tmp_path, written through its own ContactWriter"""
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'maritime.db'))
+    monkeypatch.setattr(database, '_writer', None)
+    database.create_database()
+    yield database.DB_PATH
+    if database._writer is not None:
+        database._writer.close()
+
+
+@pytest.fixture
+def make_contacts():
+    """Factory for n reproducible contacts over the Arabian Sea; keyword arguments override fields"""
+    def make(n, seed=0, **overrides):
+        rng = random.Random(seed)
+        return [
+            {
+                'latitude': rng.uniform(0, 25),
+                'longitude': rng.uniform(50, 75),
+                'speed': round(rng.uniform(0, 30), 1),
+                'heading': round(rng.uniform(0, 360), 1),
+                'type': rng.choice(['tanker', 'fishing vessel', 'submarine', 'cargo']),
+                'timestamp': f"2024-10-22T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00Z",
+                'significance': rng.choice(['routine', 'suspicious', 'threatening']),
+                **overrides
+            }
+            for _ in range(n)
+        ]
+    return make
+
+
+@pytest.fixture
+def client(db):
+    """The API over the test database; startup is skipped, so no jobs or indexes are loaded"""
+    return TestClient(app_module.app)
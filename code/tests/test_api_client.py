@@ -0,0 +1,93 @@
+# tests/test_api_client.py
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from maritime_api_client import MaritimeAPIClient, not_sent, retry_after
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted outcomes in order and counts the POSTs"""
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.posts = 0
+
+    def post(self, url, timeout=None, **kwargs):
+        self.posts += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_client(*outcomes, retries=3):
+    """A client without the extraction models, posting to a scripted session"""
+    client = MaritimeAPIClient.__new__(MaritimeAPIClient)
+    client.session = ScriptedSession(*outcomes)
+    client.retries = retries
+    client.backoff = 0.0
+    client.timeout = 1.0
+    client.retry_count = 0
+    client._retry_lock = threading.Lock()
+    return client
+
+
+def refused():
+    return requests.ConnectionError(MaxRetryError(
+        None, '/contacts/bulk', NewConnectionError(None, 'Connection refused')))
+
+
+def test_queue_full_and_unavailable_are_retried():
+    client = make_client(Response(429, {'Retry-After': '0'}), Response(503), Response(200))
+    assert client._post_with_retry('http://backend/contacts/bulk').status_code == 200
+    assert client.session.posts == 3
+    assert client.retry_count == 2
+
+
+def test_server_errors_after_sending_are_not_retried():
+    client = make_client(Response(500), Response(200))
+    assert client._post_with_retry('http://backend/contacts/bulk').status_code == 500
+    assert client.session.posts == 1
+
+    client = make_client(requests.ReadTimeout("read timed out"), Response(200))
+    with pytest.raises(requests.ReadTimeout):
+        client._post_with_retry('http://backend/contacts/bulk')
+    assert client.session.posts == 1
+
+
+def test_connection_refused_is_retried_until_the_limit():
+    client = make_client(refused(), Response(200))
+    assert client._post_with_retry('http://backend/contacts/bulk').status_code == 200
+
+    client = make_client(refused(), refused(), retries=1)
+    with pytest.raises(requests.ConnectionError):
+        client._post_with_retry('http://backend/contacts/bulk')
+    assert client.session.posts == 2
+
+
+def test_not_sent_only_for_failures_before_the_request_left():
+    assert not_sent(requests.ConnectTimeout())
+    assert not_sent(refused())
+    assert not not_sent(requests.ConnectionError("connection reset by peer"))
+    assert not not_sent(requests.ReadTimeout())
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert retry_after(None, 1.5) == 1.5
+    assert retry_after('7', 1.5) == 7.0
+    assert retry_after('-3', 1.5) == 0.0
+    assert retry_after('soon', 1.5) == 1.5
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= retry_after(later, 1.5) <= 30
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert retry_after(earlier, 1.5) == 0.0
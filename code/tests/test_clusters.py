@@ -0,0 +1,55 @@
+# tests/test_clusters.py
+import pytest
+
+from backend.clusters import DETAIL_ZOOM, Cell, ClusterIndex
+
+
+def contact(latitude, longitude, type='tanker', significance='routine'):
+    return {'latitude': latitude, 'longitude': longitude, 'type': type, 'significance': significance}
+
+
+@pytest.fixture
+def index(make_contacts):
+    index = ClusterIndex()
+    index.add_many(make_contacts(500))
+    return index
+
+
+def test_every_zoom_level_accounts_for_every_contact(index):
+    for zoom in range(DETAIL_ZOOM):
+        assert sum(cluster['count'] for cluster in index.clusters(zoom)) == 500
+
+
+def test_bbox_keeps_only_cells_inside_it(index):
+    bbox = (55, 5, 60, 10)
+    for zoom in (7, 9):
+        clusters = index.clusters(zoom, bbox)
+        assert clusters
+        assert len(clusters) < len(index.clusters(zoom))
+        # Cells overlapping the bbox edge, under half a degree at these zooms, may reach past it
+        assert all(54.5 <= c['longitude'] <= 60.5 and 4.5 <= c['latitude'] <= 10.5 for c in clusters)
+    inside = [c for c in index.clusters(9) if 55.5 <= c['longitude'] <= 59.5 and 5.5 <= c['latitude'] <= 9.5]
+    assert all(c in index.clusters(9, bbox) for c in inside)
+    # A world bbox takes the same path as no bbox
+    assert sum(c['count'] for c in index.clusters(5, (-180, -85, 180, 85))) == 500
+
+
+def test_bbox_across_the_antimeridian():
+    index = ClusterIndex()
+    index.add_many([contact(0, 179.5), contact(0, -179.5), contact(0, 10)])
+    clusters = index.clusters(3, (170, -10, -170, 10))
+    assert sorted(c['longitude'] for c in clusters) == pytest.approx([-179.5, 179.5])
+    # Longitudes past 180, as wrapped maps report them, land in the right cell
+    index.add(contact(0, 190))
+    assert [c['count'] for c in index.clusters(3, (-171, -1, -169, 1))] == [1]
+
+
+def test_centroid_longitude_is_a_circular_mean():
+    cell = Cell()
+    cell.add(1.0, 179.0, 'tanker', 'routine')
+    cell.add(3.0, -179.0, 'tanker', 'suspicious')
+    cell.add(2.0, 180.0, 'cargo', 'suspicious')
+    cluster = cell.to_dict()
+    assert abs(cluster['longitude']) == pytest.approx(180)
+    assert cluster['latitude'] == pytest.approx(2)
+    assert (cluster['count'], cluster['type'], cluster['significance']) == (3, 'tanker', 'suspicious')
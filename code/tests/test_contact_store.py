@@ -0,0 +1,98 @@
+# tests/test_contact_store.py
+import math
+import sqlite3
+
+import pytest
+
+from backend import database
+from backend.contact_store import EARTH_RADIUS_NM, STORE_FIELDS, ContactStore
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(a))
+
+
+def sync(store):
+    while True:
+        changes = database.query_changes(store.seq, STORE_FIELDS)
+        store.apply_changes(changes)
+        if not changes['more']:
+            return
+
+
+def sqlite_rows(db):
+    conn = sqlite3.connect(db)
+    rows = conn.execute(f'''
+        SELECT {', '.join(STORE_FIELDS)} FROM reports
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL ORDER BY id
+    ''').fetchall()
+    conn.close()
+    return [dict(zip(STORE_FIELDS, row)) for row in rows]
+
+
+def assert_latest_matches(store):
+    latest = database.get_latest_contact()
+    assert {field: store.latest()[field] for field in latest} == latest
+
+
+@pytest.fixture
+def store(db, make_contacts):
+    database.store_many(make_contacts(3000))
+    store = ContactStore()
+    store.seq = database.latest_change_seq()
+    store.load(database.iter_contacts(STORE_FIELDS, batch_size=700))
+    return store
+
+
+def test_rows_match_sqlite_exactly(store, db):
+    assert store.rows(store.select()) == sqlite_rows(db)
+
+
+def test_select_matches_a_scan_of_sqlite(store, db):
+    center, radius = (12.5, 62.0), 150
+    positions = store.select(near=center, radius_nm=radius, significance=['suspicious'],
+                             since='2024-10-22T06:00:00Z', min_speed=10)
+    expected = [row['id'] for row in sqlite_rows(db)
+                if row['significance'] == 'suspicious' and row['timestamp'] >= '2024-10-22T06:00:00Z'
+                and row['speed'] >= 10 and haversine(*center, row['latitude'], row['longitude']) <= radius]
+    assert expected
+    assert [row['id'] for row in store.rows(positions)] == expected
+
+    bbox = (55, 5, 70, 20)
+    in_box = database.query_contacts(bbox=bbox, types=['tanker'], limit=5000)['contacts']
+    assert [row['id'] for row in store.rows(store.select(bbox=bbox, types=['tanker']))] == \
+        [c['id'] for c in in_box]
+
+
+def test_counts_and_latest_match_sqlite(store, db):
+    conn = sqlite3.connect(db)
+    by_type = dict(conn.execute("SELECT type, COUNT(*) FROM reports GROUP BY type").fetchall())
+    conn.close()
+    assert store.counts() == by_type
+    assert_latest_matches(store)
+
+
+def test_changes_made_outside_the_store_are_applied(store, db, make_contacts):
+    # Build the latitude index first, so updates land on already sorted rows
+    store.select(bbox=(50, 0, 75, 25))
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("UPDATE reports SET latitude = 40.5, speed = 3.3 WHERE id <= 20")
+        conn.execute("DELETE FROM reports WHERE id BETWEEN 100 AND 149")
+        conn.execute("DELETE FROM reports WHERE id = 3000")
+        conn.execute("UPDATE reports SET latitude = NULL WHERE id = 500")
+    conn.close()
+    database.store_many(make_contacts(10, seed=1))
+
+    sync(store)
+
+    assert store.seq == database.latest_change_seq()
+    assert store.rows(store.select()) == sqlite_rows(db)
+    moved = store.rows(store.select(bbox=(50, 40, 75, 41)))
+    assert [row['id'] for row in moved] == list(range(1, 21))
+    assert all(row['speed'] == 3.3 for row in moved)
+    assert not any(row['id'] <= 20 for row in store.rows(store.select(bbox=(50, 0, 75, 25))))
+    assert_latest_matches(store)
@@ -0,0 +1,63 @@
+# tests/test_contacts_api.py
+import json
+
+from backend import app as app_module
+from backend import database
+
+
+def test_contacts_pagination_carries_the_change_seq(client, make_contacts):
+    database.store_many(make_contacts(30))
+    ids, cursor = [], None
+    while True:
+        params = {'bbox': '50,0,75,25', 'limit': 7}
+        if cursor is not None:
+            params['cursor'] = cursor
+        page = client.get('/contacts', params=params).json()
+        assert page['seq'] == 30
+        ids.extend(c['id'] for c in page['contacts'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert ids == list(range(1, 31))
+
+    assert client.get('/contacts', params={'bbox': '1,2,3'}).status_code == 400
+
+
+def test_bulk_rejects_invalid_rows_and_stores_the_rest(client, make_contacts):
+    contacts = make_contacts(4)
+    contacts[1]['latitude'] = 120
+    contacts[2]['speed'] = 10000000000000000000
+    contacts[3]['confidence'] = 'high'
+
+    response = client.post('/contacts/bulk', json=contacts)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['contact_count'] == 4
+    assert body['accepted_count'] == 2
+    assert [(r['index'], r['reason']) for r in body['rejected']] == [
+        (1, "coordinates out of range"), (3, "confidence is not numeric")]
+    assert database.get_contact(2)['speed'] == 1e19
+
+
+def test_bulk_accepts_ndjson(client, make_contacts):
+    body = "\n".join(json.dumps(contact) for contact in make_contacts(3)) + "\n\n"
+    response = client.post('/contacts/bulk', content=body.encode(),
+                           headers={'Content-Type': 'application/x-ndjson'})
+    assert response.json()['accepted_count'] == 3
+    assert client.post('/contacts/bulk', content=b'{"not": "a list"}').status_code == 400
+
+
+def test_bulk_refuses_oversized_bodies(client, make_contacts, monkeypatch):
+    monkeypatch.setattr(app_module, 'BULK_MAX_BYTES', 100)
+    contacts = make_contacts(5)
+
+    assert client.post('/contacts/bulk', json=contacts).status_code == 413
+
+    def chunks():
+        for contact in contacts:
+            yield (str(contact) + "\n").encode()
+    response = client.post('/contacts/bulk', content=chunks(),
+                           headers={'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 413
+    assert database.latest_change_seq() == 0
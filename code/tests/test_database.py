@@ -0,0 +1,141 @@
+# tests/test_database.py
+import sqlite3
+
+from backend import database
+
+
+def test_validate_contact_accepts_a_complete_contact(make_contacts):
+    assert database.validate_contact(make_contacts(1)[0]) is None
+
+
+def test_validate_contact_reasons(make_contacts):
+    contact = make_contacts(1)[0]
+    assert database.validate_contact([contact]) == "contact is not an object"
+    assert database.validate_contact({'latitude': 1, 'longitude': 2}).startswith("missing fields")
+    assert database.validate_contact({**contact, 'latitude': None}) == "missing coordinates"
+    assert database.validate_contact({**contact, 'latitude': 91}) is not None
+    assert database.validate_contact({**contact, 'longitude': 'east'}) is not None
+    assert database.validate_contact({**contact, 'type': ['tanker']}) == "type is not a string"
+    assert database.validate_contact({**contact, 'description': 7}) == "description is not a string"
+
+
+def test_store_many_rejects_only_invalid_rows(db, make_contacts):
+    contacts = make_contacts(5)
+    contacts[1] = {**contacts[1], 'latitude': None}
+    contacts[3] = {**contacts[3], 'significance': {'level': 3}}
+
+    results = database.store_many(contacts)
+
+    assert [r['index'] for r in results] == [0, 1, 2, 3, 4]
+    assert [r['accepted'] for r in results] == [True, False, True, False, True]
+    accepted = [r for r in results if r['accepted']]
+    assert [r['id'] for r in accepted] == [1, 2, 3]
+    assert [r['seq'] for r in accepted] == [1, 2, 3]
+    assert database.latest_change_seq() == 3
+    assert database.get_contact(2)['latitude'] == contacts[2]['latitude']
+
+
+def test_store_many_stores_integers_sqlite_cannot_bind(db, make_contacts):
+    contacts = make_contacts(3)
+    contacts[0]['speed'] = 10000000000000000000
+    contacts[1]['heading'] = 10 ** 400
+    contacts[2]['latitude'] = 12
+
+    results = database.store_many(contacts)
+
+    assert [r['accepted'] for r in results] == [True, False, True]
+    assert results[1]['reason'] == "heading is not numeric"
+    assert database.get_contact(results[0]['id'])['speed'] == 1e19
+    assert database.get_contact(results[2]['id'])['latitude'] == 12.0
+
+
+def test_store_many_falls_back_to_row_by_row_when_the_batch_fails(db, make_contacts):
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute('''
+            CREATE TRIGGER refuse_decoys BEFORE INSERT ON reports WHEN NEW.type = 'decoy'
+            BEGIN SELECT RAISE(ABORT, 'decoys refused'); END
+        ''')
+    conn.close()
+    contacts = make_contacts(3)
+    contacts[1]['type'] = 'decoy'
+
+    results = database.store_many(contacts)
+
+    assert [r['accepted'] for r in results] == [True, False, True]
+    assert results[1]['reason'].startswith("database error")
+    stored = [database.get_contact(r['id']) for r in results if r['accepted']]
+    assert [c['latitude'] for c in stored] == [contacts[0]['latitude'], contacts[2]['latitude']]
+    assert [r['seq'] for r in results if r['accepted']] == [1, 2]
+
+
+def test_query_contacts_pages_with_a_keyset_cursor(db, make_contacts):
+    database.store_many(make_contacts(250))
+    bbox = (55, 5, 70, 20)
+    everything = database.query_contacts(bbox=bbox, limit=5000)
+    assert everything['next_cursor'] is None
+
+    pages, cursor = [], None
+    while True:
+        page = database.query_contacts(bbox=bbox, limit=40, cursor=cursor)
+        pages.append(page['contacts'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    ids = [c['id'] for page in pages for c in page]
+    assert ids == [c['id'] for c in everything['contacts']]
+    assert ids == sorted(ids)
+    assert all(len(page) == 40 for page in pages[:-1])
+    assert all(5 <= c['latitude'] <= 20 and 55 <= c['longitude'] <= 70 for c in everything['contacts'])
+
+
+def in_box(bbox):
+    return [c['id'] for c in database.query_contacts(bbox=bbox, limit=5000)['contacts']]
+
+
+def test_query_changes_reports_current_values_and_deletes(db, make_contacts):
+    database.store_many(make_contacts(4))
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("UPDATE reports SET type = 'cargo' WHERE id = 2")
+        conn.execute("UPDATE reports SET type = 'tanker' WHERE id = 2")
+        conn.execute("DELETE FROM reports WHERE id = 3")
+    conn.close()
+
+    changes = database.query_changes(4, ('id', 'type'))
+    assert changes == {'seq': 7, 'rows': [[2, 'tanker']], 'deleted': [3], 'more': False}
+
+    first = database.query_changes(0, ('id',), limit=2)
+    assert first['more'] and first['seq'] == 2
+    assert database.query_changes(7, ('id',)) == {'seq': 7, 'rows': [], 'deleted': [], 'more': False}
+
+
+def test_rtree_follows_coordinate_updates(db, make_contacts):
+    database.store_many(make_contacts(3, latitude=10.0, longitude=60.0))
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("UPDATE reports SET latitude = 40.5 WHERE id = 1")
+        conn.execute("UPDATE reports SET longitude = NULL WHERE id = 2")
+    assert in_box((59, 40, 61, 41)) == [1]
+    assert in_box((59, 9, 61, 11)) == [3]
+
+    with conn:
+        conn.execute("UPDATE reports SET longitude = 60.0 WHERE id = 2")
+        conn.execute("UPDATE reports SET speed = 12 WHERE id = 3")
+    conn.close()
+    assert in_box((59, 9, 61, 11)) == [2, 3]
+
+
+def test_create_database_repairs_an_rtree_without_the_update_trigger(db, make_contacts):
+    database.store_many(make_contacts(2, latitude=10.0, longitude=60.0))
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("DROP TRIGGER reports_rtree_update")
+        conn.execute("UPDATE reports SET latitude = 40.5 WHERE id = 1")
+    conn.close()
+    assert in_box((59, 9, 61, 11)) == [1, 2]
+
+    database.create_database()
+    assert in_box((59, 9, 61, 11)) == [2]
+    assert in_box((59, 40, 61, 41)) == [1]
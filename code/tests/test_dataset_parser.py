@@ -0,0 +1,96 @@
+# tests/test_dataset_parser.py
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import Dataset_parser
+
+NAVAL_DATA = Path(__file__).resolve().parent.parent / 'rag' / 'naval_data'
+
+MESSAGE = """1. ```
+FROM: CTF 150
+TO: ALL UNITS
+DTG: 201700Z OCT 24
+PRIORITY: IMMEDIATE
+Dhow sighted near {place}.
+```
+2. ```json
+{{"vessel": "Ocean Star", "location": "{place}"}}
+```
+"""
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / 'corpus'
+    (root / 'east').mkdir(parents=True)
+    (root / 'west').mkdir()
+    # Same file name in two directories: keys are relative paths, so both are kept
+    (root / 'east' / 'report.md').write_text(MESSAGE.format(place='Socotra'))
+    (root / 'west' / 'report.md').write_text(MESSAGE.format(place='Karachi'))
+    return root
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Records which files actually get parsed"""
+    calls = []
+    parse_file = Dataset_parser.parse_file
+
+    def recording(path, source_file=None):
+        calls.append(source_file)
+        return parse_file(path, source_file)
+    monkeypatch.setattr(Dataset_parser, 'parse_file', recording)
+    return calls
+
+
+def run(corpus, tmp_path):
+    files = sorted(corpus.rglob('*.md'))
+    return Dataset_parser.parse_corpus_incremental(files, tmp_path / 'out.jsonl', tmp_path / 'cache',
+                                                   workers=1, root=corpus)
+
+
+def read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_unchanged_files_are_not_parsed_again(corpus, tmp_path, parsed):
+    assert run(corpus, tmp_path) == 4
+    first = read(tmp_path / 'out.jsonl')
+    assert sorted(parsed) == ['east/report.md', 'west/report.md']
+    assert {doc['source_file'] for doc in first} == {'east/report.md', 'west/report.md'}
+
+    parsed.clear()
+    # A touched file with the same content is recognised by its hash
+    os.utime(corpus / 'east' / 'report.md', ns=(1, 1))
+    assert run(corpus, tmp_path) == 4
+    assert parsed == []
+    assert read(tmp_path / 'out.jsonl') == first
+
+
+def test_changed_removed_and_reversioned_files(corpus, tmp_path, parsed, monkeypatch):
+    run(corpus, tmp_path)
+    parsed.clear()
+    (corpus / 'west' / 'report.md').write_text(MESSAGE.format(place='Gwadar') * 2)
+    assert run(corpus, tmp_path) == 6
+    assert parsed == ['west/report.md']
+
+    parsed.clear()
+    (corpus / 'east' / 'report.md').unlink()
+    assert run(corpus, tmp_path) == 4
+    assert parsed == []
+    assert len(list((tmp_path / 'cache').glob('*.jsonl'))) == 1
+
+    parsed.clear()
+    monkeypatch.setattr(Dataset_parser, 'PARSER_VERSION', Dataset_parser.PARSER_VERSION + 1)
+    run(corpus, tmp_path)
+    assert parsed == ['west/report.md']
+
+
+@pytest.mark.skipif(not NAVAL_DATA.exists(), reason="sample corpus not present")
+def test_process_pool_matches_a_sequential_parse(tmp_path):
+    files = sorted(NAVAL_DATA.glob('*.md'))
+    assert Dataset_parser.parse_markdown_to_json(files, workers=2) == \
+        Dataset_parser.parse_markdown_to_json(files, workers=1)
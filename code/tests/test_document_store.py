@@ -0,0 +1,45 @@
+# tests/test_document_store.py
+import json
+
+import pytest
+
+from document_store import DocumentStore, convert, open_documents, write_document_store
+
+
+DOCUMENTS = [
+    {'text': 'Tanker sighted near Hormuz', 'metadata': {'source': 'a.md'}},
+    None,
+    {'text': 'Dhow at 12°N — ünïcode', 'metadata': {'source': 'b.md'}},
+]
+
+
+def test_round_trip_keeps_documents_and_tombstones(tmp_path):
+    path = tmp_path / 'documents.dat'
+    write_document_store(path, DOCUMENTS)
+
+    store = DocumentStore(path)
+    assert len(store) == 3
+    assert store[0] == DOCUMENTS[0]
+    assert store[1] is None
+    assert store[2] == DOCUMENTS[2]
+    assert list(store) == DOCUMENTS
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_rejects_files_that_are_not_a_store(tmp_path):
+    path = tmp_path / 'documents.dat'
+    path.write_bytes(b'NOTASTORE' + b'\0' * 16)
+    with pytest.raises(ValueError):
+        DocumentStore(path)
+
+
+def test_convert_replaces_the_legacy_json_list(tmp_path):
+    with open(tmp_path / 'documents.json', 'w') as f:
+        json.dump(DOCUMENTS, f)
+    assert open_documents(tmp_path) == DOCUMENTS
+
+    convert(tmp_path)
+    store = open_documents(tmp_path)
+    assert isinstance(store, DocumentStore)
+    assert list(store) == DOCUMENTS
@@ -0,0 +1,66 @@
+# tests/test_embedding_batcher.py
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_batcher import MicroBatcher
+
+
+class GatedEncoder:
+    """Encodes each text as [len(text)], blocking every call until the gate opens"""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, texts):
+        self.started.set()
+        self.gate.wait(timeout=5)
+        self.calls.append(list(texts))
+        return np.array([[len(text)] for text in texts], dtype='float32')
+
+
+def test_concurrent_requests_share_one_model_call():
+    encoder = GatedEncoder()
+    batcher = MicroBatcher(encoder, max_batch_size=8, max_wait_ms=50)
+    first = batcher.submit(['a'])
+    assert encoder.started.wait(timeout=1)
+    futures = [batcher.submit(['bb', 'ccc']), batcher.submit(['dddd'])]
+    encoder.gate.set()
+
+    np.testing.assert_array_equal(first.result(timeout=1), [[1]])
+    np.testing.assert_array_equal(futures[0].result(timeout=1), [[2], [3]])
+    np.testing.assert_array_equal(futures[1].result(timeout=1), [[4]])
+    assert encoder.calls == [['a'], ['bb', 'ccc', 'dddd']]
+
+
+def test_cancelled_requests_are_skipped_and_the_worker_survives():
+    encoder = GatedEncoder()
+    batcher = MicroBatcher(encoder, max_wait_ms=1)
+    busy = batcher.submit(['x'])
+    assert encoder.started.wait(timeout=1)
+
+    async def give_up():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batcher.encode_async(['abandoned']), timeout=0.01)
+    asyncio.run(give_up())
+    cancelled = batcher.submit(['also abandoned'])
+    assert cancelled.cancel()
+    encoder.gate.set()
+
+    busy.result(timeout=1)
+    np.testing.assert_array_equal(batcher.submit(['bb']).result(timeout=1), [[2]])
+    assert ['abandoned'] not in encoder.calls
+    assert all('also abandoned' not in call for call in encoder.calls)
+
+
+def test_encoder_errors_reach_every_caller_in_the_batch():
+    def failing(texts):
+        raise RuntimeError("model unavailable")
+    batcher = MicroBatcher(failing, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        batcher.encode(['a'])
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        batcher.encode(['b'])
@@ -0,0 +1,51 @@
+# tests/test_embedding_cache.py
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+class CountingEncoder:
+    """Deterministic fake model that records every text it is asked to embed"""
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text) + i for i in range(self.dim)] for text in texts], dtype='float32')
+
+
+def test_misses_are_encoded_once_and_hits_come_from_the_cache(tmp_path):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache(str(tmp_path), 'all-MiniLM-L6-v2', dim=8)
+
+    first = cache.encode(['tanker  sighted', 'tanker sighted', 'dhow'], encoder)
+    assert encoder.calls == [['tanker  sighted', 'dhow']]
+    np.testing.assert_array_equal(first[0], first[1])
+
+    again = cache.encode(['dhow', 'tanker sighted'], encoder)
+    assert len(encoder.calls) == 1
+    np.testing.assert_array_equal(again, first[[2, 1]])
+    assert cache.stats()['misses'] == 2
+
+
+def test_a_second_process_reads_rows_written_by_the_first(tmp_path):
+    writer_encoder, reader_encoder = CountingEncoder(), CountingEncoder()
+    writer = EmbeddingCache(str(tmp_path), 'model/with:odd chars', dim=8, memory_size=1)
+    reader = EmbeddingCache(str(tmp_path), 'model/with:odd chars', dim=8, memory_size=1)
+
+    expected = writer.encode(['a', 'bb', 'ccc'], writer_encoder)
+    # The reader opened before the rows existed and picks them up from disk
+    np.testing.assert_array_equal(reader.encode(['ccc', 'a', 'bb'], reader_encoder), expected[[2, 0, 1]])
+    assert reader_encoder.calls == []
+    assert reader.stats()['disk_hits'] == 3
+
+    reopened = EmbeddingCache(str(tmp_path), 'model/with:odd chars', dim=8)
+    assert reopened.stats()['disk_entries'] == 3
+
+
+def test_models_do_not_share_vectors(tmp_path):
+    encoder = CountingEncoder()
+    EmbeddingCache(str(tmp_path), 'model-a', dim=8).encode(['dhow'], encoder)
+    EmbeddingCache(str(tmp_path), 'model-b', dim=8).encode(['dhow'], encoder)
+    assert encoder.calls == [['dhow'], ['dhow']]
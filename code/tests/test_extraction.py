@@ -0,0 +1,31 @@
+# tests/test_extraction.py
+import pytest
+
+from ocr_infer import detect_vessel_type, extract_coordinates, parse_segment
+
+
+@pytest.mark.parametrize('segment, expected', [
+    ("At 05.30 UTC, an unidentified vessel was sighted at latitude 12.34 N, longitude 45.67 E, "
+     "moving at 12 knots towards the northeast. Suspicious.",
+     ((12.34, 45.67), 12.0, 'unidentified vessel', None, ['suspicious behavior'])),
+    ("Oil tanker at 12°30'S, 45°15'W heading 270 degrees, 8.5 kts, routine",
+     ((-12.5, -45.25), 8.5, 'oil tanker', 270.0, ['routine transit'])),
+    ("Multiple vessels moving north, illegal fishing fleet, distress",
+     (None, None, 'multiple vessels', 0, ['illegal activity suspected', 'vessel in distress'])),
+    ("Patrol boat bearing 45 degrees", (None, None, 'patrol boat', 45.0, [])),
+])
+def test_parse_segment(segment, expected):
+    assert parse_segment(segment) == expected
+
+
+def test_longest_vessel_type_wins():
+    assert detect_vessel_type('an oil tanker and a yacht') == 'oil tanker'
+    assert detect_vessel_type('a sailing yacht') == 'sailing yacht'
+    assert detect_vessel_type('nothing known here') == 'unknown'
+
+
+def test_degree_minute_coordinates_take_precedence():
+    text = "12°30'N, 45°15'E, reported as latitude 1.0 N, longitude 2.0 E"
+    assert extract_coordinates(text) == (12.5, 45.25)
+    assert extract_coordinates("LATITUDE 1.5 N, LONGITUDE 2.5 E") == (1.5, 2.5)
+    assert extract_coordinates("no position") is None
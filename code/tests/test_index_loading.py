@@ -0,0 +1,29 @@
+# tests/test_index_loading.py
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip('faiss')
+from ocr_infer import MaritimeTextProcessor  # noqa: E402
+
+
+@pytest.mark.parametrize('index_type', ['flat', 'ivf', 'hnsw'])
+def test_read_index_serves_the_same_results_mapped_or_not(tmp_path, index_type):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 32)).astype('float32')
+    if index_type == 'flat':
+        index = faiss.IndexFlatL2(32)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(32, 16)
+    else:
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(32), 32, 16)
+        index.train(vectors)
+    index.add(vectors)
+    path = tmp_path / 'maritime.index'
+    faiss.write_index(index, str(path))
+
+    config = {'index_type': index_type, 'index_params': {'nprobe': 16, 'efSearch': 64}}
+    mapped = MaritimeTextProcessor._read_index(None, path, config)
+    in_memory = MaritimeTextProcessor._read_index(None, path, {**config, 'mmap_index': False})
+
+    assert mapped.ntotal == in_memory.ntotal == 2000
+    np.testing.assert_array_equal(mapped.search(vectors[:10], 5)[1], in_memory.search(vectors[:10], 5)[1])
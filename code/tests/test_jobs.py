@@ -0,0 +1,73 @@
+# tests/test_jobs.py
+import asyncio
+import os
+
+import pytest
+
+from backend import app as app_module
+from backend.jobs import LocalJobQueue, QueueFull
+
+
+def test_local_queue_runs_jobs_and_records_failures():
+    async def handler(payload):
+        if payload == 'bad':
+            raise ValueError("unreadable report")
+        return {'payload': payload}
+
+    async def run():
+        queue = LocalJobQueue(handler, workers=1, maxsize=2)
+        await queue.start()
+        ok, bad = await queue.submit('good'), await queue.submit('bad')
+        await queue._queue.join()
+        await queue.stop()
+        return await queue.get(ok), await queue.get(bad)
+
+    ok, bad = asyncio.run(run())
+    assert (ok['status'], ok['result']) == ('done', {'payload': 'good'})
+    assert (bad['status'], bad['error']) == ('failed', "unreadable report")
+
+
+def test_full_queue_refuses_jobs():
+    async def run():
+        queue = LocalJobQueue(None, maxsize=1)
+        queue._queue = asyncio.Queue(maxsize=1)  # no workers, so jobs stay queued
+        assert not await queue.is_full()
+        await queue.submit('first')
+        assert await queue.is_full()
+        with pytest.raises(QueueFull):
+            await queue.submit('second')
+    asyncio.run(run())
+
+
+@pytest.fixture
+def idle_jobs(monkeypatch, tmp_path):
+    """A one-slot job queue without workers, spooling into tmp_path"""
+    queue = LocalJobQueue(None, maxsize=1)
+    queue._queue = asyncio.Queue(maxsize=1)
+    monkeypatch.setattr(app_module, 'jobs', queue)
+    monkeypatch.setattr(app_module, 'UPLOAD_DIR', str(tmp_path / 'uploads'))
+    return queue
+
+
+def test_process_report_refuses_a_full_queue_without_spooling(client, idle_jobs, tmp_path):
+    report = {'file': ('report.md', b'1. ```json\n{"latitude": 1, "longitude": 2}\n```\n')}
+    response = client.post('/process_report/', files=report)
+    assert response.status_code == 202
+    spooled = idle_jobs._payloads[response.json()['job_id']]
+    assert os.listdir(tmp_path / 'uploads') == [os.path.basename(spooled)]
+
+    response = client.post('/process_report/', files=report)
+    assert response.status_code == 429
+    assert response.headers['retry-after'] == '5'
+    assert len(os.listdir(tmp_path / 'uploads')) == 1
+
+
+def test_process_report_removes_the_spool_file_when_the_upload_fails(idle_jobs, tmp_path):
+    class BrokenUpload:
+        async def read(self, size):
+            raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(app_module.process_report(BrokenUpload()))
+    assert os.listdir(tmp_path / 'uploads') == []
+    assert idle_jobs.pending() == 0
@@ -0,0 +1,68 @@
+# tests/test_lexical_index.py
+import math
+
+import numpy as np
+
+from lexical_index import LexicalIndex, document_text, tokenize
+
+
+DOCUMENTS = [
+    {'name': 'Zone A', 'text': 'Tanker MV Orion sighted at 201700Z heading north'},
+    {'name': 'Zone B', 'text': 'Fishing dhow, tanker escort, tanker anchored'},
+    None,
+    {'name': 'Zone C', 'text': 'Orion MV departed', 'metadata': {'callsign': 'A4X-12'}},
+    {'name': 'Zone D', 'text': 'Submarine periscope reported'},
+]
+
+
+def naive_bm25(documents, query, k1=1.2, b=0.75):
+    """Textbook BM25 over tokenized documents, for checking the vectorized scores"""
+    tokens = {i: tokenize(document_text(doc)) for i, doc in enumerate(documents) if doc is not None}
+    avg_len = sum(map(len, tokens.values())) / len(tokens)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(term in doc_tokens for doc_tokens in tokens.values())
+        idf = math.log(1 + (len(tokens) - df + 0.5) / (df + 0.5))
+        for doc_id, doc_tokens in tokens.items():
+            tf = doc_tokens.count(term)
+            if tf:
+                norm = k1 * (1 - b + b * len(doc_tokens) / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def test_scores_match_textbook_bm25():
+    index = LexicalIndex.build(DOCUMENTS)
+    expected = naive_bm25(DOCUMENTS, 'tanker orion')
+    results = index.search('tanker orion', k=10)
+    assert {doc_id for doc_id, _ in results} == set(expected)
+    for doc_id, score in results:
+        assert math.isclose(score, expected[doc_id], rel_tol=1e-5)
+    assert [doc_id for doc_id, _ in results] == sorted(expected, key=lambda i: -expected[i])
+
+
+def test_mask_filters_results_without_changing_scores():
+    index = LexicalIndex.build(DOCUMENTS)
+    unfiltered = dict(index.search('tanker'))
+    mask = np.zeros(len(DOCUMENTS), dtype=bool)
+    mask[1] = True
+    filtered = index.search('tanker', mask=mask)
+    assert filtered == [(1, unfiltered[1])]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = LexicalIndex.build(DOCUMENTS, k1=1.5, b=0.6)
+    index.save(tmp_path / 'lexical.npz')
+    loaded = LexicalIndex.load(tmp_path / 'lexical.npz')
+    assert loaded.vocabulary == index.vocabulary
+    assert (loaded.k1, loaded.b) == (1.5, 0.6)
+    assert loaded.search('submarine periscope') == index.search('submarine periscope')
+
+
+def test_lookup_requires_consecutive_tokens_when_given_documents():
+    index = LexicalIndex.build(DOCUMENTS)
+    assert index.lookup('MV Orion') == [0, 3]
+    assert index.lookup('MV Orion', documents=DOCUMENTS) == [0]
+    assert index.lookup('A4X-12', documents=DOCUMENTS) == [3]
+    assert index.lookup('201700Z') == [0]
+    assert index.lookup('frigate') == []
@@ -0,0 +1,66 @@
+# tests/test_markdown_parser.py
+import random
+import re
+
+import pytest
+
+from backend.markdown_parser import iter_block_batches, iter_json_blocks, parse_markdown
+
+
+def findall(text):
+    return re.findall(r'```json(.*?)```', text, re.DOTALL)
+
+
+def chunked(text, sizes):
+    pos = 0
+    for size in sizes:
+        yield text[pos:pos + size]
+        pos += size
+    yield text[pos:]
+
+
+def random_report(rng):
+    pieces = ['# Report\n']
+    for i in range(rng.randrange(1, 30)):
+        pieces.append(rng.choice([
+            f'{i}. ```json\n{{"latitude": {rng.uniform(-90, 90)}, "longitude": 1, "type": "tanker"}}\n```\n',
+            f'{i}. ```\nFROM: HQ\nTO: ALL\n```\n',
+            'plain text with a stray ` and `` and ```js fence\n',
+            '```json```',
+            '```json\n{"description": "Küstenwache ⚓"}\n```',
+        ]))
+    if rng.random() < 0.3:
+        pieces.append('```json\n{"unterminated": true}\n')
+    return ''.join(pieces)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_streamed_blocks_match_findall_for_any_chunking(seed):
+    rng = random.Random(seed)
+    text = random_report(rng)
+    sizes = [rng.randrange(1, 12) for _ in range(len(text))]
+    assert list(iter_json_blocks(chunked(text, sizes))) == findall(text)
+    assert list(iter_json_blocks([text])) == findall(text)
+
+
+def test_file_batches_survive_multibyte_characters_across_chunks(tmp_path):
+    text = ''.join(random_report(random.Random(seed)) for seed in range(20))
+    path = tmp_path / 'report.md'
+    path.write_text(text, encoding='utf-8')
+    batches = list(iter_block_batches(path, batch_size=7, chunk_size=5))
+    assert all(len(batch) == 7 for batch in batches[:-1])
+    assert [block for batch in batches for block in batch] == findall(text)
+
+
+def test_oversized_blocks_are_skipped_and_parsing_resumes():
+    text = '```json{"a": 1}``` ```json' + 'x' * 100 + '``` ```json{"b": 2}```'
+    blocks = list(iter_json_blocks(chunked(text, [9] * 20), max_block_size=50))
+    assert blocks == ['{"a": 1}', '{"b": 2}']
+
+
+def test_parse_markdown_structures_contacts():
+    text = ('1. ```json\n{"coordinates": [{"lat": 12.5, "lon": 65.0}], "speed": 3, "type": "tanker"}\n```\n'
+            '2. ```json\nnot json\n```\n')
+    contacts = parse_markdown(text)
+    assert len(contacts) == 1
+    assert (contacts[0]['latitude'], contacts[0]['longitude'], contacts[0]['type']) == (12.5, 65.0, 'tanker')
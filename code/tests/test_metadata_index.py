@@ -0,0 +1,56 @@
+# tests/test_metadata_index.py
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from metadata_index import MetadataIndex, parse_dtg
+
+
+def make_documents(n, seed=0):
+    rng = np.random.default_rng(seed)
+    documents = []
+    for i in range(n):
+        if rng.random() < 0.1:
+            documents.append(None)
+            continue
+        documents.append({
+            'document_type': str(rng.choice(['message', 'surveillance_log'])),
+            'source_file': f"indian-navy-operation-zones_{i % 7}.md",
+            'metadata': {'priority': str(rng.choice(['URGENT', 'ROUTINE', 'FLASH'])),
+                         'date_time': f"{i % 28 + 1:02d}0930Z OCT 24"},
+        })
+    return documents
+
+
+def expected_mask(documents, predicate):
+    return np.array([doc is not None and predicate(doc) for doc in documents])
+
+
+@pytest.mark.parametrize('n', [1, 8, 13, 1000])
+def test_bitmaps_match_a_per_document_scan(n):
+    documents = make_documents(n)
+    index = MetadataIndex.build(documents)
+    assert index.bitmaps.shape[1] == (n + 7) // 8
+
+    np.testing.assert_array_equal(
+        index.select({'priority': 'urgent'}),
+        expected_mask(documents, lambda doc: doc['metadata']['priority'] == 'URGENT'))
+    np.testing.assert_array_equal(
+        index.select({'priority': ['FLASH', 'URGENT'], 'source_file': '*_3.md'}),
+        expected_mask(documents, lambda doc: doc['metadata']['priority'] in ('FLASH', 'URGENT')
+                      and doc['source_file'].endswith('_3.md')))
+
+
+def test_time_filters_and_round_trip(tmp_path):
+    documents = make_documents(100, seed=1)
+    MetadataIndex.build(documents).save(tmp_path / 'metadata.npz')
+    index = MetadataIndex.load(tmp_path / 'metadata.npz')
+
+    since = datetime(2024, 10, 20, tzinfo=timezone.utc)
+    np.testing.assert_array_equal(
+        index.select({'since': since, 'document_type': 'message'}),
+        expected_mask(documents, lambda doc: doc['document_type'] == 'message'
+                      and parse_dtg(doc['metadata']['date_time']) >= since.timestamp()))
+    with pytest.raises(ValueError):
+        index.select({'colour': 'grey'})
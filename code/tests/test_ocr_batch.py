@@ -0,0 +1,29 @@
+# tests/test_ocr_batch.py
+from dataclasses import asdict
+
+from ocr_batch import OCRConfig, ocr_batch
+from ocr_cache import OCRCache
+
+
+def test_cache_hits_skip_the_pool_and_missing_files_fail_alone(tmp_path):
+    cache = OCRCache(str(tmp_path / 'cache'))
+    page = tmp_path / 'page.png'
+    page.write_bytes(b'not really a png')
+    cache.put(cache.key(str(page), asdict(OCRConfig())), 'FROM: HQ')
+
+    results = list(ocr_batch([tmp_path / 'missing.png', page], cache=cache))
+
+    assert results[0][0] == str(tmp_path / 'missing.png')
+    assert results[0][1] is None and 'missing.png' in results[0][2]
+    assert results[1] == (str(page), 'FROM: HQ', None)
+
+
+def test_cache_keys_change_with_content_and_settings(tmp_path):
+    cache = OCRCache(str(tmp_path / 'cache'))
+    page = tmp_path / 'page.png'
+    page.write_bytes(b'one')
+    settings = asdict(OCRConfig())
+    key = cache.key(str(page), settings)
+    assert cache.key(str(page), {**settings, 'psm': 4}) != key
+    page.write_bytes(b'two')
+    assert cache.key(str(page), settings) != key
@@ -0,0 +1,49 @@
+# tests/test_ocr_preprocess.py
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+from PIL import Image  # noqa: E402
+
+from ocr_batch import OCRConfig, _crop_to_text, preprocess_image  # noqa: E402
+
+
+def page_with_text(width=800, height=600):
+    """White page with a block of dark 'text' lines in the middle"""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for row in range(250, 350, 20):
+        cv2.rectangle(page, (300, row), (500, row + 8), 0, -1)
+    return page
+
+
+def test_crop_keeps_the_text_block_with_a_margin():
+    cropped = _crop_to_text(page_with_text(), margin=10)
+    assert cropped.shape[0] < 200 and cropped.shape[1] < 300
+    assert (cropped < 128).any()
+
+
+def test_preprocess_downscales_to_the_target_dpi(tmp_path):
+    path = tmp_path / 'scan.png'
+    Image.fromarray(page_with_text()).save(path, dpi=(600, 600))
+    gray = preprocess_image(str(path), OCRConfig(deskew=False, crop=False))
+    assert gray.shape == (300, 400)
+
+
+def test_preprocess_straightens_a_rotated_page(tmp_path):
+    page = page_with_text()
+    matrix = cv2.getRotationMatrix2D((400, 300), 5, 1.0)
+    rotated = cv2.warpAffine(page, matrix, (800, 600), borderValue=255)
+    path = tmp_path / 'scan.png'
+    Image.fromarray(rotated).save(path)
+
+    straight = preprocess_image(str(path), OCRConfig(crop=False))
+    # Straight text lines leave whole rows of the block blank between them
+    block = straight[240:360, 320:480]
+    assert (block.min(axis=1) > 128).sum() > 50
+
+
+def test_config_from_dict_ignores_unknown_keys():
+    config = OCRConfig.from_dict({'psm': 4, 'whitelist': '0123456789NSEW', 'language': 'eng'})
+    assert (config.psm, config.whitelist) == (4, '0123456789NSEW')
+    assert config.tesseract_args() == ('--oem 1 --psm 4 -c preserve_interword_spaces=1 '
+                                       '-c tessedit_char_whitelist=0123456789NSEW')
@@ -0,0 +1,60 @@
+# tests/test_onnx_embedder.py
+import numpy as np
+
+from onnx_embedder import OnnxEmbedder, cache_model_name
+
+
+class FakeTokenizer:
+    """Token ids are character codes, padded to the longest text in the batch"""
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        width = min(max(len(text) for text in texts), max_length)
+        ids = np.zeros((len(texts), width), dtype='int64')
+        mask = np.zeros((len(texts), width), dtype='int64')
+        for row, text in enumerate(texts):
+            codes = [ord(c) for c in text[:width]]
+            ids[row, :len(codes)] = codes
+            mask[row, :len(codes)] = 1
+        return {'input_ids': ids, 'attention_mask': mask}
+
+
+class FakeSession:
+    """Hidden state of each token is (code, 1), so mean pooling gives (mean code, 1)"""
+    def __init__(self):
+        self.batch_widths = []
+
+    def run(self, outputs, feeds):
+        ids = feeds['input_ids']
+        self.batch_widths.append(ids.shape[1])
+        return [np.stack([ids, np.ones_like(ids)], axis=-1).astype('float32')]
+
+
+def make_embedder(pooling='mean', normalize=False):
+    embedder = OnnxEmbedder.__new__(OnnxEmbedder)
+    embedder.config = {'pooling': pooling, 'normalize': normalize, 'max_length': 64, 'embedding_dim': 2}
+    embedder.tokenizer = FakeTokenizer()
+    embedder.session = FakeSession()
+    embedder.input_names = ['input_ids', 'attention_mask']
+    return embedder
+
+
+def test_int8_vectors_get_their_own_cache_namespace():
+    assert cache_model_name('bge-small') == 'bge-small'
+    assert cache_model_name('bge-small', 'onnx') == 'bge-small@onnx-int8'
+    assert cache_model_name('bge-small', 'onnx', quantized=False) == 'bge-small@onnx'
+
+
+def test_encode_batches_by_length_and_returns_input_order():
+    embedder = make_embedder()
+    texts = ['b', 'dddd', 'aa', 'cccccccc', 'e']
+    result = embedder.encode(texts, batch_size=2)
+
+    assert embedder.session.batch_widths == [8, 2, 1]
+    expected = [[np.mean([ord(c) for c in text]), 1.0] for text in texts]
+    np.testing.assert_allclose(result, expected)
+    assert result.dtype == np.float32
+
+
+def test_cls_pooling_with_normalization():
+    embedder = make_embedder(pooling='cls', normalize=True)
+    result = embedder.encode(['ab'])
+    np.testing.assert_allclose(result, [np.array([97.0, 1.0]) / np.hypot(97.0, 1.0)], rtol=1e-6)
@@ -0,0 +1,71 @@
+# tests/test_rag_train.py
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip('faiss')
+pytest.importorskip('sentence_transformers')
+pytest.importorskip('tqdm')
+from embedding_cache import EmbeddingCache  # noqa: E402
+from rag_train import MaritimeRAGTrainer  # noqa: E402
+
+DIM = 8
+
+
+def fake_encode(texts):
+    """Deterministic vectors from the text hash, standing in for the embedding model"""
+    return np.array([np.frombuffer(hashlib.sha256(text.encode()).digest()[:DIM], dtype='uint8')
+                     for text in texts], dtype='float32')
+
+
+def make_trainer(output_dir):
+    """A flat-index trainer without the embedding and generator models"""
+    trainer = MaritimeRAGTrainer.__new__(MaritimeRAGTrainer)
+    trainer.output_dir = output_dir
+    trainer.index_type = 'flat'
+    trainer.index_params = {}
+    trainer.embedding_backend = 'torch'
+    trainer.embedding_dim = DIM
+    trainer.embedding_cache = EmbeddingCache(str(output_dir / 'embedding_cache'), 'fake', DIM)
+    trainer._encode_batch = fake_encode
+    trainer.index = None
+    trainer.documents = []
+    trainer.manifest = {}
+    return trainer
+
+
+def block(number, text):
+    return {'source_file': 'report.md', 'block_number': number, 'text': text, 'metadata': {}}
+
+
+def test_update_embeds_only_new_and_changed_blocks(tmp_path):
+    trainer = make_trainer(tmp_path)
+    trainer.process_documents([block(1, 'tanker north'), block(2, 'dhow east'), block(3, 'submarine')])
+    trainer.save_artifacts()
+
+    updated = make_trainer(tmp_path)
+    updated.load_artifacts()
+    stats = updated.update_documents([block(1, 'tanker north'), block(2, 'dhow west'), block(4, 'cargo')])
+
+    assert stats == {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 1}
+    assert updated.index.ntotal == 3
+    assert updated.documents[1] is None and updated.documents[2] is None
+    assert [doc['text'] for doc in updated.documents[3:]] == ['dhow west', 'cargo']
+    _, ids = updated.index.search(fake_encode(['dhow west']), 1)
+    assert ids[0][0] == 3
+
+
+def test_save_keeps_processor_settings_in_config(tmp_path):
+    with open(tmp_path / 'config.json', 'w') as f:
+        json.dump({'retrieval': 'hybrid', 'index_type': 'hnsw'}, f)
+    trainer = make_trainer(tmp_path)
+    trainer.process_documents([block(1, 'tanker north')])
+    trainer.save_artifacts()
+
+    with open(tmp_path / 'config.json') as f:
+        config = json.load(f)
+    assert config['retrieval'] == 'hybrid'
+    assert config['index_type'] == 'flat'
+    assert config['embedding_dim'] == DIM
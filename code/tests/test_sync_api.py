@@ -0,0 +1,32 @@
+# tests/test_sync_api.py
+import sqlite3
+
+from backend import database
+from backend.websocket import LIVE_FIELDS
+
+
+def test_changes_follow_a_viewport_page(client, make_contacts, db):
+    database.store_many(make_contacts(3))
+    seq = client.get('/contacts', params={'bbox': '50,0,75,25'}).json()['seq']
+    database.store_many(make_contacts(1, seed=1))
+    conn = sqlite3.connect(db)
+    with conn:
+        conn.execute("DELETE FROM reports WHERE id = 1")
+    conn.close()
+
+    changes = client.get('/sync/changes', params={'since': seq}).json()
+    assert changes['seq'] == 5
+    assert changes['fields'] == list(LIVE_FIELDS)
+    assert [row[0] for row in changes['rows']] == [4]
+    assert changes['deleted'] == [1]
+    assert changes['more'] is False
+
+
+def test_changes_page_and_reset(client, make_contacts):
+    database.store_many(make_contacts(5))
+    paged = client.get('/sync/changes', params={'since': 0, 'limit': 2}).json()
+    assert paged['seq'] == 2 and paged['more'] is True
+    assert [row[0] for row in paged['rows']] == [1, 2]
+
+    assert client.get('/sync/changes', params={'since': 99}).json() == {'reset': True, 'seq': 5}
+    assert client.get('/sync/snapshot').status_code == 404
@@ -0,0 +1,69 @@
+# tests/test_text_processor.py
+import json
+
+import numpy as np
+import pytest
+
+from ocr_infer import MaritimeTextProcessor
+
+REPORT = """1. At 05.30 UTC, an unidentified vessel was sighted at latitude 12.34 N, longitude 45.67 E,
+moving at 12 knots. Suspicious behaviour.
+
+2. Oil tanker at 12°30'S, 45°15'W heading 270 degrees, 8.5 kts, routine transit."""
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    (tmp_path / 'config.json').write_text(json.dumps({
+        'embedding_model': 'sentence-transformers/all-MiniLM-L6-v2',
+        'generator_model': 'google/flan-t5-small',
+    }))
+    return tmp_path
+
+
+def test_regex_only_extraction_needs_no_index_or_model(model_dir):
+    processor = MaritimeTextProcessor(str(model_dir), retrieval=False)
+    contacts = processor.extract_maritime_info(REPORT)
+
+    assert [c.to_dict()['type'] for c in contacts] == ['unidentified vessel', 'oil tanker']
+    assert (contacts[0].latitude, contacts[0].longitude, contacts[0].speed) == (12.34, 45.67, 12.0)
+    assert contacts[1].heading == 270.0
+    assert all(c.related_documents == [] for c in contacts)
+
+
+def test_retrieval_setting_comes_from_config_unless_overridden(model_dir):
+    assert MaritimeTextProcessor(str(model_dir)).retrieval is True
+    config = json.loads((model_dir / 'config.json').read_text())
+    (model_dir / 'config.json').write_text(json.dumps({**config, 'retrieval': False}))
+    assert MaritimeTextProcessor(str(model_dir)).retrieval is False
+    assert MaritimeTextProcessor(str(model_dir), retrieval=True).retrieval is True
+
+
+def test_heavy_components_load_on_first_use(model_dir):
+    processor = MaritimeTextProcessor(str(model_dir), retrieval=False)
+    processor.extract_maritime_info(REPORT)
+    assert processor._embedding_model is None and processor._generator is None
+    assert processor._index is None and processor._embedding_cache is None
+    assert not (model_dir / 'embedding_cache').exists()
+
+    class FakeTensor:
+        def __init__(self, n):
+            self.n = n
+
+        def cpu(self):
+            return self
+
+        def numpy(self):
+            return np.ones((self.n, 4), dtype='float32')
+
+    class FakeModel:
+        def encode(self, texts, **kwargs):
+            return FakeTensor(len(texts))
+
+    config = json.loads((model_dir / 'config.json').read_text())
+    (model_dir / 'config.json').write_text(json.dumps({**config, 'embedding_dim': 4, 'embedding_batching': False}))
+    processor = MaritimeTextProcessor(str(model_dir))
+    processor._embedding_model = FakeModel()
+    vectors = processor.embedding_cache.encode(['dhow sighted'], processor._encode)
+    assert vectors.shape == (1, 4)
+    assert (model_dir / 'embedding_cache').is_dir()
@@ -0,0 +1,110 @@
+# tests/test_websocket.py
+import asyncio
+import json
+import time
+
+from backend import app as app_module
+from backend.clusters import ClusterIndex
+from backend.websocket import ContactHub
+
+
+def contact(contact_id, type='tanker', latitude=10.0, longitude=60.0):
+    return {'id': contact_id, 'latitude': latitude, 'longitude': longitude, 'type': type,
+            'significance': 'routine'}
+
+
+def drain(subscriber):
+    frames = []
+    while subscriber.frames:
+        frames.append(json.loads(subscriber.frames.popleft()))
+    return frames
+
+
+def test_flush_sends_one_frame_per_batch():
+    # Without a running event loop every publish flushes straight away
+    hub = ContactHub(last_seq=10)
+    subscriber = hub.subscribe()
+    hub.publish(contact(1), seq=11)
+    hub.publish(contact(2), seq=12)
+
+    frames = drain(subscriber)
+    assert [(f['first_seq'], f['seq']) for f in frames] == [(11, 11), (12, 12)]
+    assert frames[0]['fields'] == ['id', 'latitude', 'longitude', 'type', 'significance']
+    assert frames[0]['rows'] == [[1, 10.0, 60.0, 'tanker', 'routine']]
+
+
+def test_filtered_frames_cover_the_skipped_seqs():
+    hub = ContactHub()
+    subscriber = hub.subscribe(types=['submarine'])
+    hub.publish(contact(1, type='submarine'), seq=1)
+    hub.publish(contact(2), seq=2)
+    hub.publish(contact(3), seq=3)
+    hub.publish(contact(4, type='submarine'), seq=4)
+
+    frames = drain(subscriber)
+    # Events 2 and 3 did not match, so the second frame starts right after the first
+    assert [(f['first_seq'], f['seq']) for f in frames] == [(1, 1), (2, 4)]
+    assert [row[0] for f in frames for row in f['rows']] == [1, 4]
+
+
+def test_subscribe_replays_history_after_last_seq():
+    hub = ContactHub()
+    for seq in range(1, 6):
+        hub.publish(contact(seq, type='cargo' if seq % 2 else 'tanker'), seq=seq)
+
+    subscriber = hub.subscribe(last_seq=2, types=['cargo'])
+    frames = drain(subscriber)
+    assert frames == [{'first_seq': 3, 'seq': 5, 'fields': frames[0]['fields'],
+                       'rows': [[3, 10.0, 60.0, 'cargo', 'routine'], [5, 10.0, 60.0, 'cargo', 'routine']]}]
+
+    hub.publish(contact(6, type='cargo'), seq=6)
+    assert [(f['first_seq'], f['seq']) for f in drain(subscriber)] == [(6, 6)]
+
+
+def test_overflow_replaces_the_queue_with_a_resync():
+    # Without a running event loop every publish flushes straight away
+    hub = ContactHub(queue_size=3, batch_size=1)
+    subscriber = hub.subscribe()
+    for seq in range(1, 5):
+        hub.publish(contact(seq), seq=seq)
+
+    frames = drain(subscriber)
+    assert frames[0] == {'resync': True, 'dropped': 3}
+    assert [row[0] for row in frames[1]['rows']] == [4]
+    # The next frame still carries first_seq, so the client sees the gap it has to fill
+    assert (frames[1]['first_seq'], frames[1]['seq']) == (4, 4)
+    assert subscriber.dropped == 3
+
+
+def test_late_events_keep_last_seq_and_history_ordered():
+    hub = ContactHub(history_size=3)
+    for seq in (1, 2, 4, 5):
+        hub.publish(contact(seq), seq=seq)
+    hub.publish(contact(3), seq=3)
+
+    assert hub.last_seq == 5
+    assert [seq for seq, _ in hub.history] == [3, 4, 5]
+    assert hub.oldest_seq() == 3
+    # Older than anything the full history keeps
+    hub.publish(contact(0), seq=0)
+    assert [seq for seq, _ in hub.history] == [3, 4, 5]
+
+
+def test_concurrent_ingest_publishes_in_seq_order(db, make_contacts, monkeypatch):
+    hub = ContactHub(flush_interval=60)
+    monkeypatch.setattr(app_module, 'hub', hub)
+    monkeypatch.setattr(app_module, 'clusters', ClusterIndex())
+    delays = iter([0.05, 0])
+
+    def slow_first_sync():
+        time.sleep(next(delays))
+    monkeypatch.setattr(app_module, 'sync_contact_store', slow_first_sync)
+
+    async def ingest_two():
+        await asyncio.gather(app_module.store_and_publish(make_contacts(20)),
+                             app_module.store_and_publish(make_contacts(20, seed=1)))
+    asyncio.run(ingest_two())
+
+    seqs = [seq for seq, _ in hub.history]
+    assert seqs == list(range(1, 41))
+    assert hub.last_seq == 40